@@ -0,0 +1,191 @@
+"""
+Benchmark do carregamento do dashboard sobre um histórico sintético.
+
+Compara o caminho antigo (SELECT *, CSV inteiro, 'ativo' e legenda via apply linha a linha,
+média geométrica via callback no groupby) com o atual de dashboard_services (projeção de
+colunas, dtypes 'category', isin/np.select e o resumo materializado em 'resumo_modelos').
+
+Uso (na raiz do projeto):
+    python benchmarks/bench_dashboard.py [--linhas 500000] [--modelos 300]
+Roda num diretório temporário: o banco real em data/ não é tocado.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+ESTADOS = ['novo', 'otimo_estado', 'funcional', 'semifuncional', 'nao_funcional', 'usado']
+LOJAS = ['Mercado Livre', 'Tecla Center', 'Ninja Som', 'Made in Brazil', 'Multisom', 'Habro']
+MARCAS = ['Yamaha', 'Roland', 'Casio', 'Korg', 'Kawai', 'Nord']
+
+# --- DADOS SINTÉTICOS ---
+def gerar_dados(linhas, modelos):
+    from conexao import obter_conexao, transacao
+    from migracoes import aplicar_migracoes, m001_tabela_precos
+
+    rnd = random.Random(42)
+    nomes = [f"{rnd.choice(MARCAS)} P-{100 + i}" for i in range(modelos)]
+    # Tabela crua primeiro, carga, depois as migrações (índices, triggers e resumo de uma vez)
+    m001_tabela_precos(obter_conexao())
+    analise = "Anúncio analisado: teclado com ação de martelo, fonte original, sem avarias visíveis. " * 5
+    with transacao() as conn:
+        conn.executemany('''
+            INSERT INTO precos (data_consulta, modelo, termo_pesquisa, preco, custo_reparo, condicao,
+                                estado_detalhado, loja, localizacao, tem_envio, link, ai_analise, ativo)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            (
+                f"2026-{rnd.randint(1, 9):02d}-{rnd.randint(1, 28):02d}", nome, nome,
+                round(rnd.uniform(1500, 30000), 2), rnd.choice([0, 0, 0, 250, 800]), 'usado',
+                rnd.choice(ESTADOS), rnd.choice(LOJAS), 'SP', 1,
+                f"https://exemplo.com/anuncio/{i}", analise, int(rnd.random() < 0.9),
+            )
+            for i in range(linhas) for nome in [rnd.choice(nomes)]
+        ))
+    aplicar_migracoes()
+
+    pd.DataFrame({
+        'modelo': nomes,
+        'mecanica': [rnd.randint(1, 10) for _ in nomes],
+        'som_polifonia': [rnd.randint(1, 10) for _ in nomes],
+        'customizacao': [rnd.randint(1, 10) for _ in nomes],
+        'score_geral': [rnd.randint(30, 100) for _ in nomes],
+        'justificativa': ["Justificativa longa do score do modelo, com prós e contras detalhados. " * 10 for _ in nomes],
+        'priorizado': [rnd.random() < 0.1 for _ in nomes],
+    }).to_csv(os.path.join("data", "modelos_alvo.csv"), index=False)
+
+# --- CAMINHO ANTIGO (como o dashboard fazia antes) ---
+def media_geometrica(series):
+    arr = np.array(series)
+    arr = arr[arr > 0]
+    if len(arr) == 0: return 0
+    return np.exp(np.mean(np.log(arr)))
+
+def obter_legenda_detalhada(row):
+    if str(row.get('priorizado', False)).lower() in ['true', 'sim']: return "⭐ PRIORIDADE"
+    estado_bd = str(row.get('estado_detalhado', '')).lower()
+    if 'novo' in estado_bd: return "Novo"
+    if 'otimo' in estado_bd or 'ótimo' in estado_bd: return "Ótimo Estado"
+    if 'semi' in estado_bd: return "Semifuncional"
+    if 'nao' in estado_bd or 'não' in estado_bd: return "Não Funcional"
+    return "Funcional"
+
+def caminho_antigo():
+    from conexao import obter_conexao
+    tempos = {}
+    inicio = time.perf_counter()
+    df_precos = pd.read_sql_query("SELECT * FROM precos", obter_conexao())
+    df_ref = pd.read_csv(os.path.join("data", "modelos_alvo.csv"), on_bad_lines='skip')
+    df_precos['modelo_key'] = df_precos['modelo'].astype(str).str.strip().str.upper()
+    df_ref['modelo_key'] = df_ref['modelo'].astype(str).str.strip().str.upper()
+    df_full = pd.merge(df_precos, df_ref, on='modelo_key', how='left', suffixes=('', '_csv'))
+    df_full['custo_reparo'] = df_full['custo_reparo'].fillna(0)
+    df_full['custo_total'] = df_full['preco'] + df_full['custo_reparo']
+    tempos['carga'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    df_full['ativo'] = df_full['ativo'].apply(lambda x: x in [1, '1', True, 'True'])
+    tempos['ativo'] = time.perf_counter() - inicio
+
+    df_ativos = df_full[df_full['ativo'] == True].copy()
+    inicio = time.perf_counter()
+    stats = df_ativos.groupby('modelo_key')['custo_total'].agg(
+        Minimo='min', Maximo='max', MediaGeo=media_geometrica, Qtd='count'
+    ).reset_index()
+    tempos['estatisticas'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    legenda = df_ativos.apply(obter_legenda_detalhada, axis=1)
+    tempos['legenda'] = time.perf_counter() - inicio
+    return tempos, df_full, stats, legenda
+
+# --- CAMINHO ATUAL ---
+def media_log_por_modelo(df_ativos):
+    """Média geométrica vetorizada (groupby da média dos logs), sem callback Python por grupo."""
+    positivos = df_ativos[df_ativos['custo_total'] > 0]
+    return np.exp(np.log(positivos['custo_total']).groupby(positivos['modelo_key'], observed=True).mean())
+
+def caminho_atual():
+    import dashboard_services as servicos
+    tempos = {}
+    inicio = time.perf_counter()
+    _, df_full = servicos.carregar_dados_completos()
+    tempos['carga'] = time.perf_counter() - inicio
+
+    # 'ativo' já vem vetorizado (isin) dentro da carga; medido à parte para comparação
+    bruto = pd.Series(np.random.default_rng(0).integers(0, 2, len(df_full)))
+    inicio = time.perf_counter()
+    bruto.isin([1, '1', True, 'True'])
+    tempos['ativo'] = time.perf_counter() - inicio
+
+    df_ativos = df_full[df_full['ativo'] == True].copy()
+    inicio = time.perf_counter()
+    stats = servicos.calcular_estatisticas_mercado()
+    tempos['estatisticas'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    legenda = servicos.legenda_detalhada(df_ativos)
+    tempos['legenda'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    media_log = media_log_por_modelo(df_ativos)
+    tempos['media_log_groupby'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    servicos.carregar_dados_completos()
+    tempos['rerun_sem_mudancas'] = time.perf_counter() - inicio
+    return tempos, df_full, stats, legenda, media_log
+
+def mb(df):
+    return df.memory_usage(deep=True).sum() / 1024 / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--linhas", type=int, default=500_000)
+    parser.add_argument("--modelos", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        os.chdir(pasta)
+        os.makedirs("data")
+        inicio = time.perf_counter()
+        gerar_dados(args.linhas, args.modelos)
+        print(f"🏗️ {args.linhas} linhas / {args.modelos} modelos gerados em {time.perf_counter() - inicio:.1f}s\n")
+
+        t_antigo, full_antigo, stats_antigo, legenda_antiga = caminho_antigo()
+        t_atual, full_atual, stats_atual, legenda_atual, media_log = caminho_atual()
+
+        # Os dois caminhos precisam concordar antes de comparar tempos
+        ativos = full_atual['ativo'].to_numpy()
+        assert (full_antigo['ativo'].to_numpy() == ativos).all()
+        assert (legenda_antiga.to_numpy() == legenda_atual).all()
+        geo_antiga = stats_antigo.set_index('modelo_key')['MediaGeo']
+        geo_atual = stats_atual.set_index('modelo_key')['MediaGeo']
+        assert np.allclose(geo_antiga.sort_index(), geo_atual.loc[geo_antiga.index].sort_index())
+        assert np.allclose(geo_antiga.loc[media_log.index.astype(str)], media_log.to_numpy())
+
+        print(f"{'etapa':<22}{'antes (s)':>12}{'depois (s)':>12}{'ganho':>10}")
+        for etapa in ['carga', 'ativo', 'estatisticas', 'legenda']:
+            antes, depois = t_antigo[etapa], t_atual[etapa]
+            print(f"{etapa:<22}{antes:>12.3f}{depois:>12.3f}{antes / max(depois, 1e-9):>9.0f}x")
+        total_antes = sum(t_antigo.values())
+        total_depois = sum(t_atual[e] for e in ['carga', 'estatisticas', 'legenda'])
+        print(f"{'total':<22}{total_antes:>12.3f}{total_depois:>12.3f}{total_antes / total_depois:>9.1f}x")
+        print(f"{'media_log_groupby':<22}{t_antigo['estatisticas']:>12.3f}{t_atual['media_log_groupby']:>12.3f}"
+              f"{t_antigo['estatisticas'] / t_atual['media_log_groupby']:>9.0f}x   (alternativa em memória ao resumo)")
+        print(f"{'rerun sem mudanças':<22}{'':>12}{t_atual['rerun_sem_mudancas']:>12.4f}")
+
+        antes, depois = mb(full_antigo), mb(full_atual)
+        print(f"\n💾 df_full: {antes:.1f} MB -> {depois:.1f} MB ({antes / depois:.1f}x menor)")
+        print("   dtypes:", ", ".join(f"{c}={full_atual[c].dtype}" for c in ['modelo_key', 'loja', 'estado_detalhado']))
+        os.chdir(os.path.dirname(pasta))
+
+if __name__ == "__main__":
+    main()
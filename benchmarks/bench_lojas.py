@@ -0,0 +1,159 @@
+"""
+Benchmark da extração de produtos das lojas (stores_br): o extrair_generico antigo (todo <a href>,
+sobe até 3 pais procurando "R$" com .text, dedupe O(n²) com any()) contra o atual (seletores
+declarados da loja; heurística genérica só como fallback, com cache de texto e dedupe por set).
+
+Uso (na raiz do projeto):
+    python benchmarks/bench_lojas.py                                   # páginas sintéticas
+    python benchmarks/bench_lojas.py --loja TeclaCenter --modelo "FP-30" salvas/*.html
+    python benchmarks/bench_lojas.py --produtos 1000 --repeticoes 3
+Antes de medir, confere que o caminho atual devolve os mesmos produtos que o antigo.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from stores_br import extrair, extrair_generico, limpar_preco
+
+# --- EXTRAÇÃO ANTIGA (como stores_br fazia) ---
+def extrair_antigo(soup, modelo_alvo, nome_loja):
+    resultados = []
+    termo_chave = modelo_alvo.lower().replace("roland", "").replace(" ", "").replace("-", "")
+
+    links = soup.find_all('a', href=True)
+
+    for link in links:
+        try:
+            texto_link = link.text.strip()
+            if not texto_link: continue
+
+            texto_comparacao = texto_link.lower().replace(" ", "").replace("-", "")
+
+            if termo_chave in texto_comparacao:
+                pai = link.parent
+                container_produto = None
+
+                for _ in range(3):
+                    if pai:
+                        if "R$" in pai.text:
+                            container_produto = pai
+                            break
+                        pai = pai.parent
+
+                if container_produto:
+                    match_preco = re.search(r'R\$\s?[\d\.]+,?\d{0,2}', container_produto.text)
+                    if match_preco:
+                        preco_final = limpar_preco(match_preco.group(0))
+                        if preco_final < 1500: continue
+
+                        href = link['href']
+                        if not href.startswith('http'):
+                            base_url = "https://www.teclacenter.com.br" if "teclacenter" in nome_loja.lower() else "https://www.ninjasom.com.br"
+                            href = base_url + href
+
+                        if not any(r['link'] == href for r in resultados):
+                            resultados.append({
+                                'loja': nome_loja,
+                                'modelo': modelo_alvo,
+                                'titulo': texto_link,
+                                'preco': preco_final,
+                                'link': href,
+                                'condicao': 'Novo',
+                                'tem_envio': True,
+                                'localizacao': 'Loja Online'
+                            })
+        except Exception:
+            continue
+    return resultados
+
+# --- PÁGINAS SINTÉTICAS ---
+def _preco(rnd):
+    return f"R$ {rnd.randint(800, 15000):,}".replace(',', '.') + ",00"
+
+def pagina_magento(rnd, produtos):
+    """Grade de busca no formato do Magento 2 (TeclaCenter), com menu e rodapé cheios de links."""
+    cards = []
+    for i in range(produtos):
+        # Metade dos produtos é do modelo buscado; parte repete o link (variações de cor)
+        nome = f"Piano Digital Roland FP-30X {i % 7}" if i % 2 else f"Teclado Casio CT-{i}"
+        url = f"/piano-produto-{i - 1 if i % 10 == 9 else i}.html"
+        cards.append(f'''
+            <li class="item product product-item"><div class="product-item-info">
+              <a href="{url}" class="product photo product-item-photo"><img src="x.jpg" alt=""></a>
+              <div class="product details product-item-details">
+                <strong class="product name product-item-name"><a class="product-item-link" href="{url}">{nome}</a></strong>
+                <div class="price-box price-final_price"><span class="price-container" data-price-type="finalPrice">
+                  <span class="price">{_preco(rnd)}</span></span></div>
+                <div class="product-item-actions"><a href="/checkout/cart/add/{i}">Comprar</a>
+                  <a href="/wishlist/{i}">Favoritar</a><a href="/compare/{i}">Comparar</a></div>
+              </div></div></li>''')
+    menu = ''.join(f'<li><a href="/categoria-{k}.html">Categoria {k} Roland FP-30X acessórios</a></li>' for k in range(300))
+    return (f'<html><body><header><ul>{menu}</ul></header>'
+            f'<ol class="products list items product-items">{"".join(cards)}</ol>'
+            f'<footer><ul>{menu}</ul></footer></body></html>')
+
+def pagina_desconhecida(rnd, produtos):
+    """Layout que nenhum adaptador conhece: só a heurística genérica acha os produtos."""
+    cards = []
+    for i in range(produtos):
+        nome = f"Piano Digital Roland FP-30X {i % 7}" if i % 2 else f"Teclado Casio CT-{i}"
+        url = f"/p/{i - 1 if i % 10 == 9 else i}"
+        cards.append(f'<div class="vitrine-item"><div class="info"><a href="{url}">{nome}</a>'
+                     f'<p class="valor">{_preco(rnd)}</p></div><a href="{url}"><img src="x.jpg"></a></div>')
+    menu = ''.join(f'<li><a href="/c/{k}">Categoria {k} Roland FP-30X acessórios</a></li>' for k in range(300))
+    return f'<html><body><ul>{menu}</ul><div class="vitrine">{"".join(cards)}</div><ul>{menu}</ul></body></html>'
+
+def medir(funcao, soups, modelo, loja, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for soup in soups:
+            funcao(soup, modelo, loja)
+    return (time.perf_counter() - inicio) / (repeticoes * len(soups))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("arquivos", nargs="*", help="Páginas de busca salvas (.html) de uma loja")
+    parser.add_argument("--loja", default="TeclaCenter")
+    parser.add_argument("--modelo", default="Roland FP-30X")
+    parser.add_argument("--produtos", type=int, default=500, help="Produtos por página sintética")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.arquivos:
+        cenarios = [(f"{len(args.arquivos)} páginas salvas ({args.loja})", args.loja,
+                     [open(c, encoding='utf-8', errors='replace').read() for c in args.arquivos])]
+    else:
+        rnd = random.Random(3)
+        cenarios = [
+            (f"Magento, {args.produtos} produtos (seletores)", "TeclaCenter", [pagina_magento(rnd, args.produtos)]),
+            (f"layout desconhecido, {args.produtos} produtos (genérico)", "TeclaCenter", [pagina_desconhecida(rnd, args.produtos)]),
+        ]
+
+    print(f"{'cenário':<48}{'antes (ms)':>12}{'depois (ms)':>13}{'ganho':>8}{'itens':>7}")
+    for nome, loja, paginas in cenarios:
+        soups = [BeautifulSoup(html, 'html.parser') for html in paginas]
+        for soup in soups:
+            antigo, novo = extrair_antigo(soup, args.modelo, loja), extrair(soup, args.modelo, loja)
+            # Mesmo conjunto de produtos (a ordem pode diferir: cards vs. links)
+            assert sorted(map(str, antigo)) == sorted(map(str, novo)), f"{nome}: extração divergiu"
+        t_antigo = medir(extrair_antigo, soups, args.modelo, loja, args.repeticoes)
+        t_novo = medir(extrair, soups, args.modelo, loja, args.repeticoes)
+        itens = sum(len(extrair(s, args.modelo, loja)) for s in soups)
+        print(f"{nome:<48}{t_antigo * 1000:>12.1f}{t_novo * 1000:>13.1f}{t_antigo / t_novo:>7.1f}x{itens:>7}")
+
+    # Só o fallback (mesma página desconhecida), para isolar o ganho do cache de texto + set
+    if not args.arquivos:
+        soup = BeautifulSoup(cenarios[1][2][0], 'html.parser')
+        t_antigo = medir(extrair_antigo, [soup], args.modelo, "TeclaCenter", args.repeticoes)
+        t_novo = medir(extrair_generico, [soup], args.modelo, "TeclaCenter", args.repeticoes)
+        print(f"{'extrair_generico isolado':<48}{t_antigo * 1000:>12.1f}{t_novo * 1000:>13.1f}{t_antigo / t_novo:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark do parse da página de resultados do Mercado Livre: o parse antigo de
+buscar_mercadolivre (BeautifulSoup + html.parser na página inteira, find repetido por card)
+contra o parser_ml (SoupStrainer nos cards, seletores compilados, layout lembrado).
+
+Uso (na raiz do projeto):
+    python benchmarks/bench_parser_ml.py                      # páginas sintéticas (~600 KB, 3 layouts)
+    python benchmarks/bench_parser_ml.py paginas/*.html       # páginas salvas do ML
+    python benchmarks/bench_parser_ml.py --repeticoes 10
+Antes de medir, confere que os dois parsers devolvem exatamente os mesmos anúncios.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import parser_ml
+from parser_ml import limpar_preco, parsear_resultados
+
+# --- PARSE ANTIGO (como buscar_mercadolivre fazia) ---
+def parse_antigo(html, modelo_pai, termo_busca):
+    resultados = []
+    soup = BeautifulSoup(html, 'html.parser')
+
+    produtos_html = soup.find_all('li', class_='ui-search-layout__item')
+    if not produtos_html:
+        produtos_html = soup.find_all('div', class_='ui-search-result__wrapper')
+    if not produtos_html:
+        produtos_html = soup.find_all('div', class_='andes-card')
+
+    for produto in produtos_html:
+        try:
+            titulo_elem = produto.find('h2', class_='ui-search-item__title')
+            if not titulo_elem: titulo_elem = produto.find('a', class_='ui-search-item__group__element')
+            if not titulo_elem: titulo_elem = produto.find('h3')
+            if not titulo_elem: continue
+            titulo = titulo_elem.text.strip()
+
+            link_elem = produto.find('a', class_='ui-search-link')
+            if not link_elem: link_elem = produto.find('a')
+            link = link_elem['href'] if link_elem else "Link não encontrado"
+
+            preco_final = 0.0
+            price_container = produto.find('div', class_='ui-search-price__second-line')
+            if not price_container: price_container = produto
+            preco_elem = price_container.find('span', class_='andes-money-amount__fraction')
+            if preco_elem:
+                preco_final = limpar_preco(preco_elem.text)
+
+            if preco_final < 500: continue
+
+            texto_completo = produto.text.lower()
+            tem_frete_gratis = "frete grátis" in texto_completo or "chegará grátis" in texto_completo
+            local_elem = produto.find('span', class_='ui-search-item__location')
+            localizacao = local_elem.text.strip() if local_elem else "Local não informado"
+
+            resultados.append({
+                'modelo': modelo_pai,
+                'termo_usado': termo_busca,
+                'titulo': titulo,
+                'preco': preco_final,
+                'link': link,
+                'tem_envio': tem_frete_gratis,
+                'localizacao': localizacao,
+                'site': 'Mercado Livre'
+            })
+        except Exception:
+            continue
+    return resultados
+
+# --- PÁGINAS SINTÉTICAS ---
+def _card(rnd, i, layout):
+    # Milhar com ponto, como no site ("3.499"); parte dos cards abaixo do preço mínimo
+    preco = f"{rnd.choice([rnd.randint(80, 499), rnd.randint(1500, 12000)]):,}".replace(',', '.')
+    frete = '<p class="ui-search-item__shipping">Frete grátis</p>' if rnd.random() < 0.4 else ''
+    corpo = f'''
+        <div class="ui-search-result__image"><a href="https://produto.mercadolivre.com.br/MLB-{i}"><img src="x.webp" alt="foto"></a></div>
+        <div class="ui-search-result__content">
+          <a class="ui-search-item__group__element ui-search-link" href="https://produto.mercadolivre.com.br/MLB-{i}-piano-_JM#position={i}">
+            <h2 class="ui-search-item__title">Piano Digital Yamaha P-{100 + i % 50} 88 Teclas Usado {i}</h2></a>
+          <div class="ui-search-price ui-search-price--size-medium">
+            <div class="ui-search-price__second-line"><span class="andes-money-amount">
+              <span class="andes-money-amount__currency-symbol">R$</span>
+              <span class="andes-money-amount__fraction">{preco}</span></span></div></div>
+          {frete}
+          <span class="ui-search-item__location">São Paulo - SP</span>
+          <ul class="ui-search-item__attributes">{''.join(f'<li>atributo {k}</li>' for k in range(6))}</ul>
+        </div>'''
+    if layout == 0:
+        return f'<li class="ui-search-layout__item"><div class="andes-card ui-search-result">{corpo}</div></li>'
+    if layout == 1:
+        return f'<div class="ui-search-result__wrapper"><div class="ui-search-result">{corpo}</div></div>'
+    return f'<div class="andes-card andes-card--flat">{corpo}</div>'
+
+def pagina_sintetica(rnd, layout, cards=54):
+    # O resto da página real: scripts com o estado da app, menus, filtros e rodapé
+    script = '<script type="application/json">{"state": "%s"}</script>' % ('x' * 200_000)
+    filtros = ''.join(
+        f'<li class="ui-search-filter-container"><a href="/f{k}"><span class="ui-search-filter-name">Filtro {k}</span>'
+        f'<span class="ui-search-filter-results">({rnd.randint(1, 999)})</span></a></li>' for k in range(400)
+    )
+    menu = ''.join(f'<li><a href="/c{k}">Categoria {k}</a><ul><li>Sub {k}</li></ul></li>' for k in range(600))
+    itens = ''.join(_card(rnd, i, layout) for i in range(cards))
+    lista = f'<ol class="ui-search-layout">{itens}</ol>' if layout == 0 else f'<section>{itens}</section>'
+    return (f'<html><head><title>Piano | MercadoLivre</title>{script}{script}</head><body>'
+            f'<nav><ul>{menu}</ul></nav><aside><ul>{filtros}</ul></aside>'
+            f'<main>{lista}</main><footer>{menu}</footer></body></html>')
+
+def medir(funcao, paginas, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for html in paginas:
+            funcao(html, 'YAMAHA P-125', 'yamaha p125')
+    return (time.perf_counter() - inicio) / (repeticoes * len(paginas))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("arquivos", nargs="*", help="Páginas de resultados salvas (.html)")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.arquivos:
+        paginas = [open(caminho, encoding='utf-8', errors='replace').read() for caminho in args.arquivos]
+        origem = f"{len(paginas)} páginas salvas"
+    else:
+        rnd = random.Random(7)
+        # Várias páginas seguidas do mesmo layout (o caso real) e uma troca no meio
+        paginas = [pagina_sintetica(rnd, layout) for layout in [0, 0, 0, 0, 1, 2, 2, 2]]
+        origem = f"{len(paginas)} páginas sintéticas (3 layouts)"
+    tamanho = sum(len(p) for p in paginas) / len(paginas) / 1024
+    print(f"📄 {origem}, {tamanho:.0f} KB em média | parser do BeautifulSoup: {parser_ml.PARSER_HTML}\n")
+
+    for html in paginas:
+        antigo = parse_antigo(html, 'YAMAHA P-125', 'yamaha p125')
+        novo = parsear_resultados(html, 'YAMAHA P-125', 'yamaha p125')
+        assert antigo == novo, "parser_ml divergiu do parse antigo"
+    print(f"✅ Mesmos anúncios nos dois parsers ({sum(len(parse_antigo(p, '', '')) for p in paginas)} no total)")
+
+    t_antigo = medir(parse_antigo, paginas, args.repeticoes)
+    t_novo = medir(parsear_resultados, paginas, args.repeticoes)
+    print(f"\n{'parser':<26}{'ms/página':>12}")
+    print(f"{'antigo (html.parser)':<26}{t_antigo * 1000:>12.1f}")
+    print(f"{'parser_ml':<26}{t_novo * 1000:>12.1f}   ({t_antigo / t_novo:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,20 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
 import plotly.express as px
 import os
-import numpy as np
 import time
 import sys
 
 # Adiciona pasta src ao path se necessário
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-# Tenta importar serviços, se falhar define localmente (fallback)
-try:
-    import dashboard_services as service
-except ImportError:
-    pass
+# Acesso a dados compartilhado com o scout (mesma conexão gerenciada: WAL, busy timeout, índices)
+from dashboard_services import (
+    CSV_PATH, init_config_db, get_dashboard_config, update_dashboard_config, carregar_dados_completos,
+    carregar_mercado, melhores_por_modelo, legenda_detalhada, obter_analise_ia,
+    ORDENACOES_GESTAO, GESTAO_LINHAS_POR_PAGINA, BUSCA_MAX_RESULTADOS, contar_anuncios, pagina_anuncios,
+    atualizar_status_item, salvar_lote_db, salvar_csv
+)
 
 # --- CONFIGURAÇÃO DA PÁGINA ---
 st.set_page_config(page_title="Piano Scout Manager", layout="wide")
@@ -46,113 +46,25 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-DB_PATH = os.path.join("data", "historico_precos.db")
-CSV_PATH = os.path.join("data", "modelos_alvo.csv")
-
-# --- FUNÇÕES DE SUPORTE LOCAIS (Caso dashboard_services falhe ou para simplificar) ---
-def init_config_db():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS config_dashboard (
-            id INTEGER PRIMARY KEY CHECK (id = 1),
-            min_score INTEGER DEFAULT 50,
-            max_score INTEGER DEFAULT 100,
-            min_preco REAL DEFAULT 1500.0,
-            max_preco REAL DEFAULT 50000.0
-        )
-    ''')
-    cursor.execute("INSERT OR IGNORE INTO config_dashboard (id, min_score, max_score, min_preco, max_preco) VALUES (1, 50, 100, 1500.0, 50000.0)")
-    conn.commit()
-    conn.close()
-
-def get_dashboard_config():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT min_score, max_score, min_preco, max_preco FROM config_dashboard WHERE id = 1")
-    row = cursor.fetchone()
-    conn.close()
-    if row:
-        return {"min_score": row[0], "max_score": row[1], "min_preco": row[2], "max_preco": row[3]}
-    return {"min_score": 50, "max_score": 100, "min_preco": 1500.0, "max_preco": 50000.0}
-
+# --- CALLBACKS ---
 def save_config_callback():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE config_dashboard 
-        SET min_score = ?, max_score = ?, min_preco = ?, max_preco = ? 
-        WHERE id = 1
-    """, (
+    update_dashboard_config(
         st.session_state.n_min_score,
         st.session_state.n_max_score,
         st.session_state.n_min_preco,
         st.session_state.n_max_preco
-    ))
-    conn.commit()
-    conn.close()
-
-def carregar_dados_completos():
-    if not os.path.exists(DB_PATH): return None, None
-    conn = sqlite3.connect(DB_PATH)
-    df_precos = pd.read_sql_query("SELECT * FROM precos", conn)
-    conn.close()
-
-    try:
-        df_ref = pd.read_csv(CSV_PATH, on_bad_lines='skip')
-    except:
-        df_ref = pd.DataFrame()
-
-    if not df_precos.empty and not df_ref.empty:
-        df_precos['modelo_key'] = df_precos['modelo'].astype(str).str.strip().str.upper()
-        df_ref['modelo_key'] = df_ref['modelo'].astype(str).str.strip().str.upper()
-        
-        df_full = pd.merge(df_precos, df_ref, on='modelo_key', how='left', suffixes=('', '_csv'))
-        df_full['custo_reparo'] = df_full['custo_reparo'].fillna(0)
-        df_full['custo_total'] = df_full['preco'] + df_full['custo_reparo']
-        df_full['ativo'] = df_full['ativo'].apply(lambda x: x in [1, '1', True, 'True'])
-        return df_precos, df_full
-    return df_precos, pd.DataFrame()
-
-def atualizar_status_item(id_anuncio, ativo):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE precos SET ativo = ? WHERE id = ?", (1 if ativo else 0, int(id_anuncio)))
-    conn.commit()
-    conn.close()
-
-def salvar_lote_db(df_editado):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    for _, row in df_editado.iterrows():
-        cursor.execute("UPDATE precos SET ativo = ? WHERE id = ?", (1 if row['ativo'] else 0, row['id']))
-    conn.commit()
-    conn.close()
-
-def salvar_csv(df):
-    df.to_csv(CSV_PATH, index=False)
-
-def media_geometrica(series):
-    arr = np.array(series)
-    arr = arr[arr > 0]
-    if len(arr) == 0: return 0
-    return np.exp(np.mean(np.log(arr)))
-
-def calcular_estatisticas_mercado(df_ativos):
-    return df_ativos.groupby('modelo_key')['custo_total'].agg(
-        Minimo='min', Maximo='max', MediaGeo=media_geometrica, Qtd='count'
-    ).reset_index()
+    )
 
 # --- INICIALIZAÇÃO DO APP ---
 init_config_db()
+# Cache incremental em dashboard_services: num rerun sem mudanças no banco/CSV não relê nada
 df_raw, df_full = carregar_dados_completos()
 
 if df_full is None or df_full.empty:
     st.error("⚠️ Sem dados. Execute main.py.")
     st.stop()
 
-df_ativos = df_full[df_full['ativo'] == True].copy()
-stats_mercado = calcular_estatisticas_mercado(df_ativos)
+df_ativos, stats_mercado = carregar_mercado(df_full)
 
 # --- LAYOUT ---
 tab1, tab2, tab3 = st.tabs(["📊 Matriz de Decisão", "📝 Gestão de Anúncios", "📚 Editor AHSD (CSV)"])
@@ -179,9 +91,8 @@ with tab1:
 
     with col_grafico:
         if not df_plot_filtered.empty:
-            # Agrupa pelo menor preço para plotar, mas mantém o ID para referência
-            idx_melhores = df_plot_filtered.groupby('modelo_key')['custo_total'].idxmin()
-            df_plot = df_plot_filtered.loc[idx_melhores].copy().reset_index(drop=True)
+            # Menor preço de cada modelo (do resumo materializado), mantendo o ID para referência
+            df_plot = melhores_por_modelo(df_plot_filtered, stats_mercado)
 
             # --- MAPA DE CORES ---
             MAPA_CORES = {
@@ -193,16 +104,7 @@ with tab1:
                 "Não Funcional": "#C0392B"
             }
 
-            def obter_legenda_detalhada(row):
-                if str(row.get('priorizado', False)).lower() in ['true', 'sim']: return "⭐ PRIORIDADE"
-                estado_bd = str(row.get('estado_detalhado', '')).lower()
-                if 'novo' in estado_bd: return "Novo"
-                if 'otimo' in estado_bd or 'ótimo' in estado_bd: return "Ótimo Estado"
-                if 'semi' in estado_bd: return "Semifuncional"
-                if 'nao' in estado_bd or 'não' in estado_bd: return "Não Funcional"
-                return "Funcional"
-
-            df_plot['legenda'] = df_plot.apply(obter_legenda_detalhada, axis=1)
+            df_plot['legenda'] = legenda_detalhada(df_plot)
 
             # Limites e Layout
             min_s, max_s = df_plot['score_geral'].min(), df_plot['score_geral'].max()
@@ -292,9 +194,10 @@ with tab1:
             c2.markdown(f"<div class='metric-compact'><label>Som</label><value>{row['som_polifonia']}</value></div>", unsafe_allow_html=True)
             c3.markdown(f"<div class='metric-compact'><label>Geral</label><value>{row['score_geral']:.0f}</value></div>", unsafe_allow_html=True)
             
-            if row.get('ai_analise'):
+            analise_ia = obter_analise_ia(row['id'])
+            if analise_ia:
                 with st.expander("🤖 Análise IA", expanded=False):
-                    st.caption(row['ai_analise'])
+                    st.caption(analise_ia)
             
             st.write("")
             
@@ -302,6 +205,7 @@ with tab1:
             
             if st.button("❌ Desativar (Erro/Lixo)", key=f"btn_del_{row['id']}", type="primary", use_container_width=True):
                 atualizar_status_item(row['id'], False)
+                st.session_state['versao_gestao'] = st.session_state.get('versao_gestao', 0) + 1  # Relê a gestão
                 st.toast(f"ID {row['id']} removido!", icon="🗑️")
                 time.sleep(0.5)
                 st.rerun()
@@ -312,43 +216,48 @@ with tab1:
 with tab2:
     st.header("Gestão de Dados")
     # --- ÁREA DE FILTROS ---
-    c_filtro1, c_filtro2 = st.columns([2, 1])
+    c_filtro1, c_filtro2, c_filtro3 = st.columns([2, 1, 1])
     
     with c_filtro1:
-        busca = st.text_input("🔍 Buscar por Modelo ou ID", placeholder="Ex: Yamaha, 105, Roland...")
+        # Busca textual (FTS5) em modelo, título, análise da IA e loja; número puro também acha o ID
+        busca = st.text_input("🔍 Buscar (modelo, título, análise, loja) ou ID", placeholder='Ex: Yamaha, 105, "ótimo estado"...')
     
     with c_filtro2:
         filtro_status = st.selectbox("Status", ["Todos", "✅ Ativos", "❌ Inativos/Descartados"])
 
-    # --- APLICAÇÃO DOS FILTROS ---
-    # Começamos com uma cópia dos dados brutos
-    df_gestao = df_raw.copy()
-
-    # 1. Filtro de Status
-    if filtro_status == "✅ Ativos":
-        df_gestao = df_gestao[df_gestao['ativo'] == 1]
-    elif filtro_status == "❌ Inativos/Descartados":
-        df_gestao = df_gestao[df_gestao['ativo'] == 0]
-    
-    # 2. Filtro de Texto (Busca)
-    if busca:
-        # Busca no Modelo (texto) OU no ID (número convertido para texto)
-        df_gestao = df_gestao[
-            df_gestao['modelo'].astype(str).str.contains(busca, case=False, na=False) | 
-            df_gestao['id'].astype(str).str.contains(busca, na=False)
-        ]
+    with c_filtro3:
+        ordem = st.selectbox("Ordenar por", list(ORDENACOES_GESTAO))
+
+    # --- FILTROS E PAGINAÇÃO (NO BANCO) ---
+    # Só a página atual sai do SQLite e vai para o navegador
+    ativo_filtro = {"✅ Ativos": 1, "❌ Inativos/Descartados": 0}.get(filtro_status)
+    total = contar_anuncios(busca, ativo_filtro)
+    total_paginas = max(1, -(-total // GESTAO_LINHAS_POR_PAGINA))
+    # Filtro novo pode ter menos páginas que a atual
+    if st.session_state.get('pagina_gestao', 1) > total_paginas:
+        st.session_state['pagina_gestao'] = 1
+
+    c_pag, c_info = st.columns([1, 4])
+    with c_pag:
+        pagina = st.number_input("Página", 1, total_paginas, key='pagina_gestao')
+
+    # A página exibida fica na sessão até mudar filtro/página ou salvar: o editor reaplica as edições
+    # sobre ela e o salvar compara com ela (uma releitura traria gravações de outros como se fossem edição)
+    chave_editor = f"editor_gestao_{filtro_status}_{ordem}_{busca}_{pagina}_{st.session_state.get('versao_gestao', 0)}"
+    if st.session_state.get('chave_gestao') != chave_editor:
+        st.session_state['chave_gestao'] = chave_editor
+        st.session_state['df_gestao'] = pagina_anuncios(busca, ativo_filtro, ordem, pagina)
+    df_gestao = st.session_state['df_gestao']
 
     # Mostra contador de resultados
-    st.caption(f"Mostrando {len(df_gestao)} registros.")
+    with c_info:
+        st.caption(f"Mostrando {len(df_gestao)} de {total} registros (página {pagina} de {total_paginas}).")
+        if busca and total >= BUSCA_MAX_RESULTADOS:
+            st.caption(f"🔎 Busca limitada aos {BUSCA_MAX_RESULTADOS} anúncios mais recentes que casam (a relevância ordena só esses); refine os termos.")
 
 # --- EDITOR DE DADOS ---
-    cols = ['id', 'ativo', 'verificado', 'data_consulta', 'modelo', 'preco', 'custo_reparo', 'estado_detalhado', 'link']
-    
-    # Exibe apenas as colunas que existem no dataframe (para evitar erro se 'verificado' ainda não existir)
-    cols_existentes = [c for c in cols if c in df_gestao.columns]
-
     df_ed = st.data_editor(
-        df_gestao[cols_existentes], 
+        df_gestao, 
         column_config={
             "link": st.column_config.LinkColumn(display_text="Abrir Link"),
             "preco": st.column_config.NumberColumn(format="R$ %.2f"),
@@ -360,7 +269,8 @@ with tab2:
         disabled=["id", "data_consulta", "verificado"], # Bloqueia edição de campos técnicos
         height=600,
         use_container_width=True,
-        key="editor_gestao" # Chave única para não conflitar
+        # Chave por página/filtro: edições pendentes não migram para as linhas de outra página
+        key=chave_editor
     )
 
     # --- BOTÃO SALVAR ---
@@ -369,10 +279,16 @@ with tab2:
     with col_save:
         if st.button("💾 Salvar Alterações", type="primary", use_container_width=True):
             if not df_ed.empty:
-                salvar_lote_db(df_ed)
-                st.toast("Alterações salvas com sucesso!", icon="✅")
-                time.sleep(1)
-                st.rerun()
+                # Só as linhas alteradas vão para o banco
+                qtd_alteradas = salvar_lote_db(df_ed, df_gestao)
+                if qtd_alteradas:
+                    # Editor novo sobre a página relida do banco
+                    st.session_state['versao_gestao'] = st.session_state.get('versao_gestao', 0) + 1
+                    st.toast(f"{qtd_alteradas} alteração(ões) salva(s) com sucesso!", icon="✅")
+                    time.sleep(1)
+                    st.rerun()
+                else:
+                    st.info("Nenhuma alteração para salvar.")
             else:
                 st.warning("Nada para salvar (tabela vazia).")
                 
@@ -1,35 +1,56 @@
 import time
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import timedelta
 import sys
 import os
-import random
+import signal
+import argparse
+import multiprocessing
 
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-# Importar a nova função verificar_se_ja_existe
-from src.database import criar_tabela, salvar_no_banco, verificar_se_ja_existe
-from src.scraper import buscar_mercadolivre
-from src.stores_br import executar_busca_lojas_br
-from src.ai_validator import validar_com_ia
-from src.discovery_engine import executar_descoberta
+# Imports "planos" (via src no sys.path): assim 'scraper' e 'src.scraper' não viram
+# dois módulos diferentes, cada um com o seu próprio pool de navegadores
+from database import criar_tabela, obter_indice_links, atualizar_indice_links, atualizar_titulo
+from revisitas import classificar, preparar_revisita, INALTERADO, TITULO_RETOCADO, MUDOU_PRECO
+from scraper import buscar_mercadolivre
+from stores_br import executar_busca_lojas_br
+from pipeline import PipelineScout, Lote, FONTE_LOJAS, FONTE_ML
+from browser_pool import encerrar_pool, definir_perfil_base
+from fila_jobs import (
+    criar_tabelas_jobs, sincronizar_jobs, reivindicar_job, concluir_job, falhar_job,
+    RenovadorLease, publicar_stats, stats_agregados, resumo_fila, gerar_id_worker
+)
+from cache_ia import resumo_cache
+from analyzer import instantaneo_filtro, resumo_filtro
+from llm_gateway import obter_gateway
+from config import ESPERA_SEM_JOBS, INTERVALO_SINCRONIZAR_CSV
 
 INICIO_EXECUCAO = time.time()
+WORKER_ID = gerar_id_worker()
 
 STATS = {
     "total": 0, "novo": 0, "otimo_estado": 0, "funcional": 0, 
-    "semifuncional": 0, "nao_funcional": 0, "ignorados": 0 # Novo contador
+    "semifuncional": 0, "nao_funcional": 0, "ignorados": 0, # Novo contador
+    "filtrados": 0, # Rejeitados pelo pré-filtro (chamadas de LLM poupadas)
+    "classificador_local": 0, # Decididos pelo classificador local, sem Gemini
+    "revisitas": 0 # Anúncios já vistos que mudaram de preço (novo ponto no histórico, sem IA)
 }
 
-COOLDOWNS = {"mercadolivre": 600, "lojas_br": 60}
-ultima_busca = {"mercadolivre": 0, "lojas_br": 0}
+FONTES = [FONTE_LOJAS, FONTE_ML]
 
 def obter_status_painel():
     delta = time.time() - INICIO_EXECUCAO
     tempo_str = str(timedelta(seconds=int(delta)))
+    # Soma de todos os workers ativos (este processo + outros processos/máquinas no mesmo banco)
+    try:
+        stats = {**STATS, **stats_agregados()}
+    except Exception:
+        stats = {**STATS, 'workers': 1}
     return (
-        f"⏱️ {tempo_str} | 🎹 Capturados: {STATS['total']} | ♻️ Ignorados: {STATS['ignorados']} "
-        f"[🆕 {STATS['novo']} | ✨ {STATS['otimo_estado']} | 🆗 {STATS['funcional']}]"
+        f"⏱️ {tempo_str} | 👷 Workers: {stats['workers']} | 🎹 Capturados: {stats.get('total', 0)} | "
+        f"♻️ Ignorados: {stats.get('ignorados', 0)} | 📉 Revisitas: {stats.get('revisitas', 0)} | 🚫 LLM poupado: {stats.get('filtrados', 0) + stats.get('classificador_local', 0)} "
+        f"[🆕 {stats.get('novo', 0)} | ✨ {stats.get('otimo_estado', 0)} | 🆗 {stats.get('funcional', 0)}]"
     )
 
 def gerar_termos_busca(modelo_completo):
@@ -39,118 +60,161 @@ def gerar_termos_busca(modelo_completo):
         termos.append(" ".join(partes[1:]))
     return termos
 
-def processar_modelo(modelo_info):
-    modelo_oficial = modelo_info['modelo']
-    termos_para_testar = gerar_termos_busca(modelo_oficial)
-    agora = time.time()
+def filtrar_novos(itens, pipeline):
+    """
+    Separa o que vai para o pipeline: (novos, revisitas).
+    Já visto sem mudança ou já nas filas é descartado (sem gastar LLM); preço alterado vira
+    revisita com o veredito anterior; título muito diferente volta como novo (validação completa).
+    """
+    atualizar_indice_links()
+    novos, revisitas = [], []
+    for item in itens:
+        if pipeline.em_voo(item['link']):
+            STATS['ignorados'] += 1
+            continue
+        situacao, registro = classificar(item)
+        if situacao == INALTERADO:
+            STATS['ignorados'] += 1
+        elif situacao == TITULO_RETOCADO:
+            atualizar_titulo(registro, item['titulo'])
+            STATS['ignorados'] += 1
+        elif situacao == MUDOU_PRECO:
+            revisitas.append(preparar_revisita(item, registro))
+        else:
+            novos.append(item)
+    return novos, revisitas
+
+def raspar_fonte(modelo_oficial, fonte):
+    termo = gerar_termos_busca(modelo_oficial)[-1]
+    if fonte == FONTE_LOJAS:
+        print(f"🏬 Lojas BR ('{termo}')...", end=" ")
+        return executar_busca_lojas_br(modelo_oficial)
+
+    print(f"📦 Mercado Livre ('{termo}')...")
+    # O intervalo anti-bot agora é a política de cortesia do fetcher (por host)
+    return buscar_mercadolivre(modelo_oficial, termo)
+
+def processar_job(job, pipeline):
+    """Estágio de raspagem de um job (modelo, fonte); o gravador conclui o job ao terminar o lote."""
+    modelo_oficial = job['modelo']
     
     print(f"\n{'='*80}")
     print(obter_status_painel())
-    print(f"🔎 Monitorando: {modelo_oficial} (Score: {modelo_info.get('score_geral', 'N/A')})")
+    print(resumo_cache())
+    print(obter_indice_links().resumo())
+    if obter_gateway().uso:
+        print(obter_gateway().resumo_uso())
+    print(f"🔎 Monitorando: {modelo_oficial} / {job['fonte']} (Score: {job.get('score_geral', 'N/A')})")
     print(f"{'='*80}")
 
-    # --- 1. LOJAS BR ---
-    if agora - ultima_busca["lojas_br"] > COOLDOWNS["lojas_br"]:
-        termo_loja = termos_para_testar[-1]
-        print(f"🏬 Lojas BR ('{termo_loja}')...", end=" ")
-        
-        novos = executar_busca_lojas_br(modelo_oficial)
-        
-        for item in novos:
-            # --- OTIMIZAÇÃO: Se já existe no banco, PULA ---
-            if verificar_se_ja_existe(item['link']):
-                STATS['ignorados'] += 1
-                continue
+    renovador = RenovadorLease(job, WORKER_ID).iniciar()
 
-            item['data'] = datetime.now().strftime("%Y-%m-%d")
-            item['localizacao'] = 'Loja Oficial'
-            item['tem_envio'] = True
-            item['estado_detalhado'] = 'novo'
-            item['ai_analise'] = 'Loja Confiável'
-            
-            salvar_no_banco(item)
-            STATS['novo'] += 1
-            STATS['total'] += 1
-            print(".", end="")
-            
-        print(f" Novos salvos: {len(novos)}")
-        ultima_busca["lojas_br"] = time.time()
-    else:
-        print(f"⏩ Pulando Lojas BR (Cooldown)")
-
-    # --- 2. MERCADO LIVRE ---
-    if agora - ultima_busca["mercadolivre"] > COOLDOWNS["mercadolivre"]:
-        termo_ml = termos_para_testar[-1]
-        print(f"📦 Mercado Livre ('{termo_ml}')...")
-        
-        time.sleep(random.uniform(5, 8)) 
-        usados = buscar_mercadolivre(modelo_oficial, termo_ml)
-        
-        itens_salvos = 0
-        
-        for item in usados:
-            # --- OTIMIZAÇÃO: VERIFICA DB ANTES DA IA ---
-            if verificar_se_ja_existe(item['link']):
-                print(f"   ♻️ Já monitorado: {item['titulo'][:30]}...")
-                STATS['ignorados'] += 1
-                continue # Pula para o próximo sem gastar LLM
-            
-            # Se é novo, chama a IA
-            analise = validar_com_ia(item['titulo'], item['preco'], modelo_oficial)
-            
-            if analise['valido']:
-                estado = analise['estado']
-                ativo = 0 if estado == 'nao_funcional' else 1
-                
-                item['data'] = datetime.now().strftime("%Y-%m-%d")
-                item['condicao'] = 'Usado'
-                item['loja'] = 'Mercado Livre'
-                item['estado_detalhado'] = estado
-                item['custo_reparo'] = analise['reparo']
-                item['ai_analise'] = analise['motivo']
-                item['ativo'] = ativo
-                
-                salvar_no_banco(item)
-                itens_salvos += 1
-                STATS['total'] += 1
-                if estado in STATS: STATS[estado] += 1
-                
-                print(f"   ✅ SALVO: R$ {item['preco']:,.0f} | {estado}")
-            else:
-                pass 
-        
-        print(f"   -> {itens_salvos} novos capturados.")
-        ultima_busca["mercadolivre"] = time.time()
-    else:
-        print(f"⏩ Pulando ML (Cooldown)")
+    def ao_finalizar(erro):
+        renovador.parar()
+        if renovador.perdido:
+            return  # Outro worker já assumiu o job; não mexe no estado dele
+        if erro:
+            falhar_job(job['id'], WORKER_ID, erro, job['tentativas'])
+        else:
+            concluir_job(job['id'], WORKER_ID, job['fonte'])
+        publicar_stats(WORKER_ID, STATS)
+
+    try:
+        novos, revisitas = filtrar_novos(raspar_fonte(modelo_oficial, job['fonte']), pipeline)
+        print(f"   -> {len(novos)} novos e {len(revisitas)} com preço alterado enviados para o pipeline.")
+        # Bloqueia aqui se os validadores estiverem atrasados (backpressure)
+        pipeline.enviar(Lote(modelo_oficial, job['fonte'], novos, ao_finalizar=ao_finalizar, revisitas=revisitas))
+    except Exception as e:
+        print(f"❌ Erro no job {modelo_oficial} / {job['fonte']}: {e}")
+        ao_finalizar(e)
+
+def sincronizar_catalogo():
+    print("\n--- 🔄 ATUALIZANDO BASE ---")
+    df_completo = pd.read_csv('data/modelos_alvo.csv')
+    df = df_completo[df_completo['score_geral'] >= 50].copy()
+    sincronizar_jobs(df.to_dict('records'), FONTES)
+    print(f"📋 {len(df)} modelos qualificados -> {len(df) * len(FONTES)} jobs.")
 
-def ciclo_continuo():
-    print(f"🤖 Piano Scout v3.3 (Otimizado + Blindado) Iniciado!")
+def ciclo_continuo(pipeline):
+    print(f"🤖 Piano Scout v3.3 (Otimizado + Blindado) Iniciado! Worker: {WORKER_ID}")
+    ultima_sincronizacao = 0
+    filtro_anterior = instantaneo_filtro()
     
     while True:
-        try:
-            # 1. Fase de Descoberta (Opcional - pode comentar se quiser só monitorar)
-            # print("\n--- 🚀 FASE DE DESCOBERTA ---")
-            # executar_descoberta() 
-
-            print("\n--- 🔄 ATUALIZANDO BASE ---")
-            df_completo = pd.read_csv('data/modelos_alvo.csv')
-            df = df_completo[df_completo['score_geral'] >= 50].copy()
-            print(f"📋 {len(df)} modelos qualificados.")
-            
-        except Exception as e:
-            print(f"❌ Erro CSV: {e}")
-            time.sleep(60)
+        # 1. Fase de Descoberta (Opcional - pode comentar se quiser só monitorar)
+        # print("\n--- 🚀 FASE DE DESCOBERTA ---")
+        # from discovery_engine import executar_descoberta
+        # executar_descoberta()
+
+        if time.time() - ultima_sincronizacao > INTERVALO_SINCRONIZAR_CSV:
+            try:
+                sincronizar_catalogo()
+                ultima_sincronizacao = time.time()
+            except Exception as e:
+                print(f"❌ Erro CSV: {e}")
+                time.sleep(60)
+                continue
+
+        job = reivindicar_job(WORKER_ID)
+        if not job:
+            print(f"💤 Nenhum job disponível. Aguardando {ESPERA_SEM_JOBS}s...")
+            time.sleep(ESPERA_SEM_JOBS)
             continue
 
-        lista_modelos = df.to_dict('records')
-        random.shuffle(lista_modelos)
-        
-        for modelo_info in lista_modelos:
-            processar_modelo(modelo_info)
-            print("   --- Pausa de 30s ---")
-            time.sleep(30)
+        processar_job(job, pipeline)
+        # A validação corre nas threads do pipeline: conta o que foi triado desde o ciclo anterior
+        filtro_atual = instantaneo_filtro()
+        print(resumo_filtro(filtro_anterior, filtro_atual))
+        filtro_anterior = filtro_atual
+
+def executar_worker(indice=0):
+    """Um worker = um processo com pipeline e pool de navegadores próprios."""
+    global WORKER_ID
+    WORKER_ID = gerar_id_worker()
+    # SIGTERM (kill/systemd) vira SystemExit para o finally fechar os navegadores
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    if indice > 0:
+        definir_perfil_base(f"chrome_perfil_w{indice}")
+
+    # Pré-carrega os links já vistos: a deduplicação passa a ser consulta em memória
+    print(obter_indice_links().resumo())
+    pipeline = PipelineScout(STATS).iniciar()
+    try:
+        ciclo_continuo(pipeline)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Grava o que ainda está nas filas antes de fechar os navegadores
+        pipeline.encerrar()
+        publicar_stats(WORKER_ID, STATS)
+        encerrar_pool()
+
+def mostrar_status():
+    print(obter_status_painel())
+    for fonte, status, qtd in resumo_fila():
+        print(f"   {fonte:<14} {status:<12} {qtd}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Piano Scout - monitor de preços")
+    parser.add_argument("--workers", type=int, default=1, help="Processos worker nesta máquina")
+    parser.add_argument("--status", action="store_true", help="Mostra STATS agregados e a fila de jobs")
+    args = parser.parse_args()
+
     criar_tabela()
-    ciclo_continuo()
\ No newline at end of file
+    criar_tabelas_jobs()
+
+    if args.status:
+        mostrar_status()
+    elif args.workers <= 1:
+        executar_worker()
+    else:
+        processos = [multiprocessing.Process(target=executar_worker, args=(i,)) for i in range(args.workers)]
+        for p in processos:
+            p.start()
+        try:
+            for p in processos:
+                p.join()
+        except KeyboardInterrupt:
+            # Ctrl+C chega a todos os processos do grupo; só esperamos o encerramento limpo
+            for p in processos:
+                p.join()
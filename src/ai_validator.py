@@ -1,22 +1,80 @@
-from google import genai
-from google.genai import types
-import time
-import json
-import os
-from dotenv import load_dotenv
+from config import TAMANHO_LOTE_IA
+import cache_ia
+from llm_gateway import obter_gateway, ErroLLM
 
-# Carrega a chave segura do arquivo .env
-load_dotenv()
-API_KEY = os.getenv("GEMINI_API_KEY")
+# --- NOVA INICIALIZAÇÃO (Padrão 2026) ---
+# Tudo passa pelo gateway (cota, concorrência, retentativas, contabilidade), obtido a cada chamada:
+# definir_gateway() (backend falso em testes/benchmarks) vale mesmo depois desta importação.
+# Criado já na importação: sem chave no .env o erro aparece logo no arranque, como antes.
+obter_gateway()
 
-if not API_KEY:
-    raise ValueError("⚠️ ERRO: Chave API não encontrada no arquivo .env")
+MODELO_VALIDACAO = 'gemini-2.5-flash-lite' # Atualizado para o modelo da tua lista
+MODELO_AHSD = 'gemini-3-flash-preview'
 
-# --- NOVA INICIALIZAÇÃO (Padrão 2026) ---
-# A biblioteca nova usa um 'Client' centralizado
-client = genai.Client(api_key=API_KEY)
+# Mude a versão ao alterar um prompt: os vereditos antigos deixam de valer no cache
+VERSAO_PROMPT_VALIDACAO = "validacao-v1"
+VERSAO_PROMPT_AHSD = "ahsd-v1"
+
+ESTADOS_VALIDOS = ['novo', 'otimo_estado', 'funcional', 'semifuncional', 'nao_funcional']
+
+REGRAS_ESTADO = """
+    Regras de Estado:
+    - novo: Lacrado/Loja.
+    - otimo_estado: Usado mas perfeito visual e funcional.
+    - funcional: Marcas de uso, mas funciona 100%.
+    - semifuncional: Tecla falhando, som baixo, defeito leve.
+    - nao_funcional: Não liga, defeito grave.
+"""
+
+def _converter_resultado(resultado):
+    return {
+        "valido": resultado.get('eh_o_piano_real', False),
+        "estado": resultado.get('estado', 'indefinido'),
+        "reparo": resultado.get('custo_reparo_estimado', 0),
+        "motivo": resultado.get('motivo', 'Sem motivo')
+    }
+
+def analise_com_erro(motivo):
+    """Falha técnica (cota, rede): 'erro' avisa o pipeline para NÃO tratar como rejeição."""
+    return {"valido": False, "motivo": f"Erro Técnico: {str(motivo)[:50]}...", "reparo": 0, "estado": "erro", "erro": True}
+
+def analise_falha_permanente(motivo):
+    """
+    Falha que se repetiria igual (JSON inválido, bloqueio de segurança, 4xx): rejeição comum, com o motivo.
+    Marcar como 'erro' faria o job ser refeito sem fim, gastando cota na mesma resposta.
+    Não vai para o cache: uma correção (prompt, modelo) volta a valer na próxima passada.
+    """
+    return {"valido": False, "motivo": f"Sem veredito da IA: {str(motivo)[:80]}", "reparo": 0, "estado": "indefinido"}
+
+def analise_de_excecao(erro):
+    """Só cota/rede esgotadas (ErroLLM transitório) são erro técnico; o resto é falha permanente."""
+    if isinstance(erro, ErroLLM) and erro.transitorio:
+        return analise_com_erro(erro)
+    return analise_falha_permanente(erro)
+
+def _resultado_bem_formado(resultado):
+    return (
+        isinstance(resultado, dict)
+        and isinstance(resultado.get('eh_o_piano_real'), bool)
+        and resultado.get('estado') in ESTADOS_VALIDOS
+        and isinstance(resultado.get('custo_reparo_estimado', 0), (int, float))
+    )
+
+def _chave_validacao(titulo_anuncio, price, modelo_alvo):
+    return cache_ia.gerar_chave("validacao", VERSAO_PROMPT_VALIDACAO, modelo_alvo, titulo_anuncio, price)
+
+def _guardar_validacao(analise, titulo_anuncio, price, modelo_alvo):
+    cache_ia.guardar(
+        _chave_validacao(titulo_anuncio, price, modelo_alvo), analise,
+        "validacao", modelo_alvo, titulo_anuncio, price
+    )
 
 def validar_com_ia(titulo_anuncio, price, modelo_alvo):
+    # Mesmo título/faixa de preço/modelo já classificado: responde do cache, sem gastar cota
+    em_cache = cache_ia.buscar(_chave_validacao(titulo_anuncio, price, modelo_alvo))
+    if em_cache is not None:
+        return em_cache
+
     prompt = f"""
     Analise este anúncio de instrumento musical.
     Produto Alvo: {modelo_alvo}
@@ -29,43 +87,98 @@ def validar_com_ia(titulo_anuncio, price, modelo_alvo):
         "custo_reparo_estimado": float, (Se 'semifuncional' ou 'nao_funcional', estime valor de conserto no Brasil. Se ok, 0)
         "motivo": "string curta"
     }}
-    
-    Regras de Estado:
-    - novo: Lacrado/Loja.
-    - otimo_estado: Usado mas perfeito visual e funcional.
-    - funcional: Marcas de uso, mas funciona 100%.
-    - semifuncional: Tecla falhando, som baixo, defeito leve.
-    - nao_funcional: Não liga, defeito grave.
-    """
+    {REGRAS_ESTADO}"""
 
     try:
-        # Pausa técnica para evitar rate-limit
-        time.sleep(1)
-        
-        # --- CHAMADA ATUALIZADA ---
-        response = client.models.generate_content(
-            model='gemini-2.5-flash-lite', # Atualizado para o modelo da tua lista
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0.1, # Respostas frias e diretas
-                response_mime_type='application/json' # Garante que volta JSON puro
-            )
-        )
-        
-        # Na nova lib, response.text já traz o conteúdo limpo
-        resultado = json.loads(response.text)
-        
-        return {
-            "valido": resultado.get('eh_o_piano_real', False),
-            "estado": resultado.get('estado', 'indefinido'),
-            "reparo": resultado.get('custo_reparo_estimado', 0),
-            "motivo": resultado.get('motivo', 'Sem motivo')
-        }
+        # O rate-limit é do gateway (token bucket); temperatura baixa = respostas frias e diretas
+        resultado = obter_gateway().gerar_json(MODELO_VALIDACAO, prompt, temperatura=0.1)
+        if not isinstance(resultado, dict):
+            raise ErroLLM(f"Resposta fora do formato: {str(resultado)[:50]}")
+
+        analise = _converter_resultado(resultado)
+        _guardar_validacao(analise, titulo_anuncio, price, modelo_alvo)
+        return analise
 
     except Exception as e:
-        # Captura erro de bloqueio de segurança ou rede
+        # Captura erro de bloqueio de segurança ou rede (já com as retentativas do gateway)
         print(f"⚠️ Erro IA: {e}")
-        return {"valido": False, "motivo": f"Erro Técnico: {str(e)[:50]}...", "reparo": 0, "estado": "erro"}
+        return analise_de_excecao(e)
+
+def _validar_bloco(bloco, modelo_alvo):
+    """Uma requisição para vários anúncios. Retorna {indice: resultado_bruto} só com o que veio."""
+    linhas = "\n".join(
+        f"    {i}. {item['titulo']} | Preço: R$ {item['preco']}" for i, item in enumerate(bloco)
+    )
+    prompt = f"""
+    Analise estes anúncios de instrumento musical.
+    Produto Alvo: {modelo_alvo}
+    Anúncios (índice. título | preço):
+{linhas}
+    
+    Responda com uma lista JSON, um objeto por anúncio, na mesma ordem:
+    [
+        {{
+            "indice": int, (o índice do anúncio acima)
+            "eh_o_piano_real": boolean, (False se for peça/aula/acessório/golpe)
+            "estado": "string", (Escolha um: 'novo', 'otimo_estado', 'funcional', 'semifuncional', 'nao_funcional')
+            "custo_reparo_estimado": float, (Se 'semifuncional' ou 'nao_funcional', estime valor de conserto no Brasil. Se ok, 0)
+            "motivo": "string curta"
+        }}
+    ]
+    {REGRAS_ESTADO}"""
+
+    resultados = obter_gateway().gerar_json(MODELO_VALIDACAO, prompt, temperatura=0.1)
+    if isinstance(resultados, dict):
+        resultados = resultados.get('anuncios') or resultados.get('resultados') or [resultados]
+
+    por_indice = {}
+    for resultado in resultados if isinstance(resultados, list) else []:
+        indice = resultado.get('indice') if isinstance(resultado, dict) else None
+        if isinstance(indice, int) and 0 <= indice < len(bloco) and _resultado_bem_formado(resultado):
+            por_indice[indice] = resultado
+    return por_indice
+
+def validar_lote_com_ia(itens, modelo_alvo, tamanho_lote=TAMANHO_LOTE_IA):
+    """
+    Valida vários anúncios ({'titulo', 'preco'}) com uma requisição por bloco de 'tamanho_lote'.
+    Retorna as análises na mesma ordem de 'itens' (mesmo formato de validar_com_ia).
+    Entradas que voltarem faltando ou malformadas são refeitas uma a uma.
+    """
+    analises = [None] * len(itens)
+
+    # Só o que não está no cache vai para o Gemini
+    pendentes = []
+    for posicao, item in enumerate(itens):
+        em_cache = cache_ia.buscar(_chave_validacao(item['titulo'], item['preco'], modelo_alvo))
+        if em_cache is not None:
+            analises[posicao] = em_cache
+        else:
+            pendentes.append(posicao)
+
+    for inicio in range(0, len(pendentes), tamanho_lote):
+        posicoes = pendentes[inicio:inicio + tamanho_lote]
+        bloco = [itens[p] for p in posicoes]
+        try:
+            por_indice = _validar_bloco(bloco, modelo_alvo)
+        except ErroLLM as e:
+            if e.transitorio:
+                # Cota/servidor esgotados mesmo após o backoff: refazer um a um só pioraria
+                print(f"⚠️ Erro IA (lote de {len(bloco)}): {e}")
+                for posicao in posicoes:
+                    analises[posicao] = analise_com_erro(e)
+                continue
+            print(f"⚠️ Erro IA (lote de {len(bloco)}): {e}. Caindo para validação individual.")
+            por_indice = {}
+
+        for i, (posicao, item) in enumerate(zip(posicoes, bloco)):
+            if i in por_indice:
+                analise = _converter_resultado(por_indice[i])
+                _guardar_validacao(analise, item['titulo'], item['preco'], modelo_alvo)
+                analises[posicao] = analise
+            else:
+                analises[posicao] = validar_com_ia(item['titulo'], item['preco'], modelo_alvo)
+
+    return analises
 
 # Teste Rápido (Só roda se executares este arquivo direto)
 if __name__ == "__main__":
@@ -76,6 +189,11 @@ if __name__ == "__main__":
 # src/ai_validator.py
 
 def analisar_novo_modelo_ahsd(nome_modelo, titulo_anuncio):
+    chave = cache_ia.gerar_chave("ahsd", VERSAO_PROMPT_AHSD, nome_modelo, titulo_anuncio)
+    em_cache = cache_ia.buscar(chave)
+    if em_cache is not None:
+        return em_cache
+
     prompt = f"""
     ###CONTEXTO
     Atue como um especialista em engenharia de instrumentos musicais para usuários com Altas Habilidades/Superdotação (QI 140+). 
@@ -118,16 +236,10 @@ def analisar_novo_modelo_ahsd(nome_modelo, titulo_anuncio):
     """
    
     try:
-        # Chamada ao cliente Gemini (Flash Lite ou Preview)
-        response = client.models.generate_content(
-            model='gemini-3-flash-preview', 
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0.1,
-                response_mime_type='application/json'
-            )
-        )
-        return json.loads(response.text)
+        # Chamada ao Gemini (Flash Lite ou Preview) pelo gateway
+        analise = obter_gateway().gerar_json(MODELO_AHSD, prompt, temperatura=0.1)
+        cache_ia.guardar(chave, analise, "ahsd", nome_modelo, titulo_anuncio)
+        return analise
     except Exception as e:
         print(f"⚠️ Erro na análise AHSD: {e}")
         return None
@@ -1,7 +1,11 @@
+import os
 import pandas as pd
 import re
+import threading
+from functools import lru_cache
 from datetime import datetime
 from scraper import buscar_mercadolivre
+from parser_ml import PRECO_MINIMO as PRECO_MINIMO_ML
 
 # Lista de exclusão (peças e acessórios)
 PALAVRAS_PROIBIDAS = [
@@ -12,6 +16,27 @@ PALAVRAS_PROIBIDAS = [
 
 PRECO_MINIMO_ACEITAVEL = 1500.00 
 
+# Pisos por modelo do pré-filtro. Também podem vir da coluna opcional 'preco_minimo' do CSV;
+# sem piso próprio, vale o mesmo mínimo do scraper do ML (PRECO_MINIMO_ML). As chaves são comparadas
+# sem diferença de maiúsculas e espaços (chave_modelo).
+PRECO_MINIMO_POR_MODELO = {}
+
+# Pré-filtro: todas as palavras proibidas num único regex, com palavra inteira ("bag" não pega "bagagem")
+REGEX_PROIBIDAS = re.compile(
+    r'\b(?:' + '|'.join(re.escape(p) for p in sorted(PALAVRAS_PROIBIDAS, key=len, reverse=True)) + r')\b',
+    re.IGNORECASE
+)
+
+# Decisões do pré-filtro
+REJEITAR = "rejeitar"   # Não vale uma chamada de LLM
+AMBIGUO = "ambiguo"     # Tem termo suspeito, mas pode ser o piano (ex: "FP-30X + pedal e capa")
+SEGUE = "segue"         # Passou nas regras; a IA decide estado e reparo
+
+# Contadores do processo; o ciclo do main.py imprime a diferença entre duas leituras (resumo_filtro)
+ESTATISTICAS_FILTRO = {"avaliados": 0, "rejeitados": 0, "ambiguos": 0, "decididos_local": 0, "ao_gemini": 0}
+_lock_filtro = threading.Lock()
+_csv_pisos = {"mtime": None, "pisos": {}}
+
 def carregar_modelos():
     try:
         return pd.read_csv('data/modelos_alvo.csv')
@@ -60,6 +85,152 @@ def eh_produto_valido(titulo, preco, modelo_alvo):
 
     return True
 
+# Separadores tolerados dentro do código do modelo: "FP-30X", "fp30x", "fp 30 x"
+_SEP = r'[\s\-_.]*'
+
+def _regex_tolerante(texto):
+    return _SEP.join(re.escape(c) for c in texto)
+
+@lru_cache(maxsize=1024)
+def regex_modelo(modelo_alvo):
+    """
+    Padrões do código do modelo: lista de (regex que acha o código, regex de um código "vizinho").
+    O código é o núcleo alfanumérico de cada palavra com dígito, sem parênteses nem sufixo de cor:
+    'Yamaha P-45B' -> 'p45', 'Casio CDP-S160RD' -> 'cdps160', 'CDP-S90BKC2-BR' -> 'cdps90'.
+    Números soltos ('88' teclas, 'Nord Piano 5') não identificam o modelo e ficam de fora.
+    O "vizinho" é o mesmo prefixo com outro número ('P-145' para 'P-45'): é o que prova outro modelo.
+    """
+    nome = re.sub(r'\([^)]*\)?', ' ', str(modelo_alvo))
+    padroes = []
+    for palavra in nome.split():
+        if palavra.isdigit() or not re.search(r'\d', palavra):
+            continue
+        nucleo = re.match(r'[a-z]*\d+', limpar_string(palavra))
+        if not nucleo:
+            continue
+        prefixo, numero = re.match(r'([a-z]*)(\d+)', nucleo.group(0)).groups()
+        achar = re.compile(_regex_tolerante(nucleo.group(0)) + r'(?!\d)', re.IGNORECASE)
+        vizinho = None
+        if prefixo:
+            vizinho = re.compile(r'(?<![a-z])' + _regex_tolerante(prefixo) + _SEP + r'(\d+)', re.IGNORECASE)
+        padroes.append((achar, vizinho, numero))
+    return tuple(padroes)
+
+def achar_modelo(titulo, modelo_alvo):
+    """
+    (match, outro_modelo): o primeiro código do modelo achado no título, ou None;
+    outro_modelo=True só quando o título traz claramente outro código da mesma linha.
+    """
+    outro_modelo = False
+    for achar, vizinho, numero in regex_modelo(modelo_alvo):
+        match = achar.search(titulo)
+        if match:
+            return match, False
+        if vizinho and any(m.group(1) != numero for m in vizinho.finditer(titulo)):
+            outro_modelo = True
+    return None, outro_modelo
+
+def chave_modelo(modelo):
+    """Nome do modelo sem diferença de maiúsculas e espaços: chave dos pisos por modelo."""
+    return " ".join(str(modelo).split()).upper()
+
+def carregar_pisos_csv(caminho=os.path.join('data', 'modelos_alvo.csv')):
+    """Lê a coluna opcional 'preco_minimo' do CSV (recarrega só se o arquivo mudar)."""
+    try:
+        mtime = os.path.getmtime(caminho)
+    except OSError:
+        return {}
+    if _csv_pisos["mtime"] != mtime:
+        pisos = {}
+        try:
+            df = pd.read_csv(caminho, on_bad_lines='skip')
+            if 'preco_minimo' in df.columns:
+                for _, row in df.dropna(subset=['preco_minimo']).iterrows():
+                    pisos[chave_modelo(row['modelo'])] = float(row['preco_minimo'])
+        except Exception as e:
+            print(f"Erro CSV (pisos): {e}")
+        _csv_pisos.update(mtime=mtime, pisos=pisos)
+    return _csv_pisos["pisos"]
+
+def preco_minimo_modelo(modelo_alvo):
+    chave = chave_modelo(modelo_alvo)
+    # Mesma chave nas duas fontes: 'Roland  fp-90x ' acha o piso de 'Roland FP-90X'
+    pisos_codigo = {chave_modelo(modelo): piso for modelo, piso in PRECO_MINIMO_POR_MODELO.items()}
+    if chave in pisos_codigo:
+        return pisos_codigo[chave]
+    return carregar_pisos_csv().get(chave, PRECO_MINIMO_ML)
+
+def pre_filtrar(titulo, preco, modelo_alvo):
+    """
+    Regras determinísticas antes da IA. Retorna (decisao, motivo).
+    Palavra proibida ANTES do modelo ("Capa para Roland FP-30X") é acessório: rejeita.
+    Depois do modelo ("Roland FP-30X com pedal") é ambíguo: deixa a IA decidir.
+    """
+    if preco < preco_minimo_modelo(modelo_alvo):
+        return REJEITAR, "preço abaixo do piso"
+
+    match_modelo, outro_modelo = achar_modelo(titulo, modelo_alvo)
+    if outro_modelo:
+        return REJEITAR, "outro modelo no título"
+
+    # Termo que faz parte do próprio nome do catálogo ("... (Móvel Cauda)") não é suspeito
+    nome_modelo = str(modelo_alvo).lower()
+    match_proibida = next(
+        (m for m in REGEX_PROIBIDAS.finditer(titulo) if m.group(0).lower() not in nome_modelo), None
+    )
+    if match_proibida:
+        if match_modelo and match_proibida.start() < match_modelo.start():
+            return REJEITAR, f"acessório ('{match_proibida.group(0)}')"
+        return AMBIGUO, f"termo suspeito ('{match_proibida.group(0)}')"
+
+    if not match_modelo:
+        # Sem o código no título (ou sem código no catálogo): não dá para afirmar que é outro piano
+        return AMBIGUO, "modelo não confirmado no título"
+
+    return SEGUE, ""
+
+def pre_filtrar_lote(itens, modelo_alvo):
+    """
+    Separa a página em (candidatos para a IA, rejeitados, confirmados) e atualiza ESTATISTICAS_FILTRO.
+    'confirmados' acompanha 'candidatos': True quando o código do modelo está no título (SEGUE),
+    False quando é ambíguo (só a IA pode aprovar).
+    """
+    candidatos, rejeitados, confirmados = [], [], []
+    for item in itens:
+        decisao, _ = pre_filtrar(item['titulo'], item['preco'], modelo_alvo)
+        if decisao == REJEITAR:
+            rejeitados.append(item)
+        else:
+            candidatos.append(item)
+            confirmados.append(decisao == SEGUE)
+
+    with _lock_filtro:
+        ESTATISTICAS_FILTRO["avaliados"] += len(itens)
+        ESTATISTICAS_FILTRO["rejeitados"] += len(rejeitados)
+        ESTATISTICAS_FILTRO["ambiguos"] += confirmados.count(False)
+    return candidatos, rejeitados, confirmados
+
+def registrar_triagem(decididos_local, ao_gemini):
+    """Depois do classificador local: quantos candidatos ele resolveu e quantos foram ao Gemini."""
+    with _lock_filtro:
+        ESTATISTICAS_FILTRO["decididos_local"] += decididos_local
+        ESTATISTICAS_FILTRO["ao_gemini"] += ao_gemini
+
+def instantaneo_filtro():
+    with _lock_filtro:
+        return dict(ESTATISTICAS_FILTRO)
+
+def resumo_filtro(desde, ate):
+    """Chamadas de LLM poupadas entre dois instantâneos de instantaneo_filtro()."""
+    d = {chave: valor - desde.get(chave, 0) for chave, valor in ate.items()}
+    candidatos = d["decididos_local"] + d["ao_gemini"]
+    parcela = f"{d['ao_gemini'] / candidatos * 100:.0f}%" if candidatos else "-"
+    return (
+        f"🧮 Triagem no ciclo: {d['avaliados']} avaliados | 🚫 {d['rejeitados']} rejeitados | "
+        f"❓ {d['ambiguos']} ambíguos | 🤖 {d['decididos_local']} decididos localmente | "
+        f"✨ {d['ao_gemini']}/{candidatos} candidatos foram ao Gemini ({parcela})"
+    )
+
 def calcular_oportunidade(preco, score_geral):
     if score_geral == 0: return 0
     return round(preco / score_geral, 2)
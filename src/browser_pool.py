@@ -0,0 +1,209 @@
+import os
+import time
+import queue
+import atexit
+import threading
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException, TimeoutException
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+from selenium.webdriver.chrome.options import Options
+
+from config import (
+    TAMANHO_POOL_NAVEGADORES, MAX_PAGINAS_POR_NAVEGADOR, TIMEOUT_EMPRESTIMO_NAVEGADOR,
+    MODO_ENXUTO, RECURSOS_BLOQUEADOS, DOMINIOS_RASTREADORES, USER_AGENT
+)
+
+# Pasta base dos perfis; cada worker (processo) usa uma base diferente
+PERFIL_BASE = "chrome_perfil"
+
+def definir_perfil_base(nome):
+    global PERFIL_BASE
+    PERFIL_BASE = nome
+
+def caminho_perfil_slot(indice):
+    """O Chrome não aceita dois processos no mesmo perfil: cada slot tem o seu."""
+    nome = PERFIL_BASE if indice == 0 else f"{PERFIL_BASE}_{indice + 1}"
+    return os.path.join(os.getcwd(), nome)
+
+def criar_opcoes_chrome(caminho_perfil, enxuto=MODO_ENXUTO):
+    chrome_options = Options()
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--log-level=3")
+    chrome_options.add_argument(f"user-data-dir={caminho_perfil}")
+
+    # --- FURTIVIDADE (vale para os dois modos) ---
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option("useAutomationExtension", False)
+
+    if not enxuto:
+        chrome_options.add_argument("--start-maximized")
+        return chrome_options
+
+    # --- MODO ENXUTO ---
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--window-size=1920,1080")
+    # O headless anuncia "HeadlessChrome" no User-Agent; usamos o de um Chrome normal
+    chrome_options.add_argument(f"--user-agent={USER_AGENT}")
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    chrome_options.add_argument("--mute-audio")
+    chrome_options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.managed_default_content_settings.media_stream": 2,
+    })
+    # 'eager': devolve o controle no DOMContentLoaded, sem esperar imagens/iframes
+    chrome_options.page_load_strategy = "eager"
+    return chrome_options
+
+def aplicar_bloqueios(driver):
+    """Intercepta requisições via DevTools: fontes, mídia e rastreadores nem saem da máquina."""
+    padroes = RECURSOS_BLOQUEADOS + [f"*{dominio}*" for dominio in DOMINIOS_RASTREADORES]
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": padroes})
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+            "source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"
+        })
+    except Exception as e:
+        print(f"⚠️ Não foi possível aplicar bloqueios de rede: {e}")
+
+def iniciar_driver(caminho_perfil, enxuto=MODO_ENXUTO):
+    chrome_options = criar_opcoes_chrome(caminho_perfil, enxuto)
+
+    # --- BLINDAGEM CONTRA ERRO DE CONEXÃO ---
+    max_tentativas = 3
+    for i in range(max_tentativas):
+        try:
+            servico = Service(ChromeDriverManager().install())
+            driver = webdriver.Chrome(service=servico, options=chrome_options)
+            if enxuto:
+                aplicar_bloqueios(driver)
+            return driver
+        except Exception as e:
+            print(f"⚠️ Erro ao iniciar driver (Tentativa {i+1}/{max_tentativas}): {e}")
+            time.sleep(2)
+
+    raise Exception("❌ Não foi possível iniciar o navegador após várias tentativas.")
+
+class _SlotNavegador:
+    def __init__(self, indice):
+        self.indice = indice
+        self.driver = None
+        self.paginas = 0
+
+    def fechar(self):
+        if self.driver:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+        self.driver = None
+        self.paginas = 0
+
+class PoolNavegadores:
+    """
+    Mantém Chromes abertos entre buscas (o arranque a frio é o passo mais lento do ciclo).
+    Cada empréstimo devolve um driver saudável; o navegador é reciclado após
+    'max_paginas' páginas ou quando o Selenium perde a sessão.
+    """
+
+    def __init__(self, tamanho=TAMANHO_POOL_NAVEGADORES, max_paginas=MAX_PAGINAS_POR_NAVEGADOR):
+        self.max_paginas = max_paginas
+        self._slots = [_SlotNavegador(i) for i in range(tamanho)]
+        self._livres = queue.LifoQueue()  # LIFO: reaproveita o navegador mais "quente"
+        for slot in self._slots:
+            self._livres.put(slot)
+        self._slot_por_driver = {}
+        self._lock = threading.Lock()
+        self._encerrado = False
+
+    def _driver_saudavel(self, driver):
+        try:
+            driver.current_url  # Ida e volta barata ao chromedriver
+            return True
+        except Exception:
+            return False
+
+    def _preparar(self, slot):
+        if slot.driver and slot.paginas >= self.max_paginas:
+            print(f"♻️ Reciclando navegador #{slot.indice} ({slot.paginas} páginas).")
+            self._descartar(slot)
+        elif slot.driver and not self._driver_saudavel(slot.driver):
+            print(f"🩺 Navegador #{slot.indice} não responde. Reiniciando...")
+            self._descartar(slot)
+
+        if not slot.driver:
+            slot.driver = iniciar_driver(caminho_perfil_slot(slot.indice))
+            slot.paginas = 0
+            with self._lock:
+                self._slot_por_driver[id(slot.driver)] = slot
+        return slot.driver
+
+    def _descartar(self, slot):
+        with self._lock:
+            self._slot_por_driver.pop(id(slot.driver), None)
+        slot.fechar()
+
+    @contextmanager
+    def emprestar(self, timeout=TIMEOUT_EMPRESTIMO_NAVEGADOR):
+        if self._encerrado:
+            raise Exception("❌ Pool de navegadores já foi encerrado.")
+        try:
+            slot = self._livres.get(timeout=timeout)
+        except queue.Empty:
+            raise Exception(f"❌ Nenhum navegador livre após {timeout}s.")
+
+        try:
+            driver = self._preparar(slot)
+            yield driver
+        except WebDriverException as e:
+            # Timeout de página não mata o navegador; o resto (sessão perdida, crash) sim
+            if not isinstance(e, TimeoutException):
+                self._descartar(slot)
+            raise
+        finally:
+            if self._encerrado:
+                self._descartar(slot)
+            self._livres.put(slot)
+
+    def navegar(self, driver, url):
+        """driver.get() com contagem de páginas para a reciclagem."""
+        with self._lock:
+            slot = self._slot_por_driver.get(id(driver))
+        if slot:
+            slot.paginas += 1
+        driver.get(url)
+
+    def encerrar(self):
+        if self._encerrado:
+            return
+        self._encerrado = True
+        for slot in self._slots:
+            self._descartar(slot)
+
+# --- POOL GLOBAL DO PROCESSO ---
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+def obter_pool():
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = PoolNavegadores()
+            atexit.register(encerrar_pool)
+        return _POOL
+
+def emprestar_driver():
+    return obter_pool().emprestar()
+
+def navegar(driver, url):
+    obter_pool().navegar(driver, url)
+
+def encerrar_pool():
+    """Gancho único de desligamento: fecha todos os Chromes do processo."""
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.encerrar()
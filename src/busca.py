@@ -0,0 +1,114 @@
+"""
+Busca textual nos anúncios (índice FTS5 'precos_fts': modelo, título, análise da IA e loja).
+
+Consulta:
+    yamaha p125         todas as palavras; a última vale como prefixo ("yamaha p1" já acha)
+    kaw*                prefixo explícito
+    "otimo estado"      frase exata
+    roland OR korg      alternativas (OR / NOT / AND em maiúsculas, como no FTS5)
+Acentos e maiúsculas não importam.
+
+Custo limitado, qualquer que seja o tamanho do histórico: o índice é percorrido do anúncio
+mais recente para o mais antigo (já com o filtro de status) e para em BUSCA_MAX_RESULTADOS.
+A relevância (bm25, com os pesos por coluna da migração 009) ordena esse conjunto inteiro;
+um anúncio que casa mas é mais antigo que os BUSCA_MAX_RESULTADOS mais recentes fica de fora.
+
+Uso (na raiz do projeto):
+    python src/busca.py yamaha p125 [--limite 20] [--ativos]
+"""
+import re
+import time
+import argparse
+
+from config import BUSCA_MAX_RESULTADOS
+from conexao import obter_conexao
+
+_TOKENS = re.compile(r'"([^"]*)"?|(\S+)')
+_OPERADORES = {'AND', 'OR', 'NOT'}
+
+def consulta_fts(texto):
+    """Converte o texto digitado numa expressão MATCH válida (nunca dá erro de sintaxe); None se não sobrar termo."""
+    tokens = _TOKENS.findall(texto or '')
+    itens = []
+    for i, (frase, palavra) in enumerate(tokens):
+        if palavra in _OPERADORES:
+            itens.append(palavra)
+            continue
+        termo = (frase or palavra).replace('"', '')
+        if not re.search(r'\w', termo):
+            continue
+        if frase:
+            itens.append(f'"{termo.strip()}"')
+        else:
+            # Busca enquanto digita: a última palavra (ainda incompleta) vale como prefixo
+            prefixo = termo.endswith('*') or i == len(tokens) - 1
+            itens.append(f'"{termo.rstrip("*")}"' + ('*' if prefixo else ''))
+
+    # Operador só entre dois termos (no começo, no fim ou repetido seria erro de sintaxe)
+    partes = []
+    for i, item in enumerate(itens):
+        if item in _OPERADORES:
+            proximo = itens[i + 1] if i + 1 < len(itens) else None
+            if not partes or partes[-1] in _OPERADORES or proximo is None or proximo in _OPERADORES:
+                continue
+        partes.append(item)
+    return " ".join(partes) or None
+
+def _sql_candidatos(colunas, limite, ativo):
+    # CROSS JOIN fixa a ordem: o FTS5 escolhe as linhas (mais recentes primeiro) e só elas são lidas de
+    # 'precos'; com o status dentro, o LIMIT conta só as que passam no filtro
+    juncao, filtro = "", ""
+    if ativo is not None:
+        juncao, filtro = "CROSS JOIN precos p ON p.id = f.rowid", f"AND p.ativo = {int(ativo)}"
+    return f'''
+        SELECT {colunas} FROM precos_fts f {juncao}
+        WHERE precos_fts MATCH ? {filtro} ORDER BY f.rowid DESC LIMIT {int(limite)}
+    '''
+
+def sql_ids_busca(limite=BUSCA_MAX_RESULTADOS, ativo=None):
+    """
+    Subconsulta com os ids que casam (1 parâmetro: a expressão de consulta_fts), dos mais recentes
+    para os mais antigos, já filtrados por status (1/0/None = todos).
+    Serve de filtro 'id IN (...)' para qualquer consulta sobre 'precos'.
+    """
+    return _sql_candidatos("f.rowid", limite, ativo)
+
+def sql_relevancia(limite=BUSCA_MAX_RESULTADOS, ativo=None):
+    """Subconsulta (fts_id, relevancia) para o mesmo conjunto de sql_ids_busca; relevância bm25: menor = melhor."""
+    return _sql_candidatos("f.rowid AS fts_id, f.rank AS relevancia", limite, ativo)
+
+def buscar(texto, limite=50, ativo=None):
+    """Anúncios que casam com 'texto', mais relevantes primeiro (lista de dicts)."""
+    consulta = consulta_fts(texto)
+    if consulta is None:
+        return []
+    cursor = obter_conexao().execute(f'''
+        SELECT p.id, p.modelo, p.titulo, p.loja, p.preco, p.ativo, p.link, f.relevancia
+        FROM ({sql_relevancia(ativo=ativo)}) f CROSS JOIN precos p ON p.id = f.fts_id
+        ORDER BY f.relevancia, p.id DESC
+        LIMIT ?
+    ''', [consulta, limite])
+    colunas = [c[0] for c in cursor.description]
+    return [dict(zip(colunas, row)) for row in cursor.fetchall()]
+
+if __name__ == "__main__":
+    from migracoes import aplicar_migracoes
+
+    parser = argparse.ArgumentParser(
+        description="Busca textual nos anúncios gravados",
+        epilog=f"Considera os {BUSCA_MAX_RESULTADOS} anúncios mais recentes que casam (BUSCA_MAX_RESULTADOS)."
+    )
+    parser.add_argument("termos", nargs="+", help='Palavras e/ou "frase exata"')
+    parser.add_argument("--limite", type=int, default=20)
+    parser.add_argument("--ativos", action="store_true", help="Só anúncios ativos")
+    args = parser.parse_args()
+
+    aplicar_migracoes()
+    texto = " ".join(args.termos)
+    inicio = time.perf_counter()
+    resultados = buscar(texto, args.limite, ativo=1 if args.ativos else None)
+    tempo_ms = (time.perf_counter() - inicio) * 1000
+    print(f"🔍 {consulta_fts(texto)} -> {len(resultados)} resultado(s) em {tempo_ms:.1f} ms")
+    for r in resultados:
+        status = "✅" if r['ativo'] else "❌"
+        print(f"{status} #{r['id']:<7} R$ {r['preco'] or 0:>10,.2f}  {r['modelo']} | {r['titulo'] or '-'} ({r['loja']})")
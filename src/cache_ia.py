@@ -0,0 +1,151 @@
+import re
+import json
+import math
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from config import CACHE_IA_ATIVO, CACHE_IA_TTL, CACHE_IA_MAX_ENTRADAS, CACHE_IA_MAX_MEMORIA
+from conexao import obter_conexao
+
+# Cada faixa de preço cobre ~5%: R$ 3.500 e R$ 3.550 caem no mesmo veredito, R$ 1.500 e R$ 3.500 não
+FATOR_FAIXA_PRECO = 1.05
+
+ESTATISTICAS_CACHE = {"hits_memoria": 0, "hits_disco": 0, "misses": 0, "gravacoes": 0, "expirados": 0, "removidos": 0}
+
+_memoria = OrderedDict()
+_lock = threading.Lock()
+_tabela_pronta = False
+_gravacoes_desde_limpeza = 0
+
+def normalizar_titulo(titulo):
+    """Minúsculas, sem acentos e sem pontuação: 'Piano Roland FP-30X!!' -> 'piano roland fp 30x'."""
+    texto = unicodedata.normalize('NFKD', str(titulo)).encode('ascii', 'ignore').decode('ascii')
+    texto = re.sub(r'[^a-z0-9]+', ' ', texto.lower())
+    return texto.strip()
+
+def faixa_preco(preco):
+    try:
+        preco = float(preco)
+    except (TypeError, ValueError):
+        return 0
+    if preco <= 0:
+        return 0
+    return int(math.log(preco) / math.log(FATOR_FAIXA_PRECO))
+
+def gerar_chave(tipo, versao_prompt, modelo_alvo, titulo, preco=None):
+    base = "|".join([
+        tipo, versao_prompt, normalizar_titulo(modelo_alvo), normalizar_titulo(titulo), str(faixa_preco(preco))
+    ])
+    return hashlib.sha1(base.encode('utf-8')).hexdigest()
+
+def _conectar():
+    global _tabela_pronta
+    conn = obter_conexao()
+    if not _tabela_pronta:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_ia (
+                chave TEXT PRIMARY KEY,
+                tipo TEXT,
+                modelo TEXT,
+                titulo_normalizado TEXT,
+                preco REAL,
+                veredito TEXT,
+                criado_em REAL,
+                acessado_em REAL,
+                hits INTEGER DEFAULT 0
+            )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_ia_acessado ON cache_ia (acessado_em)")
+        _tabela_pronta = True
+    return conn
+
+def _contar(**incrementos):
+    # Validadores do pipeline gravam e consultam em paralelo
+    with _lock:
+        for chave, valor in incrementos.items():
+            ESTATISTICAS_CACHE[chave] += valor
+
+def _lembrar(chave, veredito, criado_em):
+    with _lock:
+        _memoria[chave] = (veredito, criado_em)
+        _memoria.move_to_end(chave)
+        while len(_memoria) > CACHE_IA_MAX_MEMORIA:
+            _memoria.popitem(last=False)
+
+def buscar(chave):
+    """Retorna o veredito guardado (dict/list) ou None."""
+    if not CACHE_IA_ATIVO:
+        return None
+    agora = time.time()
+
+    with _lock:
+        if chave in _memoria:
+            veredito, criado_em = _memoria[chave]
+            if agora - criado_em <= CACHE_IA_TTL:
+                _memoria.move_to_end(chave)
+                ESTATISTICAS_CACHE["hits_memoria"] += 1
+                return veredito
+            del _memoria[chave]
+
+    conn = _conectar()
+    row = conn.execute("SELECT veredito, criado_em FROM cache_ia WHERE chave = ?", (chave,)).fetchone()
+    if not row:
+        _contar(misses=1)
+        return None
+    if agora - row[1] > CACHE_IA_TTL:
+        conn.execute("DELETE FROM cache_ia WHERE chave = ?", (chave,))
+        _contar(expirados=1, misses=1)
+        return None
+    conn.execute("UPDATE cache_ia SET acessado_em = ?, hits = hits + 1 WHERE chave = ?", (agora, chave))
+
+    veredito = json.loads(row[0])
+    _lembrar(chave, veredito, row[1])
+    _contar(hits_disco=1)
+    return veredito
+
+def guardar(chave, veredito, tipo, modelo_alvo, titulo, preco=None):
+    global _gravacoes_desde_limpeza
+    if not CACHE_IA_ATIVO:
+        return
+    agora = time.time()
+    conn = _conectar()
+    conn.execute('''
+        INSERT OR REPLACE INTO cache_ia (chave, tipo, modelo, titulo_normalizado, preco, veredito, criado_em, acessado_em, hits)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)
+    ''', (chave, tipo, modelo_alvo, normalizar_titulo(titulo), preco, json.dumps(veredito, ensure_ascii=False), agora, agora))
+    with _lock:
+        ESTATISTICAS_CACHE["gravacoes"] += 1
+        _gravacoes_desde_limpeza += 1
+        limpar = _gravacoes_desde_limpeza >= 200  # Não conta a tabela a cada gravação
+        if limpar:
+            _gravacoes_desde_limpeza = 0
+    # Fora do lock: a limpeza vai ao banco (uma thread só por vez, quem zerou o contador)
+    if limpar:
+        _aplicar_limites(conn)
+    _lembrar(chave, veredito, agora)
+
+def _aplicar_limites(conn):
+    """Remove expirados e, acima do limite, os menos acessados (10% de folga para não repetir logo)."""
+    cursor = conn.execute("DELETE FROM cache_ia WHERE criado_em < ?", (time.time() - CACHE_IA_TTL,))
+    removidos = cursor.rowcount
+    total = conn.execute("SELECT COUNT(*) FROM cache_ia").fetchone()[0]
+    if total > CACHE_IA_MAX_ENTRADAS:
+        excesso = total - int(CACHE_IA_MAX_ENTRADAS * 0.9)
+        cursor = conn.execute('''
+            DELETE FROM cache_ia WHERE chave IN (
+                SELECT chave FROM cache_ia ORDER BY acessado_em LIMIT ?
+            )
+        ''', (excesso,))
+        removidos += cursor.rowcount
+    _contar(removidos=removidos)
+
+def resumo_cache():
+    with _lock:
+        estatisticas = dict(ESTATISTICAS_CACHE)
+    consultas = estatisticas["hits_memoria"] + estatisticas["hits_disco"] + estatisticas["misses"]
+    hits = consultas - estatisticas["misses"]
+    taxa = (hits / consultas * 100) if consultas else 0
+    return f"🧠 Cache IA: {hits}/{consultas} hits ({taxa:.0f}%) | {estatisticas['gravacoes']} gravados"
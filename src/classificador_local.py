@@ -0,0 +1,308 @@
+"""
+Classificador local (CPU, só numpy) treinado com os vereditos que o Gemini já deu.
+
+Uso (na raiz do projeto):
+    python src/classificador_local.py treinar   # treina, avalia no conjunto separado e salva
+    python src/classificador_local.py avaliar   # só o relatório de acurácia do modelo salvo
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import threading
+import numpy as np
+
+from cache_ia import normalizar_titulo, faixa_preco
+from config import CLASSIFICADOR_LOCAL_ATIVO, LIMIAR_CONFIANCA_LOCAL, MIN_EXEMPLOS_TREINO
+from conexao import obter_conexao
+
+CAMINHO_MODELO = os.path.join("data", "classificador_local.npz")
+
+DIMENSAO = 2 ** 18  # Espaço do "hashing trick" (sem vocabulário para guardar)
+ESTADOS = ['novo', 'otimo_estado', 'funcional', 'semifuncional', 'nao_funcional']
+# Só estes estados podem ser decididos localmente (os outros exigem estimativa de reparo da IA)
+ESTADOS_SEM_REPARO = ['novo', 'otimo_estado', 'funcional']
+# Início do 'motivo' (gravado em precos.ai_analise) das decisões tomadas aqui, sem o Gemini
+PREFIXO_MOTIVO_LOCAL = "Classificador local"
+
+# --- FEATURES ---
+def _indice(token):
+    return zlib.crc32(token.encode('utf-8')) % DIMENSAO  # crc32: estável entre execuções (hash() não é)
+
+def extrair_features(titulo, preco):
+    """N-gramas de caracteres (3-5) por palavra + palavras + faixa de preço, normalizados (L2)."""
+    texto = normalizar_titulo(titulo)
+    contagem = {}
+    for palavra in texto.split():
+        contagem[_indice("w:" + palavra)] = contagem.get(_indice("w:" + palavra), 0) + 1
+        marcada = f" {palavra} "
+        for n in (3, 4, 5):
+            for i in range(len(marcada) - n + 1):
+                idx = _indice("c:" + marcada[i:i + n])
+                contagem[idx] = contagem.get(idx, 0) + 1
+    # Faixa larga de preço (~60%): peças e acessórios costumam ser bem mais baratos
+    idx = _indice(f"p:{faixa_preco(preco) // 10}")
+    contagem[idx] = contagem.get(idx, 0) + 1
+
+    indices = np.fromiter(contagem.keys(), dtype=np.int64, count=len(contagem))
+    valores = np.fromiter(contagem.values(), dtype=np.float32, count=len(contagem))
+    norma = np.linalg.norm(valores)
+    if norma > 0:
+        valores /= norma
+    return indices, valores
+
+def _matriz_lote(linhas):
+    """Concatena as linhas esparsas para somar pesos de uma página inteira de uma vez."""
+    tamanhos = np.array([len(ind) for ind, _ in linhas], dtype=np.int64)
+    indices = np.concatenate([ind for ind, _ in linhas]) if linhas else np.zeros(0, dtype=np.int64)
+    valores = np.concatenate([val for _, val in linhas]) if linhas else np.zeros(0, dtype=np.float32)
+    inicios = np.concatenate([[0], np.cumsum(tamanhos)[:-1]]) if linhas else np.zeros(0, dtype=np.int64)
+    return indices, valores, inicios
+
+def _sigmoide(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+def _softmax(z):
+    z = z - z.max(axis=-1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=-1, keepdims=True)
+
+# --- MODELO ---
+class ClassificadorLocal:
+    """Regressão logística (piano real?) + softmax (estado), treinadas por SGD em features esparsas."""
+
+    def __init__(self):
+        self.w_valido = np.zeros(DIMENSAO, dtype=np.float32)
+        self.b_valido = 0.0
+        self.w_estado = np.zeros((DIMENSAO, len(ESTADOS)), dtype=np.float32)
+        self.b_estado = np.zeros(len(ESTADOS), dtype=np.float32)
+        self.meta = {}
+
+    def treinar(self, exemplos, epocas=8, taxa=0.5, l2=1e-6, semente=42):
+        rng = np.random.default_rng(semente)
+        linhas = [extrair_features(e['titulo'], e['preco']) for e in exemplos]
+        for epoca in range(epocas):
+            passo = taxa / (1 + epoca)
+            for i in rng.permutation(len(exemplos)):
+                ind, val = linhas[i]
+                exemplo = exemplos[i]
+
+                # Piano real vs peça/acessório
+                p = _sigmoide(float(self.w_valido[ind] @ val) + self.b_valido)
+                erro = p - (1.0 if exemplo['valido'] else 0.0)
+                self.w_valido[ind] -= passo * (erro * val + l2 * self.w_valido[ind])
+                self.b_valido -= passo * erro
+
+                # Estado (só aprende com pianos reais)
+                if exemplo['valido'] and exemplo.get('estado') in ESTADOS:
+                    probs = _softmax(val @ self.w_estado[ind] + self.b_estado)
+                    probs[ESTADOS.index(exemplo['estado'])] -= 1.0
+                    self.w_estado[ind] -= passo * (np.outer(val, probs) + l2 * self.w_estado[ind])
+                    self.b_estado -= passo * probs
+        return self
+
+    def prever_lote(self, itens):
+        """[{'titulo', 'preco'}] -> [{'p_valido', 'estado', 'p_estado'}] numa passada vetorizada."""
+        if not itens:
+            return []
+        linhas = [extrair_features(item['titulo'], item['preco']) for item in itens]
+        indices, valores, inicios = _matriz_lote(linhas)
+
+        z_valido = np.add.reduceat(self.w_valido[indices] * valores, inicios) + self.b_valido
+        z_estado = np.add.reduceat(self.w_estado[indices] * valores[:, None], inicios, axis=0) + self.b_estado
+        p_valido = _sigmoide(z_valido)
+        p_estado = _softmax(z_estado)
+
+        melhores = p_estado.argmax(axis=1)
+        return [
+            {"p_valido": float(p_valido[i]), "estado": ESTADOS[melhores[i]], "p_estado": float(p_estado[i, melhores[i]])}
+            for i in range(len(itens))
+        ]
+
+    def salvar(self, caminho=CAMINHO_MODELO):
+        # np.savez acrescenta '.npz' se faltar; gravamos num temporário e trocamos de forma atômica
+        temporario = caminho + ".tmp.npz"
+        np.savez_compressed(
+            temporario, w_valido=self.w_valido, b_valido=np.array([self.b_valido]),
+            w_estado=self.w_estado, b_estado=self.b_estado, meta=np.array([json.dumps(self.meta)])
+        )
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho=CAMINHO_MODELO):
+        dados = np.load(caminho)
+        modelo = cls()
+        modelo.w_valido = dados['w_valido']
+        modelo.b_valido = float(dados['b_valido'][0])
+        modelo.w_estado = dados['w_estado']
+        modelo.b_estado = dados['b_estado']
+        modelo.meta = json.loads(str(dados['meta'][0]))
+        return modelo
+
+# --- DADOS DE TREINO (HISTÓRICO DE VEREDITOS) ---
+def carregar_exemplos():
+    """
+    Junta os vereditos do Gemini: o cache da IA (inclui os rejeitados, que nunca chegam à tabela precos)
+    e os anúncios gravados, com as correções manuais do dashboard (ativo=0 sem ser 'nao_funcional' = lixo/acessório).
+    Ficam de fora as decisões do próprio classificador (treinar nelas só reforçaria os erros dele).
+    Um exemplo por título e faixa de preço: revisitas e anúncios repetidos não pesam mais no treino.
+    """
+    conn = obter_conexao()
+    exemplos = {}
+    tabelas = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+
+    if 'cache_ia' in tabelas:
+        for titulo, preco, veredito in conn.execute(
+            "SELECT titulo_normalizado, preco, veredito FROM cache_ia WHERE tipo = 'validacao'"
+        ):
+            analise = json.loads(veredito)
+            if str(analise.get('motivo', '')).startswith(PREFIXO_MOTIVO_LOCAL):
+                continue
+            exemplos[_chave_exemplo(titulo, preco)] = {
+                "titulo": titulo, "preco": preco or 0,
+                "valido": bool(analise.get('valido')), "estado": analise.get('estado')
+            }
+
+    colunas_precos = {r[1] for r in conn.execute("PRAGMA table_info(precos)")} if 'precos' in tabelas else set()
+    if 'titulo' in colunas_precos:
+        # Só a linha mais recente de cada link: é a que carrega a última correção manual
+        for titulo, preco, estado, ativo in conn.execute('''
+            SELECT titulo, preco, estado_detalhado, ativo FROM precos
+            WHERE id IN (
+                SELECT MAX(id) FROM precos
+                WHERE titulo IS NOT NULL AND titulo != '' AND loja = 'Mercado Livre'
+                  AND COALESCE(ai_analise, '') NOT LIKE ?
+                GROUP BY link
+            )
+        ''', (PREFIXO_MOTIVO_LOCAL + '%',)):
+            desativado_manual = not ativo and estado != 'nao_funcional'
+            exemplos[_chave_exemplo(titulo, preco)] = {
+                "titulo": titulo, "preco": preco or 0,
+                "valido": not desativado_manual, "estado": estado
+            }
+    return list(exemplos.values())
+
+def _chave_exemplo(titulo, preco):
+    return normalizar_titulo(titulo), faixa_preco(preco)
+
+def separar_treino_teste(exemplos, fracao_teste=0.2):
+    """Separação pelo hash do título: o mesmo anúncio cai sempre no mesmo lado, mesmo com a base crescendo."""
+    treino, teste = [], []
+    for exemplo in exemplos:
+        balde = zlib.crc32(normalizar_titulo(exemplo['titulo']).encode('utf-8')) % 100
+        (teste if balde < fracao_teste * 100 else treino).append(exemplo)
+    return treino, teste
+
+def avaliar(modelo, teste, limiar=LIMIAR_CONFIANCA_LOCAL):
+    previsoes = modelo.prever_lote(teste)
+    acertos_valido = sum((p['p_valido'] >= 0.5) == e['valido'] for p, e in zip(previsoes, teste))
+    pares_estado = [(p, e) for p, e in zip(previsoes, teste) if e['valido'] and e.get('estado') in ESTADOS]
+    acertos_estado = sum(p['estado'] == e['estado'] for p, e in pares_estado)
+
+    # O que importa na prática: quanto é decidido sem IA e com que acerto
+    confiantes = [(p, e) for p, e in zip(previsoes, teste) if decisao_local(p, limiar) is not None]
+    acertos_confiantes = sum(decisao_local(p, limiar)['valido'] == e['valido'] for p, e in confiantes)
+
+    maioria = max(sum(e['valido'] for e in teste), sum(not e['valido'] for e in teste))
+    return {
+        "n_teste": len(teste),
+        "acuracia_valido": acertos_valido / len(teste) if teste else 0,
+        "baseline_maioria": maioria / len(teste) if teste else 0,
+        "acuracia_estado": acertos_estado / len(pares_estado) if pares_estado else 0,
+        "cobertura_local": len(confiantes) / len(teste) if teste else 0,
+        "acuracia_local": acertos_confiantes / len(confiantes) if confiantes else 0,
+    }
+
+def imprimir_relatorio(relatorio):
+    print(f"   🧪 Exemplos de teste:            {relatorio['n_teste']}")
+    print(f"   🎹 Acurácia piano real:          {relatorio['acuracia_valido']:.1%} (baseline {relatorio['baseline_maioria']:.1%})")
+    print(f"   🏷️  Acurácia estado:              {relatorio['acuracia_estado']:.1%}")
+    print(f"   ⚡ Decididos sem IA (cobertura):  {relatorio['cobertura_local']:.1%}")
+    print(f"   ✅ Acerto nos decididos sem IA:   {relatorio['acuracia_local']:.1%}")
+
+def treinar_e_salvar():
+    exemplos = carregar_exemplos()
+    print(f"--- 🧠 TREINANDO CLASSIFICADOR LOCAL ({len(exemplos)} exemplos) ---")
+    if len(exemplos) < MIN_EXEMPLOS_TREINO:
+        print(f"❌ Poucos exemplos (mínimo {MIN_EXEMPLOS_TREINO}). Deixe o scout rodar mais um pouco.")
+        return None
+
+    treino, teste = separar_treino_teste(exemplos)
+    inicio = time.time()
+    modelo = ClassificadorLocal().treinar(treino)
+    print(f"   ⏱️ Treino em {time.time() - inicio:.1f}s")
+
+    relatorio = avaliar(modelo, teste)
+    imprimir_relatorio(relatorio)
+
+    modelo.meta = {"treinado_em": time.strftime("%Y-%m-%d %H:%M"), "n_treino": len(treino), **relatorio}
+    modelo.salvar()
+    print(f"💾 Modelo salvo em {CAMINHO_MODELO}")
+    return modelo
+
+# --- TRIAGEM NO PIPELINE ---
+_modelo_carregado = {"mtime": None, "modelo": None}
+_lock_modelo = threading.Lock()
+
+def obter_modelo():
+    """Carrega o modelo salvo (e recarrega se for retreinado com os workers rodando)."""
+    if not CLASSIFICADOR_LOCAL_ATIVO:
+        return None
+    try:
+        mtime = os.path.getmtime(CAMINHO_MODELO)
+    except OSError:
+        return None
+    with _lock_modelo:
+        if _modelo_carregado["mtime"] != mtime:
+            try:
+                _modelo_carregado.update(mtime=mtime, modelo=ClassificadorLocal.carregar())
+            except Exception as e:
+                print(f"⚠️ Classificador local inválido: {e}")
+                _modelo_carregado.update(mtime=mtime, modelo=None)
+        return _modelo_carregado["modelo"]
+
+def decisao_local(previsao, limiar=LIMIAR_CONFIANCA_LOCAL):
+    """Análise no formato de validar_com_ia, ou None se a confiança não bastar."""
+    if previsao['p_valido'] <= 1 - limiar:
+        return {"valido": False, "estado": "indefinido", "reparo": 0,
+                "motivo": f"{PREFIXO_MOTIVO_LOCAL}: não é o piano (p={previsao['p_valido']:.2f})"}
+    if (previsao['p_valido'] >= limiar and previsao['p_estado'] >= limiar
+            and previsao['estado'] in ESTADOS_SEM_REPARO):
+        return {"valido": True, "estado": previsao['estado'], "reparo": 0,
+                "motivo": f"{PREFIXO_MOTIVO_LOCAL} ({previsao['estado']}, p={previsao['p_estado']:.2f})"}
+    return None
+
+def triar_lote(itens, confirmados):
+    """
+    Retorna (decididos [(item, analise)], a_escalar [item]). Sem modelo treinado, tudo escala.
+    O classificador não vê o modelo buscado: só aprova itens 'confirmados' (código do modelo
+    no título, pelo pré-filtro); os ambíguos ele pode rejeitar, mas aprovação fica com o Gemini.
+    """
+    modelo = obter_modelo()
+    if modelo is None or not itens:
+        return [], list(itens)
+
+    decididos, a_escalar = [], []
+    for item, confirmado, previsao in zip(itens, confirmados, modelo.prever_lote(itens)):
+        analise = decisao_local(previsao)
+        if analise is None or (analise['valido'] and not confirmado):
+            a_escalar.append(item)
+        else:
+            decididos.append((item, analise))
+    return decididos, a_escalar
+
+if __name__ == "__main__":
+    comando = sys.argv[1] if len(sys.argv) > 1 else "treinar"
+    if comando == "treinar":
+        treinar_e_salvar()
+    elif comando == "avaliar":
+        if not os.path.exists(CAMINHO_MODELO):
+            print("❌ Nenhum modelo salvo. Rode: python src/classificador_local.py treinar")
+        else:
+            modelo = ClassificadorLocal.carregar()
+            _, teste = separar_treino_teste(carregar_exemplos())
+            print(f"--- 📊 AVALIAÇÃO (modelo de {modelo.meta.get('treinado_em', '?')}) ---")
+            imprimir_relatorio(avaliar(modelo, teste))
+    else:
+        print(__doc__)
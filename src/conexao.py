@@ -0,0 +1,80 @@
+import os
+import math
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DB_PATH = os.path.join("data", "historico_precos.db")
+
+# Espera (ms) por uma trava de escrita de outro processo antes de desistir com "database is locked"
+BUSY_TIMEOUT_MS = 30000
+# Statements preparados mantidos por conexão (o sqlite3 reaproveita o plano pelo texto da SQL)
+STATEMENTS_EM_CACHE = 256
+
+PRAGMAS = [
+    "PRAGMA journal_mode = WAL",       # Leitores (dashboard) não bloqueiam o escritor (scout) e vice-versa
+    "PRAGMA synchronous = NORMAL",     # Seguro com WAL; evita um fsync por commit
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -20000",      # ~20 MB de cache de páginas
+]
+
+_local = threading.local()
+
+def _abrir(check_same_thread=True):
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+    # isolation_level=None: autocommit; transações explícitas via transacao()
+    conn = sqlite3.connect(
+        DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None,
+        cached_statements=STATEMENTS_EM_CACHE, check_same_thread=check_same_thread
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    _registrar_funcoes(conn)
+    return conn
+
+def _registrar_funcoes(conn):
+    """ln() é usado pelos triggers do resumo de mercado; SQLite compilado sem funções matemáticas não o tem."""
+    try:
+        conn.execute("SELECT ln(1)")
+    except sqlite3.OperationalError:
+        conn.create_function("ln", 1, lambda x: math.log(x) if x and x > 0 else None, deterministic=True)
+
+def obter_conexao():
+    """
+    Conexão gerenciada: uma por thread, aberta uma vez e reaproveitada
+    (com WAL, busy timeout e statements preparados em cache).
+    Depois de um fork, o processo filho abre a sua.
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.pid != os.getpid():
+        conn = _abrir()
+        _local.conn = conn
+        _local.pid = os.getpid()
+    return conn
+
+def abrir_conexao_dedicada():
+    """
+    Conexão fora do "uma por thread", com os mesmos PRAGMAs, para um dono que vive mais que as threads
+    (ex: o cache do dashboard, usado a cada rerun do Streamlit por uma thread diferente).
+    Pode ser usada de qualquer thread: quem a guarda serializa o acesso (lock).
+    """
+    return _abrir(check_same_thread=False)
+
+@contextmanager
+def transacao(imediata=False):
+    """BEGIN ... COMMIT (ROLLBACK em exceção). 'imediata' pega a trava de escrita já no início."""
+    conn = obter_conexao()
+    conn.execute("BEGIN IMMEDIATE" if imediata else "BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+def fechar_conexao():
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.pid == os.getpid():
+        conn.close()
+    _local.conn = None
@@ -0,0 +1,140 @@
+import os
+
+# --- NAVEGADOR (POOL) ---
+# Quantos Chromes ficam abertos ao mesmo tempo (cada um com o seu perfil).
+# 2 permite buscar duas lojas via navegador em paralelo.
+TAMANHO_POOL_NAVEGADORES = 2
+# Recicla o navegador depois de N páginas (evita vazamento de memória do Chrome)
+MAX_PAGINAS_POR_NAVEGADOR = 40
+# Tempo máximo (s) à espera de um navegador livre no pool
+TIMEOUT_EMPRESTIMO_NAVEGADOR = 120
+
+# Modo "enxuto": headless, carregamento 'eager' e sem imagens/fontes/mídia/rastreadores.
+# Desligue (False) para ver o Chrome na tela ao depurar um scraper.
+MODO_ENXUTO = True
+# Extensões bloqueadas via DevTools (Network.setBlockedURLs) no modo enxuto.
+# O padrão casa com a URL inteira: "*.png" não pega "foto.png?v=3", por isso vai também "*.png?*"
+EXTENSOES_BLOQUEADAS = [
+    "png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico",
+    "woff", "woff2", "ttf", "otf", "eot",
+    "mp4", "webm", "mp3", "m3u8",
+]
+RECURSOS_BLOQUEADOS = [padrao for ext in EXTENSOES_BLOQUEADAS for padrao in (f"*.{ext}", f"*.{ext}?*")]
+DOMINIOS_RASTREADORES = [
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+    "googlesyndication.com", "googleadservices.com", "facebook.net",
+    "connect.facebook.com", "hotjar.com", "clarity.ms", "criteo.com",
+    "criteo.net", "taboola.com", "outbrain.com", "tiktok.com", "bing.com",
+    "newrelic.com", "nr-data.net",
+]
+
+# --- HTTP (CAMINHO RÁPIDO, SEM NAVEGADOR) ---
+TIMEOUT_HTTP = 15
+# Conexões simultâneas por domínio (educação com o servidor + reaproveitamento keep-alive)
+LIMITE_CONEXOES_POR_HOST = 2
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+)
+
+# --- ESPERAS (PRONTIDÃO DA PÁGINA) ---
+# Tempo máximo (s) à espera dos seletores da lista de produtos, por site
+TIMEOUT_PRONTIDAO = {
+    "mercadolivre": 12,
+    "lojas": 15,
+}
+TIMEOUT_PRONTIDAO_PADRAO = 10
+
+# --- CORTESIA (ANTI-BOT) ---
+# Intervalo mínimo (s) sorteado entre duas requisições ao mesmo host.
+# Só dorme o que faltar desde a última visita; não tem relação com a página estar pronta.
+CORTESIA_ATIVA = True
+CORTESIA_POR_HOST = {
+    "lista.mercadolivre.com.br": (5, 8),
+    "www.teclacenter.com.br": (2, 4),
+    "www.ninjasom.com.br": (2, 4),
+}
+CORTESIA_PADRAO = (1, 2)
+
+# --- PIPELINE (RASPAGEM -> VALIDAÇÃO -> GRAVAÇÃO) ---
+# Lotes (páginas) que podem esperar validação; cheia, a raspagem espera (backpressure)
+TAMANHO_FILA_LOTES = 4
+# Threads consumindo a fila e chamando a IA em paralelo
+NUM_VALIDADORES_IA = 2
+
+# --- FILA DE JOBS (VÁRIOS WORKERS / MÁQUINAS) ---
+# Duração do lease de um job; o worker renova a cada 1/3 deste tempo enquanto trabalha
+DURACAO_LEASE_JOB = 300
+# Intervalo (s) até o mesmo par (modelo, fonte) ser buscado de novo
+INTERVALO_REFRESH_JOB = {
+    "lojas_br": 3600,
+    "mercadolivre": 3600,
+}
+# Espera (s) quando não há job disponível
+ESPERA_SEM_JOBS = 20
+# De quanto em quanto tempo (s) o CSV de modelos é ressincronizado com a fila
+INTERVALO_SINCRONIZAR_CSV = 600
+# STATS agregados somam só os workers ativos nesta janela (s)
+JANELA_STATS_WORKERS = 6 * 3600
+
+# --- LOJAS BR (BUSCA CONCORRENTE) ---
+# Buscas simultâneas na mesma loja (vale entre todas as threads do processo)
+LIMITE_BUSCAS_POR_LOJA = 1
+
+# --- IA (GEMINI) ---
+# Anúncios por requisição na validação em lote
+TAMANHO_LOTE_IA = 20
+
+# --- CACHE DE VEREDITOS DA IA ---
+CACHE_IA_ATIVO = True
+# Validade (s) de um veredito em cache
+CACHE_IA_TTL = 30 * 24 * 3600
+# Máximo de vereditos no SQLite; acima disso, remove os menos acessados
+CACHE_IA_MAX_ENTRADAS = 50000
+# Vereditos mantidos também em memória (acesso em microssegundos)
+CACHE_IA_MAX_MEMORIA = 5000
+
+# --- CLASSIFICADOR LOCAL (TRIAGEM ANTES DA IA) ---
+CLASSIFICADOR_LOCAL_ATIVO = True
+# Probabilidade mínima para decidir sem chamar o Gemini; abaixo disso o anúncio escala para a IA
+LIMIAR_CONFIANCA_LOCAL = 0.95
+# Mínimo de exemplos rotulados para aceitar um treino
+MIN_EXEMPLOS_TREINO = 200
+
+# --- GATEWAY DE LLM ---
+# 'gemini' (produção) ou 'falso' (modelo local determinístico para testes e benchmarks)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+# Cota: requisições por minuto (token bucket) e rajada máxima
+LLM_REQUISICOES_POR_MINUTO = 30
+LLM_RAJADA = 5
+# Requisições simultâneas em voo
+LLM_MAX_EM_VOO = 4
+# Tentativas em 429/5xx, com backoff exponencial (base em segundos) + jitter
+LLM_MAX_TENTATIVAS = 5
+LLM_BACKOFF_BASE = 2.0
+LLM_BACKOFF_MAXIMO = 60.0
+
+# --- ÍNDICE DE LINKS (DEDUPLICAÇÃO EM MEMÓRIA) ---
+# Até este número de links o índice é um set exato; acima, filtro de Bloom + confirmação no banco
+INDICE_LINKS_LIMITE_EXATO = 2_000_000
+INDICE_LINKS_TAXA_FALSO_POSITIVO = 0.001
+
+# --- GRAVAÇÃO EM LOTE (SQLITE) ---
+# Anúncios acumulados antes de um executemany numa única transação
+ESCRITOR_TAMANHO_LOTE = 200
+# Grava o que estiver no buffer no máximo a cada N segundos
+ESCRITOR_INTERVALO_FLUSH = 5
+
+# --- REVISITAS (ANÚNCIOS JÁ VISTOS) ---
+# Similaridade mínima (Jaccard das palavras) para considerar o título "o mesmo anúncio";
+# abaixo disso, o anúncio volta para a validação completa (IA)
+LIMIAR_MUDANCA_TITULO = 0.8
+
+# --- DASHBOARD ---
+# Linhas por página na aba "Gestão de Anúncios" (paginação no SQLite)
+GESTAO_LINHAS_POR_PAGINA = 200
+
+# --- BUSCA TEXTUAL (FTS5) ---
+# A busca considera os N anúncios mais recentes que casam (percorre o índice em ordem de id e para);
+# a relevância (bm25) ordena esse conjunto: o custo não cresce com o histórico
+BUSCA_MAX_RESULTADOS = 10_000
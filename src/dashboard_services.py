@@ -1,16 +1,20 @@
-import sqlite3
 import pandas as pd
 import numpy as np
 import os
+import threading
+
+from busca import consulta_fts, sql_ids_busca, sql_relevancia
+from config import GESTAO_LINHAS_POR_PAGINA, BUSCA_MAX_RESULTADOS
+import conexao
+from conexao import obter_conexao, transacao, abrir_conexao_dedicada
+from migracoes import aplicar_migracoes
 
 # Caminhos
-DB_PATH = os.path.join("data", "historico_precos.db")
 CSV_PATH = os.path.join("data", "modelos_alvo.csv")
 
 # --- BANCO DE DADOS & CONFIGURAÇÃO ---
 def init_config_db():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    cursor = obter_conexao().cursor()
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS config_dashboard (
             id INTEGER PRIMARY KEY CHECK (id = 1),
@@ -21,81 +25,351 @@ def init_config_db():
         )
     ''')
     cursor.execute("INSERT OR IGNORE INTO config_dashboard (id, min_score, max_score, min_preco, max_preco) VALUES (1, 50, 100, 1500.0, 50000.0)")
-    conn.commit()
-    conn.close()
+    aplicar_migracoes()
 
 def get_dashboard_config():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    cursor = obter_conexao().cursor()
     cursor.execute("SELECT min_score, max_score, min_preco, max_preco FROM config_dashboard WHERE id = 1")
     row = cursor.fetchone()
-    conn.close()
     if row:
         return {"min_score": row[0], "max_score": row[1], "min_preco": row[2], "max_preco": row[3]}
     return {"min_score": 50, "max_score": 100, "min_preco": 1500.0, "max_preco": 50000.0}
 
 def update_dashboard_config(min_s, max_s, min_p, max_p):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    cursor = obter_conexao().cursor()
     cursor.execute("""
         UPDATE config_dashboard 
         SET min_score = ?, max_score = ?, min_preco = ?, max_preco = ? 
         WHERE id = 1
     """, (min_s, max_s, min_p, max_p))
-    conn.commit()
-    conn.close()
 
-# --- DADOS ---
-def carregar_dados_completos():
-    if not os.path.exists(DB_PATH): return None, None
-    
-    conn = sqlite3.connect(DB_PATH)
-    df_precos = pd.read_sql_query("SELECT * FROM precos", conn)
-    conn.close()
+# --- DADOS (CACHE INCREMENTAL) ---
+# O módulo sobrevive entre os reruns do Streamlit: o cache vive aqui, por processo, compartilhado
+# pelas sessões. Cada rerun roda numa thread nova (com outra conexão de obter_conexao()), então
+# o cache tem a sua conexão dedicada (o PRAGMA data_version é por conexão) e um lock.
+# 'precos' é o espelho da tabela (índice = id); 'full' é o merge com o CSV; 'mercado' é (ativos, stats).
+_cache = {
+    "precos": None, "ultimo_id": 0, "ultima_alteracao": 0.0,
+    "conexao": None, "caminho": None, "data_version": None,
+    "csv_mtime": None, "ref": None,
+    "full": None, "mercado": None,
+}
+_lock_cache = threading.RLock()
+
+# Projeção: só o que as abas usam (texto longo como 'ai_analise' é lido sob demanda, por id)
+COLUNAS_PRECOS = [
+    'id', 'data_consulta', 'modelo', 'preco', 'custo_reparo', 'estado_detalhado',
+    'loja', 'link', 'ativo', 'verificado', 'atualizado_em',
+]
+COLUNAS_CSV = ['modelo', 'mecanica', 'som_polifonia', 'score_geral', 'priorizado']
+# Poucos valores distintos repetidos em milhares de linhas: 'category' guarda cada um uma vez
+COLUNAS_CATEGORIA = ['modelo_key', 'loja', 'estado_detalhado']
+_SELECT_PRECOS = f"SELECT {', '.join(COLUNAS_PRECOS)} FROM precos"
+
+def _chave_modelo(serie):
+    return serie.astype(str).str.strip().str.upper()
+
+def _categorizar(df):
+    for coluna in COLUNAS_CATEGORIA:
+        if coluna in df.columns and not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype('category')
+    return df
+
+def _conexao_cache():
+    """Conexão do cache (aberta na primeira leitura; reaberta se o banco apontado mudar). Chamar com o lock."""
+    if _cache["conexao"] is None or _cache["caminho"] != conexao.DB_PATH:
+        if _cache["conexao"] is not None:
+            _cache["conexao"].close()
+        _cache.update(conexao=abrir_conexao_dedicada(), caminho=conexao.DB_PATH, precos=None, data_version=None)
+    return _cache["conexao"]
+
+def _ler_precos(sql, parametros=()):
+    df = pd.read_sql_query(sql, _conexao_cache(), params=parametros)
+    df['atualizado_em'] = pd.to_numeric(df['atualizado_em'], errors='coerce')
+    # A chave é calculada só para as linhas lidas (o delta), não para o histórico a cada mudança
+    df['modelo_key'] = _chave_modelo(df['modelo'])
+    # Índice = id (sem nome, para não conflitar com a coluna 'id')
+    return _categorizar(df.set_index('id', drop=False).rename_axis(None))
+
+def _mesclar(df, alterados, novos=None):
+    """Substitui as linhas alteradas e acrescenta as novas (categorias diferentes viram object no concat)."""
+    if not alterados.empty:
+        df = df.drop(index=alterados.index)
+    # Frames vazios saem do concat: viriam com dtype object e contaminariam as colunas numéricas
+    partes = [parte for parte in (df, alterados, novos) if parte is not None and not parte.empty]
+    return _categorizar(pd.concat(partes).sort_index())
+
+def _recarregar_precos():
+    df = _ler_precos(f"{_SELECT_PRECOS} ORDER BY id")
+    _cache["precos"] = df
+    _cache["ultimo_id"] = int(df['id'].max()) if not df.empty else 0
+    _cache["ultima_alteracao"] = float(df['atualizado_em'].max()) if df['atualizado_em'].notna().any() else 0.0
 
+def _sincronizar_precos():
+    """
+    Traz só o que mudou desde a última leitura: linhas novas (id > último) e alteradas
+    (atualizado_em >= última alteração). Retorna True se algo mudou.
+    PRAGMA data_version só muda quando OUTRA conexão grava (e o cache só lê): com ele igual,
+    nem consulta a tabela. Chamar com o lock.
+    """
+    conn = _conexao_cache()
+    data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+    if _cache["precos"] is not None and _cache["data_version"] == data_version:
+        return False
+    _cache["data_version"] = data_version
+
+    if _cache["precos"] is None:
+        _recarregar_precos()
+        return True
+
+    novos = _ler_precos(f"{_SELECT_PRECOS} WHERE id > ? ORDER BY id", (_cache["ultimo_id"],))
+    alterados = _ler_precos(
+        f"{_SELECT_PRECOS} WHERE atualizado_em >= ? AND id <= ?",
+        (_cache["ultima_alteracao"], _cache["ultimo_id"])
+    )
+    total = conn.execute("SELECT COUNT(*) FROM precos").fetchone()[0]
+    df = _cache["precos"]
+
+    esperado = len(df) + len(novos)
+    if total != esperado or not alterados.index.isin(df.index).all():
+        # Houve DELETE (limpeza/migração): o delta não basta
+        _recarregar_precos()
+        return True
+    if novos.empty and alterados.empty:
+        return False
+
+    _cache["precos"] = _mesclar(df, alterados, novos)
+    if not novos.empty:
+        _cache["ultimo_id"] = int(novos['id'].max())
+    for parte in (novos, alterados):
+        if parte['atualizado_em'].notna().any():
+            _cache["ultima_alteracao"] = max(_cache["ultima_alteracao"], float(parte['atualizado_em'].max()))
+    return True
+
+def _sincronizar_csv():
+    try:
+        mtime = os.path.getmtime(CSV_PATH)
+    except OSError:
+        mtime = None
+    if _cache["ref"] is not None and mtime == _cache["csv_mtime"]:
+        return False
     try:
-        df_ref = pd.read_csv(CSV_PATH, on_bad_lines='skip')
+        # 'justificativa' (texto longo) fica de fora: só o editor da aba CSV a exibe
+        df_ref = pd.read_csv(CSV_PATH, on_bad_lines='skip', usecols=lambda coluna: coluna in COLUNAS_CSV)
     except:
         df_ref = pd.DataFrame()
+    if not df_ref.empty:
+        df_ref['modelo_key'] = _chave_modelo(df_ref['modelo'])
+        df_ref = df_ref.drop(columns='modelo')
+    _cache["ref"], _cache["csv_mtime"] = df_ref, mtime
+    return True
+
+def invalidar_cache(ids=None, csv=False):
+    """
+    Mutação feita pelo próprio dashboard: relê já as linhas 'ids' (a próxima sincronização
+    só confirma o delta) e descarta o merge/estatísticas derivados.
+    """
+    with _lock_cache:
+        _invalidar_cache(ids, csv)
+
+def _invalidar_cache(ids, csv):
+    _cache["full"] = None
+    _cache["mercado"] = None
+    if csv:
+        _cache["csv_mtime"] = None
+    if ids is None or _cache["precos"] is None or len(ids) > 500:
+        _cache["data_version"] = None  # Próximo carregamento consulta o delta completo
+        return
+    ids = [int(i) for i in ids]
+    if not ids:
+        return
+    marcadores = ",".join("?" * len(ids))
+    alterados = _ler_precos(f"{_SELECT_PRECOS} WHERE id IN ({marcadores})", ids)
+    _cache["precos"] = _mesclar(_cache["precos"], alterados)
+
+def carregar_dados_completos():
+    if not os.path.exists(conexao.DB_PATH): return None, None
+    with _lock_cache:
+        return _carregar_dados_completos()
+
+def _carregar_dados_completos():
+    mudou_precos = _sincronizar_precos()
+    mudou_csv = _sincronizar_csv()
+    df_precos, df_ref = _cache["precos"], _cache["ref"]
+
+    if not (mudou_precos or mudou_csv or _cache["full"] is None):
+        return df_precos, _cache["full"]
 
     if not df_precos.empty and not df_ref.empty:
-        df_precos['modelo_key'] = df_precos['modelo'].astype(str).str.strip().str.upper()
-        df_ref['modelo_key'] = df_ref['modelo'].astype(str).str.strip().str.upper()
-        
-        df_full = pd.merge(df_precos, df_ref, on='modelo_key', how='left', suffixes=('', '_csv'))
+        df_full = pd.merge(df_precos.reset_index(drop=True), df_ref, on='modelo_key', how='left', suffixes=('', '_csv'))
         df_full['custo_reparo'] = df_full['custo_reparo'].fillna(0)
         df_full['custo_total'] = df_full['preco'] + df_full['custo_reparo']
-        df_full['ativo'] = df_full['ativo'].apply(lambda x: x in [1, '1', True, 'True'])
-        
-        return df_precos, df_full
-    
-    return df_precos, pd.DataFrame()
+        df_full['ativo'] = df_full['ativo'].isin([1, '1', True, 'True'])
+        _categorizar(df_full)
+    else:
+        df_full = pd.DataFrame()
+
+    _cache["full"] = df_full
+    _cache["mercado"] = None
+    return df_precos, df_full
+
+def carregar_mercado(df_full):
+    """(anúncios ativos, estatísticas por modelo), recalculados só quando os dados mudam."""
+    with _lock_cache:
+        if _cache["mercado"] is None or _cache["mercado"][0] is not df_full:
+            df_ativos = df_full[df_full['ativo'] == True].copy()
+            _cache["mercado"] = (df_full, df_ativos, calcular_estatisticas_mercado())
+        return _cache["mercado"][1], _cache["mercado"][2]
+
+# --- GESTÃO DE ANÚNCIOS (PAGINAÇÃO NO BANCO) ---
+COLUNAS_GESTAO = ['id', 'ativo', 'verificado', 'data_consulta', 'modelo', 'preco', 'custo_reparo', 'estado_detalhado', 'link']
+# Rótulo na tela -> ORDER BY (o id desempata: páginas estáveis; todas as ordens têm índice)
+# 'Relevância' usa o bm25 da busca textual (sem nota, como o id digitado que não casa com o texto, vai para o fim);
+# sem busca, cai em 'Mais recentes'
+ORDENACOES_GESTAO = {
+    "Mais recentes": "id DESC",
+    "Relevância": "relevancia IS NULL, relevancia, id DESC",
+    "Mais antigos": "id ASC",
+    "Menor preço": "preco ASC, id ASC",
+    "Maior preço": "preco DESC, id DESC",
+    "Modelo (A-Z)": "modelo ASC, id ASC",
+}
+
+def _filtro_gestao(busca=None, ativo=None):
+    """WHERE e parâmetros: status (1/0/None = todos) e busca textual (FTS5: modelo, título, análise, loja) ou id."""
+    condicoes, parametros = [], []
+    if ativo is not None:
+        condicoes.append("ativo = ?")
+        parametros.append(int(ativo))
+    if busca:
+        # Conjunto limitado (os BUSCA_MAX_RESULTADOS mais recentes que casam, já no status) + o próprio id, se numérico
+        fontes = []
+        consulta = consulta_fts(busca)
+        if consulta:
+            fontes.append(f"SELECT * FROM ({sql_ids_busca(ativo=ativo)})")
+            parametros.append(consulta)
+        if busca.strip().isdigit():
+            fontes.append("SELECT ?")
+            parametros.append(int(busca))
+        condicoes.append(f"id IN ({' UNION ALL '.join(fontes)})" if fontes else "0")
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    return where, parametros
+
+def _tabela_gestao(busca):
+    # Com busca, o conjunto de ids já é pequeno: NOT INDEXED força percorrê-lo (por rowid) em vez de
+    # varrer o índice de ativo/preço inteiro testando cada linha contra ele
+    return "precos NOT INDEXED" if busca else "precos"
+
+def contar_anuncios(busca=None, ativo=None):
+    """
+    Total para o filtro (sem busca, o COUNT é resolvido pelo índice de 'ativo';
+    com busca, vai no máximo até BUSCA_MAX_RESULTADOS).
+    """
+    where, parametros = _filtro_gestao(busca, ativo)
+    return obter_conexao().execute(f"SELECT COUNT(*) FROM {_tabela_gestao(busca)} {where}", parametros).fetchone()[0]
+
+def pagina_anuncios(busca=None, ativo=None, ordem="Mais recentes", pagina=1, por_pagina=GESTAO_LINHAS_POR_PAGINA):
+    """Uma página (1-based) do filtro: só ela sai do banco e vai para o navegador."""
+    where, parametros = _filtro_gestao(busca, ativo)
+    consulta = consulta_fts(busca) if busca else None
+    if ordem == "Relevância" and consulta is None:
+        ordem = "Mais recentes"
+    ordenacao = ORDENACOES_GESTAO.get(ordem, ORDENACOES_GESTAO["Mais recentes"])
+    juncao = ""
+    if ordem == "Relevância":
+        # bm25 do FTS5 (pesos por coluna definidos na migração 009) para o mesmo conjunto do filtro
+        juncao = f"LEFT JOIN ({sql_relevancia(ativo=ativo)}) ON fts_id = precos.id"
+        parametros = [consulta] + parametros
+        if busca.strip().isdigit():
+            # Quem digitou um número provavelmente quer aquele id primeiro
+            ordenacao = f"id = {int(busca)} DESC, {ordenacao}"
+    return pd.read_sql_query(
+        f"SELECT {', '.join(COLUNAS_GESTAO)} FROM {_tabela_gestao(busca)} {juncao} {where} ORDER BY {ordenacao} LIMIT ? OFFSET ?",
+        obter_conexao(), params=parametros + [por_pagina, (max(pagina, 1) - 1) * por_pagina]
+    )
+
+def obter_analise_ia(id_anuncio):
+    """Texto da análise da IA de um anúncio (fora da projeção: só o item selecionado precisa dele)."""
+    row = obter_conexao().execute("SELECT ai_analise FROM precos WHERE id = ?", (int(id_anuncio),)).fetchone()
+    return row[0] if row else None
 
 def atualizar_status_item(id_anuncio, ativo):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE precos SET ativo = ? WHERE id = ?", (1 if ativo else 0, int(id_anuncio)))
-    conn.commit()
-    conn.close()
-
-def salvar_lote_db(df_editado):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    for _, row in df_editado.iterrows():
-        cursor.execute("UPDATE precos SET ativo = ? WHERE id = ?", (1 if row['ativo'] else 0, row['id']))
-    conn.commit()
-    conn.close()
+    obter_conexao().execute("UPDATE precos SET ativo = ? WHERE id = ?", (1 if ativo else 0, int(id_anuncio)))
+    invalidar_cache(ids=[int(id_anuncio)])
+
+def _linhas_alteradas(df_editado, df_exibido):
+    """
+    'ativo' (id -> bool) só das linhas do editor que diferem da página exibida (a de pagina_anuncios
+    que foi para o editor). Comparar com uma releitura do banco pegaria gravações de outros como edição.
+    """
+    editado = df_editado.set_index('id')['ativo'].fillna(False).astype(bool)
+    anterior = df_exibido.set_index('id')['ativo'].reindex(editado.index)
+    # Id fora da página exibida (não deveria acontecer): grava por garantia
+    mudou = anterior.isna().to_numpy() | (anterior.fillna(0).astype(bool).to_numpy() != editado.to_numpy())
+    return editado[mudou]
+
+def salvar_lote_db(df_editado, df_exibido):
+    """Grava só o diff do editor (um executemany, uma transação). Retorna quantas linhas mudaram."""
+    alterados = _linhas_alteradas(df_editado, df_exibido)
+    if alterados.empty:
+        return 0
+    with transacao(imediata=True) as conn:
+        conn.executemany(
+            "UPDATE precos SET ativo = ? WHERE id = ?",
+            zip(alterados.astype(int).tolist(), [int(i) for i in alterados.index])
+        )
+    invalidar_cache(ids=alterados.index.tolist())
+    return len(alterados)
 
 def salvar_csv(df):
     df.to_csv(CSV_PATH, index=False)
+    invalidar_cache(csv=True)
+
+def calcular_estatisticas_mercado():
+    """
+    Estatísticas por modelo lidas da tabela 'resumo_modelos' (mantida por triggers a cada gravação):
+    ~uma linha por modelo, em vez de um groupby sobre o histórico inteiro.
+    """
+    df = pd.read_sql_query('''
+        SELECT modelo_key, minimo AS Minimo, maximo AS Maximo, soma_log, qtd_log, qtd AS Qtd, melhor_id
+        FROM resumo_modelos
+    ''', obter_conexao())
+    # Média geométrica = exp(média dos logs); 0 quando não há preço positivo (como antes)
+    df['MediaGeo'] = np.where(df['qtd_log'] > 0, np.exp(df['soma_log'] / df['qtd_log'].where(df['qtd_log'] > 0, 1)), 0)
+    return df[['modelo_key', 'Minimo', 'Maximo', 'MediaGeo', 'Qtd', 'melhor_id']]
+
+def melhores_por_modelo(df_filtrado, stats_mercado):
+    """
+    Anúncio mais barato de cada modelo dentro do filtro. Parte do 'melhor_id' já materializado;
+    só os modelos cujo mais barato ficou fora da faixa de preço caem no groupby.
+    """
+    df_plot = df_filtrado[df_filtrado['id'].isin(stats_mercado['melhor_id'])]
+    faltando = ~df_filtrado['modelo_key'].isin(df_plot['modelo_key'])
+    if faltando.any():
+        resto = df_filtrado[faltando]
+        # observed=True: com 'modelo_key' categórica, só os modelos presentes no filtro
+        df_plot = pd.concat([df_plot, resto.loc[resto.groupby('modelo_key', observed=True)['custo_total'].idxmin()]])
+    return df_plot.copy().reset_index(drop=True)
 
-def media_geometrica(series):
-    arr = np.array(series)
-    arr = arr[arr > 0]
-    if len(arr) == 0: return 0
-    return np.exp(np.mean(np.log(arr)))
+def _testar_valores(serie, condicao):
+    """Avalia 'condicao' (sobre o texto em minúsculas) uma vez por valor distinto e espalha para as linhas."""
+    distintos = pd.Series(serie.dropna().unique())
+    aceitos = distintos[condicao(distintos.astype(str).str.lower()).to_numpy()]
+    return serie.isin(aceitos).to_numpy()
 
-def calcular_estatisticas_mercado(df_ativos):
-    return df_ativos.groupby('modelo_key')['custo_total'].agg(
-        Minimo='min', Maximo='max', MediaGeo=media_geometrica, Qtd='count'
-    ).reset_index()
\ No newline at end of file
+def legenda_detalhada(df):
+    """Legenda do gráfico por linha, vetorizada (np.select avalia as condições em ordem, como os ifs)."""
+    if 'priorizado' in df.columns:
+        priorizado = _testar_valores(df['priorizado'], lambda s: s.isin(['true', 'sim']))
+    else:
+        priorizado = np.zeros(len(df), dtype=bool)
+    estado = df['estado_detalhado']
+    condicoes = [
+        priorizado,
+        _testar_valores(estado, lambda s: s.str.contains('novo', regex=False)),
+        _testar_valores(estado, lambda s: s.str.contains('otimo|ótimo')),
+        _testar_valores(estado, lambda s: s.str.contains('semi', regex=False)),
+        _testar_valores(estado, lambda s: s.str.contains('nao|não')),
+    ]
+    legendas = ["⭐ PRIORIDADE", "Novo", "Ótimo Estado", "Semifuncional", "Não Funcional"]
+    return np.select(condicoes, legendas, default="Funcional")
\ No newline at end of file
@@ -1,37 +1,22 @@
-import sqlite3
-import os
+import atexit
+import threading
+from datetime import datetime
 from urllib.parse import urlparse, urlunparse
 
-DB_PATH = os.path.join("data", "historico_precos.db")
+from config import ESCRITOR_TAMANHO_LOTE, ESCRITOR_INTERVALO_FLUSH
+from conexao import obter_conexao, transacao
+from migracoes import aplicar_migracoes, versao_banco
+from indice_links import IndiceLinks
+
+_indice_links = None
+_escritor = None
+_escritor_lock = threading.Lock()
+_indice_lock = threading.Lock()
 
 def criar_tabela():
-    if not os.path.exists("data"):
-        os.makedirs("data")
-
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS precos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            data_consulta TEXT,
-            modelo TEXT,
-            termo_pesquisa TEXT,
-            preco REAL,
-            custo_reparo REAL DEFAULT 0,
-            condicao TEXT,
-            estado_detalhado TEXT, 
-            loja TEXT,
-            localizacao TEXT,
-            tem_envio INTEGER,
-            link TEXT,
-            ai_analise TEXT,
-            ativo INTEGER DEFAULT 1
-        )
-    ''')
-    conn.commit()
-    conn.close()
-    print("✅ Base de dados v3.1 (Com Verificação de Link) pronta.")
+    """Cria/atualiza o esquema via migrações versionadas (ver migracoes.py)."""
+    aplicar_migracoes()
+    print(f"✅ Base de dados pronta (esquema v{versao_banco()}).")
 
 def limpar_link(url):
     """Remove parâmetros de rastreamento (?tracking_id=...) para evitar duplicatas reais."""
@@ -54,55 +39,158 @@ def verificar_se_ja_existe(link_bruto):
     """Retorna True se este link já foi processado alguma vez na história."""
     if not link_bruto: return False
     
-    link_limpo = limpar_link(link_bruto)
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Verifica se existe o link exato no banco
-    # Dica: Se quiser reavaliar preços que mudaram, a lógica seria mais complexa.
-    # Por enquanto, focamos em "não analisar o mesmo anúncio duas vezes".
-    cursor.execute("SELECT id FROM precos WHERE link = ?", (link_limpo,))
-    resultado = cursor.fetchone()
-    conn.close()
-    
-    return resultado is not None
+    # Consulta o índice em memória (dict/Bloom), não o banco
+    return obter_indice_links().contem(limpar_link(link_bruto))
 
-def salvar_no_banco(dados):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    link_limpo = limpar_link(dados['link'])
-    
-    # Verificação dupla (para garantir que não salvamos duplicado no mesmo dia)
-    cursor.execute(
-        "SELECT id FROM precos WHERE link = ? AND data_consulta = ?", 
-        (link_limpo, dados['data'])
+def ultimo_registro(link_limpo):
+    """Última linha gravada do link (dict), para reaproveitar o veredito numa revisita."""
+    cursor = obter_conexao().execute('''
+        SELECT * FROM precos WHERE link = ? ORDER BY data_consulta DESC, id DESC LIMIT 1
+    ''', (link_limpo,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return dict(zip([col[0] for col in cursor.description], row))
+
+def atualizar_titulo(registro, titulo):
+    """Título novo (mudança cosmética, mesmo preço) no último registro do link, sem criar observação."""
+    obter_conexao().execute("UPDATE precos SET titulo = ? WHERE id = ?", (titulo, registro['id']))
+    obter_indice_links().adicionar(registro['link'], registro['preco'], titulo)
+
+def obter_indice_links():
+    """Índice de links do processo, carregado do banco na primeira chamada."""
+    global _indice_links
+    with _indice_lock:
+        if _indice_links is None:
+            _indice_links = IndiceLinks(obter_conexao, limpar_link).carregar()
+        return _indice_links
+
+def atualizar_indice_links():
+    """Traz os links gravados por outros workers desde a última consulta."""
+    return obter_indice_links().atualizar()
+
+SQL_UPSERT_PRECO = '''
+    INSERT INTO precos (
+        data_consulta, modelo, termo_pesquisa, preco, custo_reparo, condicao,
+        estado_detalhado, loja, localizacao, tem_envio, link, ai_analise, ativo,
+        titulo, site, first_seen, last_seen
+    )
+    VALUES (
+        ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+        COALESCE((SELECT MIN(first_seen) FROM precos WHERE link = ?), ?), ?
     )
-    if cursor.fetchone():
-        conn.close()
-        return
-
-    cursor.execute('''
-        INSERT INTO precos (
-            data_consulta, modelo, termo_pesquisa, preco, custo_reparo, condicao, 
-            estado_detalhado, loja, localizacao, tem_envio, link, ai_analise, ativo
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        dados['data'], 
+    ON CONFLICT (link, data_consulta) DO UPDATE SET
+        preco = excluded.preco,
+        custo_reparo = excluded.custo_reparo,
+        condicao = excluded.condicao,
+        estado_detalhado = excluded.estado_detalhado,
+        localizacao = excluded.localizacao,
+        tem_envio = excluded.tem_envio,
+        ai_analise = excluded.ai_analise,
+        titulo = COALESCE(excluded.titulo, precos.titulo),
+        last_seen = excluded.last_seen
+'''
+# 'ativo' vem de quem chama (padrão 1): preparar_item_ml grava 0 para 'nao_funcional' (o main.py já
+# calculava isso, mas o INSERT antigo sempre gravava 1) e a revisita herda o do último registro, então
+# um anúncio desativado no dashboard não volta ativo no dia seguinte.
+# 'ativo' fica de fora do UPDATE: uma desativação manual no dashboard não é desfeita.
+# Preço diferente no mesmo dia: o trigger da migração 010 guarda o anterior em 'historico_precos'.
+
+def _linha_preco(dados):
+    link_limpo = limpar_link(dados['link'])
+    agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return (
+        dados['data'],
         dados['modelo'],
         dados.get('termo_usado', ''),
         dados['preco'],
         dados.get('custo_reparo', 0),
         dados['condicao'],
         dados.get('estado_detalhado', 'N/A'),
-        dados['loja'], 
-        dados['localizacao'], 
-        1 if dados['tem_envio'] else 0, 
-        link_limpo, 
+        dados['loja'],
+        dados['localizacao'],
+        1 if dados['tem_envio'] else 0,
+        link_limpo,
         dados.get('ai_analise', ''),
-        1
-    ))
-    
-    conn.commit()
-    conn.close()
\ No newline at end of file
+        dados.get('ativo', 1),
+        dados.get('titulo'),
+        dados.get('site') or dados.get('loja'),
+        link_limpo, agora,  # first_seen: herda a primeira aparição do link, se já existir
+        agora
+    )
+
+class EscritorLote:
+    """
+    Acumula anúncios e grava com um único executemany numa transação
+    (quando o buffer enche, a cada 'intervalo' segundos, ou em descarregar()).
+    Duplicata do mesmo link no mesmo dia é resolvida pela restrição UNIQUE (upsert).
+    """
+
+    def __init__(self, tamanho=ESCRITOR_TAMANHO_LOTE, intervalo=ESCRITOR_INTERVALO_FLUSH):
+        self.tamanho = tamanho
+        self.intervalo = intervalo
+        self.gravados = 0
+        self._buffer = []
+        self._lock = threading.RLock()
+        self._parar = threading.Event()
+        self._timer = threading.Thread(target=self._loop_timer, name="escritor-db", daemon=True)
+        self._timer.start()
+
+    def adicionar(self, dados):
+        with self._lock:
+            self._buffer.append(_linha_preco(dados))
+            if len(self._buffer) >= self.tamanho:
+                self.descarregar()
+
+    def descarregar(self):
+        """Grava o buffer. Se falhar, as linhas continuam no buffer para a próxima tentativa."""
+        with self._lock:
+            if not self._buffer:
+                return 0
+            linhas = self._buffer
+            with transacao(imediata=True) as conn:
+                conn.executemany(SQL_UPSERT_PRECO, linhas)
+            self._buffer = []
+            self.gravados += len(linhas)
+
+        indice = obter_indice_links()
+        for linha in linhas:
+            indice.adicionar(linha[10], linha[3], linha[13])
+        return len(linhas)
+
+    def _loop_timer(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.descarregar()
+            except Exception as e:
+                print(f"⚠️ Erro ao gravar lote no banco (nova tentativa em {self.intervalo}s): {e}")
+
+    def pendentes(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def encerrar(self):
+        self._parar.set()
+        self.descarregar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.descarregar()
+
+def obter_escritor():
+    global _escritor
+    with _escritor_lock:
+        if _escritor is None:
+            _escritor = EscritorLote()
+            # Ctrl+C, sys.exit e fim normal: nada fica no buffer
+            atexit.register(_escritor.encerrar)
+        return _escritor
+
+def salvar_no_banco(dados):
+    """Enfileira no escritor em lote; use descarregar_banco() quando precisar da garantia de gravação."""
+    obter_escritor().adicionar(dados)
+
+def descarregar_banco():
+    return obter_escritor().descarregar()
@@ -0,0 +1,68 @@
+import time
+import random
+import threading
+from urllib.parse import urlparse
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+
+from config import (
+    TIMEOUT_PRONTIDAO, TIMEOUT_PRONTIDAO_PADRAO,
+    CORTESIA_ATIVA, CORTESIA_POR_HOST, CORTESIA_PADRAO
+)
+
+# --- PRONTIDÃO: volta assim que a lista de produtos existe no DOM ---
+def timeout_do_site(site):
+    return TIMEOUT_PRONTIDAO.get(site, TIMEOUT_PRONTIDAO_PADRAO)
+
+def aguardar_pronto(driver, seletores=None, texto=None, site=None):
+    """
+    Espera até algum dos seletores CSS (ou o texto) aparecer na página.
+    Retorna False no timeout: busca sem resultados também é resposta válida.
+    """
+    def pagina_pronta(drv):
+        for seletor in seletores or []:
+            if drv.find_elements(By.CSS_SELECTOR, seletor):
+                return True
+        if texto:
+            return drv.execute_script(
+                "return !!document.body && document.body.innerText.indexOf(arguments[0]) >= 0;", texto
+            )
+        return not seletores and drv.execute_script("return document.readyState") != "loading"
+
+    try:
+        WebDriverWait(driver, timeout_do_site(site), poll_frequency=0.25).until(pagina_pronta)
+        return True
+    except TimeoutException:
+        print(f"⌛ Página não ficou pronta em {timeout_do_site(site)}s.", end=" ")
+        return False
+
+# --- CORTESIA: jitter anti-bot separado da prontidão ---
+class PoliticaCortesia:
+    """Garante um intervalo mínimo (sorteado) entre requisições ao mesmo host."""
+
+    def __init__(self, intervalos=CORTESIA_POR_HOST, padrao=CORTESIA_PADRAO, ativa=CORTESIA_ATIVA):
+        self.intervalos = intervalos
+        self.padrao = padrao
+        self.ativa = ativa
+        self._proxima_liberacao = {}
+        self._lock = threading.Lock()
+
+    def aguardar_vez(self, url):
+        if not self.ativa:
+            return 0
+        host = urlparse(url).netloc
+        minimo, maximo = self.intervalos.get(host, self.padrao)
+
+        # Reserva o horário sob lock; o sono acontece fora dele (outros hosts não esperam)
+        with self._lock:
+            agora = time.time()
+            liberacao = max(agora, self._proxima_liberacao.get(host, 0))
+            self._proxima_liberacao[host] = liberacao + random.uniform(minimo, maximo)
+
+        espera = liberacao - agora
+        if espera > 0:
+            time.sleep(espera)
+        return espera
+
+CORTESIA = PoliticaCortesia()
@@ -0,0 +1,109 @@
+import threading
+import requests
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+
+from browser_pool import emprestar_driver, navegar
+from esperas import aguardar_pronto, CORTESIA
+from config import TIMEOUT_HTTP, LIMITE_CONEXOES_POR_HOST, USER_AGENT
+
+# Modos de busca que cada scraper pode declarar como preferido
+MODO_HTTP = "http"            # Tenta HTTP simples; só abre o Chrome se a resposta não servir
+MODO_NAVEGADOR = "navegador"  # Vai direto ao Chrome (sites que só renderizam via JS)
+
+HEADERS_PADRAO = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+# Sinais de página de bloqueio / desafio anti-bot
+SINAIS_BLOQUEIO = [
+    "captcha", "account-verification", "are you a robot", "não sou um robô",
+    "access denied", "acesso negado", "cf-challenge", "challenge-platform",
+]
+
+# Abaixo disto o HTML é quase certamente um "shell" vazio montado por JavaScript
+TAMANHO_MINIMO_HTML = 2000
+
+ESTATISTICAS_FETCH = {"http": 0, "navegador": 0, "escalados": 0}
+
+_sessao = None
+_sessao_lock = threading.Lock()
+_semaforos_host = {}
+
+def obter_sessao():
+    """Sessão única com pool keep-alive por host (evita novo handshake TLS a cada página)."""
+    global _sessao
+    with _sessao_lock:
+        if _sessao is None:
+            _sessao = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=10, pool_maxsize=LIMITE_CONEXOES_POR_HOST)
+            _sessao.mount("https://", adaptador)
+            _sessao.mount("http://", adaptador)
+            _sessao.headers.update(HEADERS_PADRAO)
+        return _sessao
+
+def semaforo_host(url):
+    host = urlparse(url).netloc
+    with _sessao_lock:
+        if host not in _semaforos_host:
+            _semaforos_host[host] = threading.BoundedSemaphore(LIMITE_CONEXOES_POR_HOST)
+        return _semaforos_host[host]
+
+def resposta_inutil(status, html, marcadores=None):
+    """True se o HTML parece bloqueio, desafio anti-bot ou página que depende de JS."""
+    if status in (403, 429, 503):
+        return True
+    if not html or len(html) < TAMANHO_MINIMO_HTML:
+        return True
+
+    html_lower = html.lower()
+    if any(sinal in html_lower for sinal in SINAIS_BLOQUEIO):
+        return True
+
+    # Se o scraper disse o que espera ver (ex: classe da lista de produtos) e não veio, é shell JS
+    if marcadores and not any(m in html for m in marcadores):
+        return True
+    return False
+
+def buscar_http(url, marcadores=None):
+    """Retorna o HTML ou None quando for preciso escalar para o navegador."""
+    try:
+        with semaforo_host(url):
+            resposta = obter_sessao().get(url, timeout=TIMEOUT_HTTP)
+    except requests.RequestException as e:
+        print(f"⚠️ HTTP falhou ({e.__class__.__name__}).", end=" ")
+        return None
+
+    if resposta_inutil(resposta.status_code, resposta.text, marcadores):
+        return None
+    return resposta.text
+
+def buscar_navegador(url, seletores=None, texto=None, site=None):
+    with emprestar_driver() as driver:
+        navegar(driver, url)
+        aguardar_pronto(driver, seletores=seletores, texto=texto, site=site)
+        return driver.page_source
+
+def obter_html(url, modo=MODO_HTTP, marcadores=None, seletores=None, texto=None, site=None):
+    """
+    Camada única de busca de páginas.
+    No MODO_HTTP tenta primeiro um GET simples (centenas de ms) e só escala para
+    o Chrome do pool quando a resposta parece bloqueio ou shell JavaScript.
+    No navegador, volta assim que 'seletores' (ou 'texto') aparecem, com timeout por 'site'.
+    """
+    CORTESIA.aguardar_vez(url)
+
+    if modo == MODO_HTTP:
+        html = buscar_http(url, marcadores)
+        if html is not None:
+            ESTATISTICAS_FETCH["http"] += 1
+            return html
+        ESTATISTICAS_FETCH["escalados"] += 1
+        print("↪️ Escalando para o navegador...", end=" ")
+
+    html = buscar_navegador(url, seletores=seletores, texto=texto, site=site)
+    ESTATISTICAS_FETCH["navegador"] += 1
+    return html
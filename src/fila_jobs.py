@@ -0,0 +1,162 @@
+import os
+import time
+import socket
+import sqlite3
+import threading
+
+from config import DURACAO_LEASE_JOB, INTERVALO_REFRESH_JOB, JANELA_STATS_WORKERS
+from conexao import obter_conexao as conectar, transacao
+
+def gerar_id_worker():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def criar_tabelas_jobs():
+    conn = conectar()
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            modelo TEXT NOT NULL,
+            fonte TEXT NOT NULL,
+            score REAL,
+            status TEXT DEFAULT 'pendente',
+            disponivel_em REAL DEFAULT 0,
+            lease_ate REAL,
+            worker TEXT,
+            tentativas INTEGER DEFAULT 0,
+            ultima_execucao REAL,
+            ultimo_erro TEXT,
+            UNIQUE (modelo, fonte)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS stats_workers (
+            worker TEXT,
+            chave TEXT,
+            valor INTEGER,
+            atualizado_em REAL,
+            PRIMARY KEY (worker, chave)
+        )
+    ''')
+
+def sincronizar_jobs(modelos_info, fontes):
+    """Garante um job por (modelo, fonte) do catálogo; remove os que saíram (se não estiverem em uso)."""
+    with transacao(imediata=True) as conn:
+        chaves = set()
+        for info in modelos_info:
+            for fonte in fontes:
+                chaves.add((info['modelo'], fonte))
+                conn.execute('''
+                    INSERT INTO jobs (modelo, fonte, score) VALUES (?, ?, ?)
+                    ON CONFLICT (modelo, fonte) DO UPDATE SET score = excluded.score
+                ''', (info['modelo'], fonte, info.get('score_geral')))
+
+        existentes = conn.execute("SELECT id, modelo, fonte, status FROM jobs").fetchall()
+        for job_id, modelo, fonte, status in existentes:
+            if (modelo, fonte) not in chaves and status != 'em_execucao':
+                conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+def reivindicar_job(worker_id, duracao_lease=DURACAO_LEASE_JOB):
+    """
+    Pega atomicamente o próximo job disponível: pendente e fora do intervalo de refresh,
+    ou 'em_execucao' com lease vencido (o worker que o tinha morreu).
+    """
+    agora = time.time()
+    # Trava de escrita desde o BEGIN: dois workers não pegam o mesmo job
+    with transacao(imediata=True) as conn:
+        row = conn.execute('''
+            SELECT id, modelo, fonte, score, tentativas FROM jobs
+            WHERE (status = 'pendente' AND disponivel_em <= ?)
+               OR (status = 'em_execucao' AND lease_ate < ?)
+            ORDER BY disponivel_em, RANDOM()
+            LIMIT 1
+        ''', (agora, agora)).fetchone()
+
+        if not row:
+            return None
+
+        conn.execute('''
+            UPDATE jobs SET status = 'em_execucao', lease_ate = ?, worker = ?, tentativas = tentativas + 1
+            WHERE id = ?
+        ''', (agora + duracao_lease, worker_id, row[0]))
+    return {"id": row[0], "modelo": row[1], "fonte": row[2], "score_geral": row[3], "tentativas": row[4] + 1}
+
+def renovar_lease(job_id, worker_id, duracao_lease=DURACAO_LEASE_JOB):
+    """Retorna False se o lease foi perdido (expirou e outro worker assumiu o job)."""
+    conn = conectar()
+    cursor = conn.execute('''
+        UPDATE jobs SET lease_ate = ? WHERE id = ? AND worker = ? AND status = 'em_execucao'
+    ''', (time.time() + duracao_lease, job_id, worker_id))
+    return cursor.rowcount == 1
+
+def concluir_job(job_id, worker_id, fonte):
+    agora = time.time()
+    conn = conectar()
+    conn.execute('''
+        UPDATE jobs SET status = 'pendente', disponivel_em = ?, lease_ate = NULL, worker = NULL,
+                        tentativas = 0, ultima_execucao = ?, ultimo_erro = NULL
+        WHERE id = ? AND worker = ?
+    ''', (agora + INTERVALO_REFRESH_JOB.get(fonte, 3600), agora, job_id, worker_id))
+
+def falhar_job(job_id, worker_id, erro, tentativas):
+    """Devolve o job à fila com backoff exponencial (1 min, 2 min, 4 min... até 1 h)."""
+    atraso = min(60 * (2 ** max(tentativas - 1, 0)), 3600)
+    conn = conectar()
+    conn.execute('''
+        UPDATE jobs SET status = 'pendente', disponivel_em = ?, lease_ate = NULL, worker = NULL,
+                        ultimo_erro = ?
+        WHERE id = ? AND worker = ?
+    ''', (time.time() + atraso, str(erro)[:200], job_id, worker_id))
+
+class RenovadorLease:
+    """Thread que mantém o lease vivo enquanto o job está sendo raspado, validado e gravado."""
+
+    def __init__(self, job, worker_id, duracao_lease=DURACAO_LEASE_JOB):
+        self.job = job
+        self.worker_id = worker_id
+        self.duracao_lease = duracao_lease
+        self.perdido = False
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def _loop(self):
+        while not self._parar.wait(self.duracao_lease / 3):
+            try:
+                if not renovar_lease(self.job['id'], self.worker_id, self.duracao_lease):
+                    self.perdido = True
+                    print(f"⚠️ Lease perdido: {self.job['modelo']} / {self.job['fonte']}")
+                    return
+            except sqlite3.Error as e:
+                print(f"⚠️ Erro ao renovar lease: {e}")
+
+    def iniciar(self):
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+
+# --- STATS ENTRE WORKERS ---
+def publicar_stats(worker_id, stats):
+    agora = time.time()
+    with transacao(imediata=True) as conn:
+        conn.executemany('''
+            INSERT INTO stats_workers (worker, chave, valor, atualizado_em) VALUES (?, ?, ?, ?)
+            ON CONFLICT (worker, chave) DO UPDATE SET valor = excluded.valor, atualizado_em = excluded.atualizado_em
+        ''', [(worker_id, chave, valor, agora) for chave, valor in stats.items()])
+
+def stats_agregados(janela=JANELA_STATS_WORKERS):
+    conn = conectar()
+    rows = conn.execute('''
+        SELECT chave, SUM(valor) FROM stats_workers WHERE atualizado_em >= ? GROUP BY chave
+    ''', (time.time() - janela,)).fetchall()
+    n_workers = conn.execute('''
+        SELECT COUNT(DISTINCT worker) FROM stats_workers WHERE atualizado_em >= ?
+    ''', (time.time() - janela,)).fetchone()[0]
+    agregado = dict(rows)
+    agregado['workers'] = n_workers
+    return agregado
+
+def resumo_fila():
+    conn = conectar()
+    rows = conn.execute("SELECT fonte, status, COUNT(*) FROM jobs GROUP BY fonte, status").fetchall()
+    return rows
@@ -0,0 +1,152 @@
+import sys
+import zlib
+import math
+import hashlib
+import threading
+
+from cache_ia import normalizar_titulo
+from config import INDICE_LINKS_LIMITE_EXATO, INDICE_LINKS_TAXA_FALSO_POSITIVO
+
+def assinatura_titulo(titulo):
+    """crc32 do título normalizado; 0 = título desconhecido (registros antigos)."""
+    if not titulo:
+        return 0
+    return zlib.crc32(normalizar_titulo(titulo).encode('utf-8')) or 1
+
+def _empacotar(preco, titulo):
+    # Um único int por link (centavos << 32 | assinatura): ~3x menos memória que uma tupla
+    centavos = int(round((preco or 0) * 100))
+    return (centavos << 32) | assinatura_titulo(titulo)
+
+def _desempacotar(valor):
+    return (valor >> 32) / 100, valor & 0xFFFFFFFF
+
+class FiltroBloom:
+    """Conjunto probabilístico: 'não está' é certeza; 'talvez esteja' precisa de confirmação."""
+
+    def __init__(self, capacidade, taxa_falso_positivo):
+        capacidade = max(capacidade, 1000)
+        self.num_bits = int(-capacidade * math.log(taxa_falso_positivo) / (math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacidade * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _posicoes(self, texto):
+        # Double hashing (Kirsch-Mitzenmacher): k posições a partir de um único digest
+        digest = hashlib.blake2b(texto.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def adicionar(self, texto):
+        for pos in self._posicoes(texto):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, texto):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._posicoes(texto))
+
+class IndiceLinks:
+    """
+    Links já gravados em 'precos', em memória, para a checagem de duplicados sem ir ao banco.
+    Até 'limite_exato' links usa um dict (exato) com a última observação de cada link
+    (preço + assinatura do título); acima disso, um filtro de Bloom e só os "talvez"
+    são confirmados (e a observação lida) no SQLite.
+    """
+
+    def __init__(self, conectar, normalizar, limite_exato=INDICE_LINKS_LIMITE_EXATO,
+                 taxa_falso_positivo=INDICE_LINKS_TAXA_FALSO_POSITIVO):
+        self.conectar = conectar
+        self.normalizar = normalizar
+        self.limite_exato = limite_exato
+        self.taxa_falso_positivo = taxa_falso_positivo
+        self.observacoes = {}
+        self.bloom = None
+        self.ultimo_id = 0
+        self.total = 0
+        self.confirmacoes_banco = 0
+        self._lock = threading.Lock()
+
+    def carregar(self):
+        conn = self.conectar()
+        total = conn.execute("SELECT COUNT(*) FROM precos").fetchone()[0]
+        with self._lock:
+            self.observacoes = {}
+            self.bloom = None
+            if total > self.limite_exato:
+                # Folga de 2x para o histórico crescer sem estourar a taxa de falso positivo
+                self.bloom = FiltroBloom(total * 2, self.taxa_falso_positivo)
+            self.ultimo_id = 0
+            self.total = 0
+        self.atualizar()
+        return self
+
+    def atualizar(self):
+        """Traz só as linhas novas (id > último visto): gravações de outros workers no mesmo banco."""
+        with self._lock:
+            rows = self.conectar().execute(
+                "SELECT id, link, preco, titulo FROM precos WHERE id > ? ORDER BY id", (self.ultimo_id,)
+            ).fetchall()
+            # Em ordem de id: a observação mais recente de cada link sobrescreve as anteriores
+            for id_linha, link, preco, titulo in rows:
+                # O que o salvar_no_banco gravou já está limpo; só renormaliza o histórico antigo
+                if link and ('?' in link or '#' in link):
+                    link = self.normalizar(link)
+                self._adicionar(link, preco, titulo)
+            if rows:
+                self.ultimo_id = rows[-1][0]
+        return len(rows)
+
+    def _adicionar(self, link, preco=None, titulo=None):
+        if not link:
+            return
+        if self.bloom is not None:
+            self.bloom.adicionar(link)
+            self.total += 1
+            return
+        if link not in self.observacoes:
+            self.total += 1
+        self.observacoes[link] = _empacotar(preco, titulo)
+
+    def adicionar(self, link_limpo, preco=None, titulo=None):
+        """Chamado a cada gravação em 'precos' (o link já vem normalizado)."""
+        with self._lock:
+            self._adicionar(link_limpo, preco, titulo)
+
+    def contem(self, link_limpo):
+        if not link_limpo:
+            return False
+        if self.bloom is None:
+            return link_limpo in self.observacoes
+        if link_limpo not in self.bloom:
+            return False
+        self.confirmacoes_banco += 1
+        row = self.conectar().execute("SELECT 1 FROM precos WHERE link = ? LIMIT 1", (link_limpo,)).fetchone()
+        return row is not None
+
+    def ultima_observacao(self, link_limpo):
+        """(preço, assinatura do título) do último registro do link, ou None se nunca visto."""
+        if not link_limpo:
+            return None
+        if self.bloom is None:
+            valor = self.observacoes.get(link_limpo)
+            return _desempacotar(valor) if valor is not None else None
+        if link_limpo not in self.bloom:
+            return None
+        self.confirmacoes_banco += 1
+        row = self.conectar().execute('''
+            SELECT preco, titulo FROM precos WHERE link = ? ORDER BY data_consulta DESC, id DESC LIMIT 1
+        ''', (link_limpo,)).fetchone()
+        return _desempacotar(_empacotar(*row)) if row else None
+
+    def memoria_bytes(self):
+        if self.bloom is not None:
+            return sys.getsizeof(self.bloom.bits)
+        return sys.getsizeof(self.observacoes) + sum(
+            sys.getsizeof(link) + sys.getsizeof(valor) for link, valor in self.observacoes.items()
+        )
+
+    def resumo(self):
+        tipo = "Bloom" if self.bloom is not None else "set exato"
+        return (
+            f"🔗 Índice de links: {self.total} links ({tipo}) | "
+            f"{self.memoria_bytes() / 1024 / 1024:.1f} MB | {self.confirmacoes_banco} confirmações no banco"
+        )
@@ -0,0 +1,240 @@
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import threading
+from concurrent.futures import Future
+
+from config import (
+    LLM_BACKEND, LLM_REQUISICOES_POR_MINUTO, LLM_RAJADA, LLM_MAX_EM_VOO,
+    LLM_MAX_TENTATIVAS, LLM_BACKOFF_BASE, LLM_BACKOFF_MAXIMO
+)
+
+class ErroLLM(Exception):
+    """Falha definitiva (após as tentativas). 'transitorio' indica cota/servidor, não resposta ruim."""
+
+    def __init__(self, mensagem, transitorio=False):
+        super().__init__(mensagem)
+        self.transitorio = transitorio
+
+# --- BACKENDS ---
+class BackendGemini:
+    def __init__(self):
+        from google import genai
+        from google.genai import types
+        from dotenv import load_dotenv
+
+        # Carrega a chave segura do arquivo .env
+        load_dotenv()
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("⚠️ ERRO: Chave API não encontrada no arquivo .env")
+
+        self._types = types
+        # A biblioteca nova usa um 'Client' centralizado
+        self.client = genai.Client(api_key=api_key)
+
+    def gerar(self, modelo, prompt, temperatura):
+        response = self.client.models.generate_content(
+            model=modelo,
+            contents=prompt,
+            config=self._types.GenerateContentConfig(
+                temperature=temperatura,
+                response_mime_type='application/json'  # Garante que volta JSON puro
+            )
+        )
+        uso = getattr(response, 'usage_metadata', None)
+        tokens_entrada = getattr(uso, 'prompt_token_count', 0) or 0
+        tokens_saida = getattr(uso, 'candidates_token_count', 0) or 0
+        return response.text, tokens_entrada, tokens_saida
+
+    @staticmethod
+    def codigo_erro(erro):
+        """Código HTTP do erro da API (429, 503...) ou None."""
+        codigo = getattr(erro, 'code', None) or getattr(erro, 'status_code', None)
+        return codigo if isinstance(codigo, int) else None
+
+class BackendFalso:
+    """
+    Modelo local determinístico: responde JSON plausível para os prompts do projeto.
+    Serve para testes e benchmarks sem gastar cota (LLM_BACKEND=falso).
+    """
+
+    def __init__(self, latencia=0.05, responder=None):
+        self.latencia = latencia
+        self.responder = responder or self._resposta_padrao
+
+    @staticmethod
+    def _resposta_padrao(prompt):
+        veredito = {"eh_o_piano_real": True, "estado": "funcional", "custo_reparo_estimado": 0, "motivo": "Resposta do backend falso"}
+        if '"indice"' in prompt:
+            indices = re.findall(r'^\s*(\d+)\. ', prompt, re.MULTILINE)
+            return json.dumps([{"indice": int(i), **veredito} for i in indices])
+        if 'score_geral' in prompt:
+            return json.dumps({"modelo": "FALSO", "mecanica": 50, "som_polifonia": 50, "customizacao": 50,
+                               "score_geral": 50.0, "justificativa": "Backend falso", "veredito": "-", "priorizado": False})
+        return json.dumps(veredito)
+
+    def gerar(self, modelo, prompt, temperatura):
+        time.sleep(self.latencia)
+        return self.responder(prompt), len(prompt) // 4, 50
+
+    @staticmethod
+    def codigo_erro(erro):
+        return getattr(erro, 'code', None)
+
+def criar_backend(nome=LLM_BACKEND):
+    if nome == "falso":
+        return BackendFalso()
+    return BackendGemini()
+
+# --- LIMITADOR DE COTA ---
+class TokenBucket:
+    """Libera 'taxa_por_segundo' fichas, acumulando no máximo 'capacidade' (rajada)."""
+
+    def __init__(self, taxa_por_segundo, capacidade):
+        self.taxa = taxa_por_segundo
+        self.capacidade = capacidade
+        self.fichas = capacidade
+        self.atualizado_em = time.monotonic()
+        self._lock = threading.Lock()
+
+    def adquirir(self):
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self.fichas = min(self.capacidade, self.fichas + (agora - self.atualizado_em) * self.taxa)
+                self.atualizado_em = agora
+                if self.fichas >= 1:
+                    self.fichas -= 1
+                    return
+                espera = (1 - self.fichas) / self.taxa
+            time.sleep(espera)
+
+# --- GATEWAY ---
+class GatewayLLM:
+    """
+    Ponto único de saída para o LLM: cota (token bucket), limite de requisições em voo,
+    backoff exponencial em 429/5xx, coalescência de prompts idênticos em voo e contabilidade.
+    """
+
+    def __init__(self, backend=None, rpm=LLM_REQUISICOES_POR_MINUTO, rajada=LLM_RAJADA,
+                 max_em_voo=LLM_MAX_EM_VOO, max_tentativas=LLM_MAX_TENTATIVAS):
+        self.backend = backend if backend is not None else criar_backend()
+        self.bucket = TokenBucket(rpm / 60.0, rajada)
+        self.semaforo = threading.BoundedSemaphore(max_em_voo)
+        self.max_tentativas = max_tentativas
+        self._em_voo = {}
+        self._lock = threading.Lock()
+        self.uso = {}
+
+    def _contabilizar(self, modelo, **valores):
+        with self._lock:
+            uso = self.uso.setdefault(modelo, {
+                "chamadas": 0, "erros": 0, "retentativas": 0, "coalescidas": 0,
+                "latencia_total": 0.0, "latencia_max": 0.0, "tokens_entrada": 0, "tokens_saida": 0
+            })
+            for chave, valor in valores.items():
+                if chave == "latencia_max":
+                    uso[chave] = max(uso[chave], valor)
+                else:
+                    uso[chave] += valor
+
+    def _eh_transitorio(self, erro):
+        codigo = self.backend.codigo_erro(erro)
+        if codigo is not None:
+            return codigo == 429 or codigo >= 500
+        # Sem código HTTP: falhas de rede/timeout (inclusive as do httpx) também valem nova tentativa
+        nome = erro.__class__.__name__
+        return isinstance(erro, (ConnectionError, TimeoutError, OSError)) or "Timeout" in nome or "Connect" in nome
+
+    def _chamar(self, modelo, prompt, temperatura):
+        for tentativa in range(1, self.max_tentativas + 1):
+            self.bucket.adquirir()
+            inicio = time.monotonic()
+            try:
+                with self.semaforo:
+                    texto, tokens_entrada, tokens_saida = self.backend.gerar(modelo, prompt, temperatura)
+            except Exception as e:
+                if not self._eh_transitorio(e):
+                    self._contabilizar(modelo, erros=1)
+                    raise ErroLLM(str(e)) from e
+                if tentativa == self.max_tentativas:
+                    self._contabilizar(modelo, erros=1)
+                    raise ErroLLM(f"Desistindo após {tentativa} tentativas: {e}", transitorio=True) from e
+
+                espera = min(LLM_BACKOFF_MAXIMO, LLM_BACKOFF_BASE * 2 ** (tentativa - 1)) * random.uniform(0.5, 1.0)
+                print(f"⏳ LLM ocupado ({self.backend.codigo_erro(e) or e.__class__.__name__}). Nova tentativa em {espera:.1f}s...")
+                self._contabilizar(modelo, retentativas=1)
+                time.sleep(espera)
+                continue
+
+            latencia = time.monotonic() - inicio
+            self._contabilizar(
+                modelo, chamadas=1, latencia_total=latencia, latencia_max=latencia,
+                tokens_entrada=tokens_entrada, tokens_saida=tokens_saida
+            )
+            return texto
+
+    def gerar(self, modelo, prompt, temperatura=0.1):
+        """Texto da resposta. Prompts idênticos já em voo esperam a mesma resposta (uma só chamada)."""
+        chave = hashlib.sha1(f"{modelo}|{temperatura}|{prompt}".encode('utf-8')).hexdigest()
+        with self._lock:
+            futuro = self._em_voo.get(chave)
+            dono = futuro is None
+            if dono:
+                futuro = Future()
+                self._em_voo[chave] = futuro
+
+        if not dono:
+            self._contabilizar(modelo, coalescidas=1)
+            return futuro.result()
+
+        try:
+            texto = self._chamar(modelo, prompt, temperatura)
+            futuro.set_result(texto)
+            return texto
+        except Exception as e:
+            futuro.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._em_voo.pop(chave, None)
+
+    def gerar_json(self, modelo, prompt, temperatura=0.1):
+        texto = self.gerar(modelo, prompt, temperatura)
+        try:
+            return json.loads(texto)
+        except (TypeError, ValueError) as e:
+            raise ErroLLM(f"JSON inválido do LLM: {str(texto)[:80]}") from e
+
+    def resumo_uso(self):
+        linhas = []
+        with self._lock:
+            for modelo, uso in self.uso.items():
+                media = uso['latencia_total'] / uso['chamadas'] if uso['chamadas'] else 0
+                linhas.append(
+                    f"🤖 {modelo}: {uso['chamadas']} chamadas | {uso['coalescidas']} coalescidas | "
+                    f"{uso['retentativas']} retentativas | {uso['erros']} erros | "
+                    f"{media:.2f}s média (máx {uso['latencia_max']:.2f}s) | "
+                    f"tokens {uso['tokens_entrada']}→{uso['tokens_saida']}"
+                )
+        return "\n".join(linhas)
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+def obter_gateway():
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = GatewayLLM()
+        return _gateway
+
+def definir_gateway(gateway):
+    """Troca o gateway global (ex: GatewayLLM(backend=BackendFalso()) em testes e benchmarks)."""
+    global _gateway
+    with _gateway_lock:
+        _gateway = gateway
@@ -0,0 +1,423 @@
+"""
+Migrações versionadas do banco (tabela 'precos').
+
+Cada migração roda uma única vez, em ordem, dentro de uma transação junto com o registro
+da sua versão em 'schema_versao'. Todas são idempotentes (checam antes de alterar), então
+um banco criado por versões antigas do scout converge para o mesmo esquema.
+
+Uso (na raiz do projeto):
+    python src/migracoes.py   # aplica as pendentes e mostra a versão
+"""
+import time
+
+from conexao import obter_conexao, transacao
+
+def _colunas(conn, tabela):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({tabela})")}
+
+def _adicionar_coluna(conn, tabela, coluna, definicao):
+    if coluna not in _colunas(conn, tabela):
+        conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}")
+
+def _existe_indice(conn, nome):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (nome,)).fetchone() is not None
+
+# --- MIGRAÇÕES ---
+def m001_tabela_precos(conn):
+    """Esquema original (v3.1)."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS precos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data_consulta TEXT,
+            modelo TEXT,
+            termo_pesquisa TEXT,
+            preco REAL,
+            custo_reparo REAL DEFAULT 0,
+            condicao TEXT,
+            estado_detalhado TEXT,
+            loja TEXT,
+            localizacao TEXT,
+            tem_envio INTEGER,
+            link TEXT,
+            ai_analise TEXT,
+            ativo INTEGER DEFAULT 1
+        )
+    ''')
+
+def m002_indices_e_unicidade(conn):
+    """
+    Um registro por anúncio por dia (UNIQUE), mais os índices de modelo e ativo.
+    Os duplicados que impedem o UNIQUE (fica o mais antigo) são copiados para
+    'precos_duplicados_removidos' antes de sair de 'precos'.
+    """
+    if not _existe_indice(conn, 'uq_precos_link_data'):
+        duplicados = '''
+            link IS NOT NULL AND data_consulta IS NOT NULL AND id NOT IN (
+                SELECT MIN(id) FROM precos
+                WHERE link IS NOT NULL AND data_consulta IS NOT NULL
+                GROUP BY link, data_consulta
+            )
+        '''
+        qtd = conn.execute(f"SELECT COUNT(*) FROM precos WHERE {duplicados}").fetchone()[0]
+        if qtd:
+            conn.execute("CREATE TABLE IF NOT EXISTS precos_duplicados_removidos AS SELECT * FROM precos WHERE 0")
+            conn.execute(f"INSERT INTO precos_duplicados_removidos SELECT * FROM precos WHERE {duplicados}")
+            conn.execute(f"DELETE FROM precos WHERE {duplicados}")
+            print(f"🧹 {qtd} registros duplicados (mesmo link no mesmo dia) removidos; cópia em 'precos_duplicados_removidos'.")
+    # O índice composto também atende 'WHERE link = ?' (prefixo)
+    conn.execute("DROP INDEX IF EXISTS idx_precos_link_data")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_precos_link_data ON precos (link, data_consulta)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_precos_modelo ON precos (modelo)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_precos_ativo ON precos (ativo)")
+
+def m003_titulo_e_site(conn):
+    """Título do anúncio (re-análise sem raspar de novo) e site de origem."""
+    _adicionar_coluna(conn, 'precos', 'titulo', 'TEXT')
+    _adicionar_coluna(conn, 'precos', 'site', 'TEXT')
+    # O título dos registros antigos se perdeu; o site é a própria loja
+    conn.execute("UPDATE precos SET site = loja WHERE site IS NULL")
+
+def m004_first_seen_last_seen(conn):
+    """Primeira vez que o link apareceu e última vez que este registro foi observado."""
+    _adicionar_coluna(conn, 'precos', 'first_seen', 'TEXT')
+    _adicionar_coluna(conn, 'precos', 'last_seen', 'TEXT')
+    conn.execute('''
+        UPDATE precos SET first_seen = (
+            SELECT MIN(p.data_consulta) FROM precos p WHERE p.link = precos.link
+        )
+        WHERE first_seen IS NULL AND link IS NOT NULL
+    ''')
+    conn.execute("UPDATE precos SET first_seen = data_consulta WHERE first_seen IS NULL")
+    conn.execute("UPDATE precos SET last_seen = data_consulta WHERE last_seen IS NULL")
+
+def m005_verificado(conn):
+    """Coluna que o dashboard já exibe ('Verif.')."""
+    _adicionar_coluna(conn, 'precos', 'verificado', 'INTEGER DEFAULT 0')
+    conn.execute("UPDATE precos SET verificado = 0 WHERE verificado IS NULL")
+
+def m006_atualizado_em(conn):
+    """Marca de alteração por linha: o dashboard recarrega só o que mudou desde a última leitura."""
+    _adicionar_coluna(conn, 'precos', 'atualizado_em', 'REAL')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_precos_atualizado_em ON precos (atualizado_em)")
+    # Epoch em segundos (com fração); o WHEN evita o trigger reagir ao próprio UPDATE
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_precos_atualizado_em AFTER UPDATE ON precos
+        FOR EACH ROW WHEN NEW.atualizado_em IS OLD.atualizado_em
+        BEGIN
+            UPDATE precos SET atualizado_em = (julianday('now') - 2440587.5) * 86400.0 WHERE id = NEW.id;
+        END
+    ''')
+
+# Chave e custo de um anúncio, como o dashboard calcula ('modelo_key' e 'custo_total')
+_CHAVE = "UPPER(TRIM({linha}.modelo))"
+_CUSTO = "({linha}.preco + COALESCE({linha}.custo_reparo, 0))"
+
+def _sql_recalcular_resumo(chave):
+    """Recalcula do zero o resumo de um modelo (usado em UPDATE/DELETE, quando min/max podem ter saído)."""
+    return f'''
+        DELETE FROM resumo_modelos WHERE modelo_key = {chave};
+        INSERT INTO resumo_modelos (modelo_key, qtd, minimo, maximo, soma_log, qtd_log, melhor_id)
+        SELECT {chave}, COUNT(*), MIN(c), MAX(c),
+               COALESCE(SUM(CASE WHEN c > 0 THEN ln(c) END), 0), SUM(c > 0),
+               (SELECT p.id FROM precos p
+                WHERE UPPER(TRIM(p.modelo)) = {chave} AND p.ativo = 1 AND p.preco IS NOT NULL
+                ORDER BY p.preco + COALESCE(p.custo_reparo, 0), p.id LIMIT 1)
+        FROM (
+            SELECT {_CUSTO.format(linha='p')} AS c FROM precos p
+            WHERE UPPER(TRIM(p.modelo)) = {chave} AND p.ativo = 1 AND p.preco IS NOT NULL
+        )
+        GROUP BY 1;
+    '''
+
+def m007_resumo_modelos(conn):
+    """
+    Resumo de mercado por modelo (anúncios ativos), mantido por triggers a cada gravação:
+    o dashboard lê ~uma linha por modelo em vez de agregar o histórico inteiro.
+    Média geométrica = exp(soma_log / qtd_log).
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS resumo_modelos (
+            modelo_key TEXT PRIMARY KEY,
+            qtd INTEGER,
+            minimo REAL,
+            maximo REAL,
+            soma_log REAL,
+            qtd_log INTEGER,
+            melhor_id INTEGER
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_precos_modelo_key ON precos (UPPER(TRIM(modelo)), ativo)")
+
+    novo = _CUSTO.format(linha='NEW')
+    # INSERT (o caso comum, inclusive em lote): atualização incremental O(1)
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_resumo_modelos_insert AFTER INSERT ON precos
+        FOR EACH ROW WHEN NEW.ativo = 1 AND NEW.preco IS NOT NULL
+        BEGIN
+            INSERT INTO resumo_modelos (modelo_key, qtd, minimo, maximo, soma_log, qtd_log, melhor_id)
+            VALUES (
+                {_CHAVE.format(linha='NEW')}, 1, {novo}, {novo},
+                CASE WHEN {novo} > 0 THEN ln({novo}) ELSE 0 END, {novo} > 0, NEW.id
+            )
+            ON CONFLICT (modelo_key) DO UPDATE SET
+                qtd = qtd + 1,
+                melhor_id = CASE WHEN excluded.minimo < minimo THEN excluded.melhor_id ELSE melhor_id END,
+                minimo = MIN(minimo, excluded.minimo),
+                maximo = MAX(maximo, excluded.maximo),
+                soma_log = soma_log + excluded.soma_log,
+                qtd_log = qtd_log + excluded.qtd_log;
+        END
+    ''')
+    # UPDATE/DELETE: o mínimo/máximo pode ter saído, recalcula o(s) modelo(s) afetado(s)
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_resumo_modelos_update
+        AFTER UPDATE OF preco, custo_reparo, ativo, modelo ON precos
+        FOR EACH ROW
+        BEGIN
+            {_sql_recalcular_resumo(_CHAVE.format(linha='OLD'))}
+            {_sql_recalcular_resumo(_CHAVE.format(linha='NEW'))}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_resumo_modelos_delete AFTER DELETE ON precos
+        FOR EACH ROW
+        BEGIN
+            {_sql_recalcular_resumo(_CHAVE.format(linha='OLD'))}
+        END
+    ''')
+
+    # Carga inicial a partir do histórico
+    conn.execute("DELETE FROM resumo_modelos")
+    conn.execute(f'''
+        INSERT INTO resumo_modelos (modelo_key, qtd, minimo, maximo, soma_log, qtd_log, melhor_id)
+        SELECT chave, COUNT(*), MIN(c), MAX(c), COALESCE(SUM(CASE WHEN c > 0 THEN ln(c) END), 0), SUM(c > 0),
+               (SELECT p2.id FROM precos p2
+                WHERE UPPER(TRIM(p2.modelo)) = chave AND p2.ativo = 1 AND p2.preco IS NOT NULL
+                ORDER BY p2.preco + COALESCE(p2.custo_reparo, 0), p2.id LIMIT 1)
+        FROM (
+            SELECT {_CHAVE.format(linha='p')} AS chave, {_CUSTO.format(linha='p')} AS c FROM precos p
+            WHERE p.ativo = 1 AND p.preco IS NOT NULL
+        )
+        GROUP BY chave
+    ''')
+
+def m008_indice_preco(conn):
+    """Ordenação por preço na aba de gestão (ORDER BY preco LIMIT/OFFSET) percorre o índice em vez de ordenar a tabela."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_precos_preco ON precos (preco)")
+    # Com filtro de status (o caso comum): filtra e ordena pelo mesmo índice
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_precos_ativo_preco ON precos (ativo, preco)")
+
+# Colunas indexadas para busca textual e o peso de cada uma no ranking (bm25)
+COLUNAS_FTS = ['modelo', 'titulo', 'ai_analise', 'loja']
+PESOS_FTS = [10.0, 5.0, 1.0, 2.0]
+
+def m009_busca_fts(conn):
+    """
+    Índice FTS5 (content='precos': o texto não é duplicado) sobre modelo, título, análise da IA e loja,
+    mantido por triggers. Acentos e maiúsculas são ignorados; prefixos de 2 e 3 letras são pré-indexados.
+    """
+    colunas = ', '.join(COLUNAS_FTS)
+    conn.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS precos_fts USING fts5(
+            {colunas}, content='precos', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    ''')
+    novos = ', '.join(f"NEW.{c}" for c in COLUNAS_FTS)
+    antigos = ', '.join(f"OLD.{c}" for c in COLUNAS_FTS)
+    # Tabela de conteúdo externo: a remoção precisa dos valores antigos ('delete')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_precos_fts_insert AFTER INSERT ON precos BEGIN
+            INSERT INTO precos_fts (rowid, {colunas}) VALUES (NEW.id, {novos});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_precos_fts_delete AFTER DELETE ON precos BEGIN
+            INSERT INTO precos_fts (precos_fts, rowid, {colunas}) VALUES ('delete', OLD.id, {antigos});
+        END
+    ''')
+    # Só quando um campo indexado muda (o trigger de 'atualizado_em' não reindexa nada)
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_precos_fts_update AFTER UPDATE OF {colunas} ON precos BEGIN
+            INSERT INTO precos_fts (precos_fts, rowid, {colunas}) VALUES ('delete', OLD.id, {antigos});
+            INSERT INTO precos_fts (rowid, {colunas}) VALUES (NEW.id, {novos});
+        END
+    ''')
+    # Ranking padrão (ORDER BY rank) com os pesos por coluna
+    pesos = ', '.join(str(p) for p in PESOS_FTS)
+    conn.execute(f"INSERT INTO precos_fts (precos_fts, rank) VALUES ('rank', 'bm25({pesos})')")
+    conn.execute("INSERT INTO precos_fts (precos_fts) VALUES ('rebuild')")
+
+def m010_historico_precos(conn):
+    """
+    Observações substituídas no mesmo dia: o UNIQUE (link, data_consulta) faz a revisita atualizar
+    o registro do dia, e o preço anterior (com até quando foi visto) vai para 'historico_precos'.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS historico_precos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            preco_id INTEGER,
+            link TEXT,
+            data_consulta TEXT,
+            preco REAL,
+            titulo TEXT,
+            visto_ate TEXT,
+            substituido_em TEXT
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_historico_precos_link ON historico_precos (link)")
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_historico_precos AFTER UPDATE OF preco ON precos
+        FOR EACH ROW WHEN OLD.preco IS NOT NEW.preco
+        BEGIN
+            INSERT INTO historico_precos (preco_id, link, data_consulta, preco, titulo, visto_ate, substituido_em)
+            VALUES (OLD.id, OLD.link, OLD.data_consulta, OLD.preco, OLD.titulo, OLD.last_seen, datetime('now', 'localtime'));
+        END
+    ''')
+
+# Resumo incremental: tira a contribuição de OLD e soma a de NEW. Mínimo/máximo/melhor_id só são
+# recalculados quando a linha que saiu era um deles (marcados como NULL até o recálculo).
+def _sql_remover_do_resumo():
+    c = _CUSTO.format(linha='OLD')
+    return f'''
+        UPDATE resumo_modelos SET
+            qtd = qtd - 1,
+            soma_log = soma_log - CASE WHEN {c} > 0 THEN ln({c}) ELSE 0 END,
+            qtd_log = qtd_log - ({c} > 0),
+            minimo = CASE WHEN {c} <= minimo THEN NULL ELSE minimo END,
+            maximo = CASE WHEN {c} >= maximo THEN NULL ELSE maximo END,
+            melhor_id = CASE WHEN {c} <= minimo OR melhor_id = OLD.id THEN NULL ELSE melhor_id END
+        WHERE modelo_key = {_CHAVE.format(linha='OLD')} AND OLD.ativo = 1 AND OLD.preco IS NOT NULL;
+        DELETE FROM resumo_modelos WHERE modelo_key = {_CHAVE.format(linha='OLD')} AND qtd <= 0;
+    '''
+
+def _sql_somar_ao_resumo():
+    c = _CUSTO.format(linha='NEW')
+    # MIN/MAX com NULL dão NULL: um mínimo/máximo marcado continua marcado
+    return f'''
+        INSERT INTO resumo_modelos (modelo_key, qtd, minimo, maximo, soma_log, qtd_log, melhor_id)
+        SELECT {_CHAVE.format(linha='NEW')}, 1, {c}, {c}, CASE WHEN {c} > 0 THEN ln({c}) ELSE 0 END, {c} > 0, NEW.id
+        WHERE NEW.ativo = 1 AND NEW.preco IS NOT NULL
+        ON CONFLICT (modelo_key) DO UPDATE SET
+            qtd = qtd + 1,
+            melhor_id = CASE
+                WHEN excluded.minimo < minimo OR (excluded.minimo = minimo AND excluded.melhor_id < melhor_id)
+                THEN excluded.melhor_id ELSE melhor_id END,
+            minimo = MIN(minimo, excluded.minimo),
+            maximo = MAX(maximo, excluded.maximo),
+            soma_log = soma_log + excluded.soma_log,
+            qtd_log = qtd_log + excluded.qtd_log;
+    '''
+
+def _sql_recalcular_marcado(chave):
+    """
+    Recalcula o resumo do modelo só se ele estiver marcado; depois do recálculo a marca some,
+    então a mesma chave em OLD e NEW é recalculada uma vez só.
+    """
+    # '+p.preco': sem isso o planejador prefere idx_precos_ativo_preco (migração 008) e varre todos os ativos
+    return f'''
+        INSERT INTO resumo_modelos (modelo_key, qtd, minimo, maximo, soma_log, qtd_log, melhor_id)
+        SELECT {chave}, COUNT(*), MIN(c), MAX(c), COALESCE(SUM(CASE WHEN c > 0 THEN ln(c) END), 0), SUM(c > 0),
+               (SELECT p2.id FROM precos p2
+                WHERE UPPER(TRIM(p2.modelo)) = {chave} AND p2.ativo = 1 AND +p2.preco IS NOT NULL
+                ORDER BY p2.preco + COALESCE(p2.custo_reparo, 0), p2.id LIMIT 1)
+        FROM (
+            SELECT {_CUSTO.format(linha='p')} AS c FROM precos p
+            WHERE UPPER(TRIM(p.modelo)) = {chave} AND p.ativo = 1 AND +p.preco IS NOT NULL
+        )
+        WHERE EXISTS (
+            SELECT 1 FROM resumo_modelos
+            WHERE modelo_key = {chave} AND (minimo IS NULL OR maximo IS NULL OR melhor_id IS NULL)
+        )
+        GROUP BY 1
+        ON CONFLICT (modelo_key) DO UPDATE SET
+            qtd = excluded.qtd, minimo = excluded.minimo, maximo = excluded.maximo,
+            soma_log = excluded.soma_log, qtd_log = excluded.qtd_log, melhor_id = excluded.melhor_id;
+    '''
+
+def m011_resumo_incremental(conn):
+    """
+    Triggers de UPDATE/DELETE do resumo por modelo (migração 007) sem varrer o modelo a cada gravação:
+    qtd e somas são ajustadas no lugar; o recálculo só acontece quando sai o mínimo, o máximo
+    ou o melhor anúncio, e uma vez só quando o modelo não muda.
+    """
+    conn.execute("DROP TRIGGER IF EXISTS trg_resumo_modelos_update")
+    conn.execute("DROP TRIGGER IF EXISTS trg_resumo_modelos_delete")
+    # O WHEN ignora UPDATEs que regravam os mesmos valores (ex: salvar o lote do editor)
+    conn.execute(f'''
+        CREATE TRIGGER trg_resumo_modelos_update
+        AFTER UPDATE OF preco, custo_reparo, ativo, modelo ON precos
+        FOR EACH ROW WHEN OLD.preco IS NOT NEW.preco OR OLD.custo_reparo IS NOT NEW.custo_reparo
+                       OR OLD.ativo IS NOT NEW.ativo OR OLD.modelo IS NOT NEW.modelo
+        BEGIN
+            {_sql_remover_do_resumo()}
+            {_sql_somar_ao_resumo()}
+            {_sql_recalcular_marcado(_CHAVE.format(linha='OLD'))}
+            {_sql_recalcular_marcado(_CHAVE.format(linha='NEW'))}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER trg_resumo_modelos_delete AFTER DELETE ON precos
+        FOR EACH ROW
+        BEGIN
+            {_sql_remover_do_resumo()}
+            {_sql_recalcular_marcado(_CHAVE.format(linha='OLD'))}
+        END
+    ''')
+
+MIGRACOES = [
+    (1, m001_tabela_precos),
+    (2, m002_indices_e_unicidade),
+    (3, m003_titulo_e_site),
+    (4, m004_first_seen_last_seen),
+    (5, m005_verificado),
+    (6, m006_atualizado_em),
+    (7, m007_resumo_modelos),
+    (8, m008_indice_preco),
+    (9, m009_busca_fts),
+    (10, m010_historico_precos),
+    (11, m011_resumo_incremental),
+]
+VERSAO_ATUAL = MIGRACOES[-1][0]
+
+# --- EXECUÇÃO ---
+def _criar_tabela_versao(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_versao (
+            versao INTEGER PRIMARY KEY,
+            nome TEXT,
+            aplicada_em REAL
+        )
+    ''')
+
+def versao_banco(conn=None):
+    conn = conn or obter_conexao()
+    _criar_tabela_versao(conn)
+    return conn.execute("SELECT COALESCE(MAX(versao), 0) FROM schema_versao").fetchone()[0]
+
+def aplicar_migracoes():
+    """Aplica as pendentes e retorna quantas rodaram. Sem pendências custa uma consulta."""
+    conn = obter_conexao()
+    if versao_banco(conn) >= VERSAO_ATUAL:
+        return 0
+
+    aplicadas = 0
+    # IMMEDIATE: dois workers subindo juntos não migram em dobro; o segundo relê a versão
+    with transacao(imediata=True):
+        atual = versao_banco(conn)
+        for versao, migracao in MIGRACOES:
+            if versao <= atual:
+                continue
+            inicio = time.time()
+            migracao(conn)
+            conn.execute(
+                "INSERT INTO schema_versao (versao, nome, aplicada_em) VALUES (?, ?, ?)",
+                (versao, migracao.__name__, time.time())
+            )
+            aplicadas += 1
+            print(f"🛠️ Migração {versao:03d} ({migracao.__name__}) aplicada em {time.time() - inicio:.2f}s.")
+    return aplicadas
+
+if __name__ == "__main__":
+    aplicar_migracoes()
+    print(f"✅ Banco na versão {versao_banco()} (código: {VERSAO_ATUAL}).")
@@ -0,0 +1,158 @@
+"""
+Parser da página de resultados do Mercado Livre.
+
+A página inteira tem ~1 MB (scripts, menus, filtros), mas só os cards de produto interessam:
+- o parse começa na tag do primeiro card (cabeçalho, menus e filtros antes dela nem são tokenizados);
+- o SoupStrainer constrói a árvore apenas dos containers de resultado;
+- os seletores são compilados uma vez (soupsieve);
+- o layout que casou da última vez é tentado primeiro (parse só dos containers dele), desde que
+  nenhum layout preferido apareça na página; se não vier nada, ele é esquecido e os três layouts
+  são tentados, na ordem de preferência de sempre.
+"""
+import re
+
+import soupsieve as sv
+from bs4 import BeautifulSoup, SoupStrainer
+
+PARSER_HTML = 'html.parser'
+
+# Containers de produto, em ordem de preferência: (tag, classe)
+LAYOUTS = [
+    ('li', 'ui-search-layout__item'),
+    ('div', 'ui-search-result__wrapper'),
+    ('div', 'andes-card'),
+]
+
+def _regex_classe(*classes):
+    # No parse o SoupStrainer vê o atributo 'class' cru ("andes-card andes-card--flat"): casa a palavra inteira
+    return re.compile(r'(?:^|\s)(?:%s)(?:\s|$)' % '|'.join(re.escape(c) for c in classes))
+
+def _regex_tag(tag, classe):
+    # Abertura real da tag com a classe no atributo: '<li ... class="x ui-search-layout__item y"'
+    # (a mesma string dentro de um <script>/JSON não tem essa forma)
+    return re.compile(
+        r'<%s\b[^>]*?\sclass\s*=\s*(["\'])(?:(?!\1).)*?(?<![\w-])%s(?![\w-])' % (tag, re.escape(classe)),
+        re.IGNORECASE | re.DOTALL
+    )
+
+_TAGS_LAYOUT = [_regex_tag(tag, classe) for tag, classe in LAYOUTS]
+_FILTROS_LAYOUT = [SoupStrainer(tag, class_=_regex_classe(classe)) for tag, classe in LAYOUTS]
+_FILTRO_TODOS = SoupStrainer(
+    [tag for tag, _ in LAYOUTS], class_=_regex_classe(*[classe for _, classe in LAYOUTS])
+)
+
+# Seletores compilados; listas = alternativas tentadas em ordem
+SEL_TITULO = [sv.compile('h2.ui-search-item__title'), sv.compile('a.ui-search-item__group__element'), sv.compile('h3')]
+SEL_LINK = [sv.compile('a.ui-search-link'), sv.compile('a')]
+SEL_LINHA_PRECO = sv.compile('div.ui-search-price__second-line')
+SEL_PRECO = sv.compile('span.andes-money-amount__fraction')
+SEL_LOCAL = sv.compile('span.ui-search-item__location')
+
+PRECO_MINIMO = 500
+
+# Índice em LAYOUTS do último layout que casou (vale para o processo; a troca é atômica)
+_layout_lembrado = None
+
+def limpar_preco(texto):
+    if not texto: return 0.0
+    apenas_numeros = re.sub(r'[^\d,]', '', texto)
+    apenas_numeros = apenas_numeros.replace(',', '.')
+    try:
+        return float(apenas_numeros)
+    except:
+        return 0.0
+
+def _primeiro(elemento, seletores):
+    for seletor in seletores:
+        achado = seletor.select_one(elemento)
+        if achado is not None:
+            return achado
+    return None
+
+def _containers(soup, indices):
+    """(índice do layout, cards) do primeiro layout, entre 'indices', que tem cards."""
+    for indice in indices:
+        tag, classe = LAYOUTS[indice]
+        produtos = soup.find_all(tag, class_=classe)
+        if produtos:
+            return indice, produtos
+    return None, []
+
+def _primeira_tag_card(html, indices):
+    """Posição da primeira tag de card (de um dos layouts em 'indices') no HTML, ou None."""
+    posicoes = [m.start() for m in (_TAGS_LAYOUT[i].search(html) for i in indices) if m]
+    return min(posicoes) if posicoes else None
+
+def _a_partir_do_primeiro_card(html, indices):
+    """Corta o que vem antes da primeira tag de card: nada ali pode ser um card."""
+    inicio = _primeira_tag_card(html, indices)
+    return html[inicio:] if inicio else html
+
+def encontrar_produtos(html):
+    """Cards de produto da página, com o mínimo de parse possível."""
+    global _layout_lembrado
+    lembrado = _layout_lembrado
+    # Um layout preferido ao lembrado na página: o lembrado não é mais o melhor, vai pelo caminho completo
+    if lembrado is not None and _primeira_tag_card(html, range(lembrado)) is None:
+        inicio = _primeira_tag_card(html, [lembrado])
+        if inicio is not None:
+            soup = BeautifulSoup(html[inicio:], PARSER_HTML, parse_only=_FILTROS_LAYOUT[lembrado])
+            _, produtos = _containers(soup, [lembrado])
+            if produtos:
+                return produtos
+        _layout_lembrado = None  # Não casou nesta página: esquece
+
+    # Primeira página ou o layout mudou: todos os containers, na ordem de preferência
+    trecho = _a_partir_do_primeiro_card(html, range(len(LAYOUTS)))
+    soup = BeautifulSoup(trecho, PARSER_HTML, parse_only=_FILTRO_TODOS)
+    indice, produtos = _containers(soup, range(len(LAYOUTS)))
+    _layout_lembrado = indice
+    return produtos
+
+def extrair_produto(produto, modelo_pai, termo_busca):
+    """Dict do anúncio no formato de buscar_mercadolivre, ou None (sem título / preço abaixo do mínimo)."""
+    titulo_elem = _primeiro(produto, SEL_TITULO)
+    if titulo_elem is None:
+        return None
+
+    # Preço antes do resto: a maioria dos descartes sai aqui, sem ler o card inteiro
+    preco_final = 0.0
+    linha_preco = SEL_LINHA_PRECO.select_one(produto)
+    if linha_preco is None:
+        linha_preco = produto
+    preco_elem = SEL_PRECO.select_one(linha_preco)
+    if preco_elem is not None:
+        preco_final = limpar_preco(preco_elem.get_text())
+    if preco_final < PRECO_MINIMO:
+        return None
+
+    link_elem = _primeiro(produto, SEL_LINK)
+    link = link_elem['href'] if link_elem is not None else "Link não encontrado"
+
+    texto_completo = produto.get_text().lower()
+    tem_frete_gratis = "frete grátis" in texto_completo or "chegará grátis" in texto_completo
+    local_elem = SEL_LOCAL.select_one(produto)
+    localizacao = local_elem.get_text().strip() if local_elem is not None else "Local não informado"
+
+    return {
+        'modelo': modelo_pai,
+        'termo_usado': termo_busca,
+        'titulo': titulo_elem.get_text().strip(),
+        'preco': preco_final,
+        'link': link,
+        'tem_envio': tem_frete_gratis,
+        'localizacao': localizacao,
+        'site': 'Mercado Livre'
+    }
+
+def parsear_resultados(html, modelo_pai, termo_busca):
+    """Lista de anúncios (dicts) de uma página de resultados."""
+    resultados = []
+    for produto in encontrar_produtos(html):
+        try:
+            item = extrair_produto(produto, modelo_pai, termo_busca)
+        except Exception:
+            continue
+        if item is not None:
+            resultados.append(item)
+    return resultados
@@ -0,0 +1,216 @@
+import queue
+import threading
+from datetime import datetime
+
+from config import TAMANHO_FILA_LOTES, NUM_VALIDADORES_IA
+from database import salvar_no_banco, descarregar_banco, limpar_link
+from ai_validator import validar_lote_com_ia
+from analyzer import pre_filtrar_lote, registrar_triagem
+from classificador_local import triar_lote
+
+FONTE_LOJAS = "lojas_br"
+FONTE_ML = "mercadolivre"
+
+_FIM = object()  # Sentinela de encerramento das filas
+
+class Lote:
+    """
+    Uma página de anúncios de uma fonte, para um modelo.
+    'itens' passam pela validação; 'revisitas' (links já vistos com preço alterado)
+    já trazem o veredito anterior e vão direto para a gravação.
+    """
+
+    def __init__(self, modelo_oficial, fonte, itens, ao_finalizar=None, revisitas=None):
+        self.modelo_oficial = modelo_oficial
+        self.fonte = fonte
+        self.itens = itens
+        self.revisitas = revisitas or []
+        self.aprovados = []
+        self.filtrados = 0  # Rejeitados pelas regras antes da IA (chamadas de LLM poupadas)
+        self.decididos_local = 0  # Resolvidos pelo classificador local com alta confiança
+        self.erro = None
+        # Chamado pelo gravador (com o erro ou None) quando o lote termina de ser gravado
+        self.ao_finalizar = ao_finalizar
+
+    def links(self):
+        return [limpar_link(item['link']) for item in self.itens + self.revisitas]
+
+    def finalizar(self):
+        if self.ao_finalizar:
+            try:
+                self.ao_finalizar(self.erro)
+            except Exception as e:
+                print(f"⚠️ Erro ao finalizar lote ({self.modelo_oficial}): {e}")
+
+def preparar_item_loja(item):
+    item['data'] = datetime.now().strftime("%Y-%m-%d")
+    item['localizacao'] = 'Loja Oficial'
+    item['tem_envio'] = True
+    item['estado_detalhado'] = 'novo'
+    item['ai_analise'] = 'Loja Confiável'
+    return item
+
+def preparar_item_ml(item, analise):
+    estado = analise['estado']
+    item['data'] = datetime.now().strftime("%Y-%m-%d")
+    item['condicao'] = 'Usado'
+    item['loja'] = 'Mercado Livre'
+    item['estado_detalhado'] = estado
+    item['custo_reparo'] = analise['reparo']
+    item['ai_analise'] = analise['motivo']
+    item['ativo'] = 0 if estado == 'nao_funcional' else 1
+    return item
+
+class PipelineScout:
+    """
+    Três estágios ligados por filas limitadas:
+    raspagem (quem chama enviar) -> N validadores (IA) -> 1 gravador (SQLite).
+    Com a fila cheia, enviar() bloqueia: a IA lenta freia a raspagem em vez de acumular memória,
+    e a raspagem do próximo modelo corre enquanto a IA valida o atual.
+    """
+
+    def __init__(self, stats, num_validadores=NUM_VALIDADORES_IA, tamanho_fila=TAMANHO_FILA_LOTES):
+        self.stats = stats
+        self.fila_validacao = queue.Queue(maxsize=tamanho_fila)
+        self.fila_gravacao = queue.Queue(maxsize=tamanho_fila)
+        self._links_em_voo = set()
+        self._lock = threading.Lock()
+        self._validadores = [
+            threading.Thread(target=self._loop_validador, name=f"validador-{i}", daemon=True)
+            for i in range(num_validadores)
+        ]
+        self._gravador = threading.Thread(target=self._loop_gravador, name="gravador", daemon=True)
+
+    def iniciar(self):
+        for t in self._validadores:
+            t.start()
+        self._gravador.start()
+        return self
+
+    def em_voo(self, link):
+        """True se o link já está numa fila (visto noutra busca e ainda não gravado)."""
+        with self._lock:
+            return limpar_link(link) in self._links_em_voo
+
+    def enviar(self, lote):
+        if not lote.itens and not lote.revisitas:
+            lote.finalizar()
+            return
+        with self._lock:
+            self._links_em_voo.update(lote.links())
+        self.fila_validacao.put(lote)  # Bloqueia se a fila estiver cheia (backpressure)
+
+    def encerrar(self):
+        """Esvazia as filas (tudo o que já foi raspado é validado e gravado) e para as threads."""
+        for _ in self._validadores:
+            self.fila_validacao.put(_FIM)
+        for t in self._validadores:
+            t.join()
+        self.fila_gravacao.put(_FIM)
+        self._gravador.join()
+
+    # --- ESTÁGIO 2: VALIDAÇÃO ---
+    def _validar(self, lote):
+        if lote.fonte == FONTE_LOJAS:
+            # Revisita de loja passa pelo mesmo preparo do item novo (localização, envio, análise)
+            lote.aprovados.extend(preparar_item_loja(item) for item in lote.revisitas + lote.itens)
+            return
+        lote.aprovados.extend(lote.revisitas)
+        if not lote.itens:
+            return
+
+        # Regras baratas primeiro: só o que sobrevive (ou é ambíguo) chega ao LLM
+        candidatos, rejeitados, confirmados = pre_filtrar_lote(lote.itens, lote.modelo_oficial)
+        lote.filtrados = len(rejeitados)
+
+        # Classificador local decide o que tem confiança alta; só o resto escala para o Gemini
+        decididos, a_escalar = triar_lote(candidatos, confirmados)
+        lote.decididos_local = len(decididos)
+        registrar_triagem(len(decididos), len(a_escalar))
+
+        # Uma requisição por página de anúncios (em blocos de TAMANHO_LOTE_IA)
+        analises = validar_lote_com_ia(a_escalar, lote.modelo_oficial) if a_escalar else []
+        falhas = 0
+        for item, analise in decididos + list(zip(a_escalar, analises)):
+            if analise.get('erro'):
+                falhas += 1
+            elif analise['valido']:
+                lote.aprovados.append(preparar_item_ml(item, analise))
+
+        # Falha técnica não é rejeição: o job volta à fila e esses anúncios são revalidados depois
+        if falhas:
+            lote.erro = Exception(f"{falhas} anúncio(s) sem veredito da IA")
+
+    def _loop_validador(self):
+        while True:
+            lote = self.fila_validacao.get()
+            if lote is _FIM:
+                break
+            try:
+                self._validar(lote)
+            except Exception as e:
+                print(f"⚠️ Erro no validador ({lote.modelo_oficial}): {e}")
+                lote.erro = e
+            # Segue sempre para o gravador, que também libera os links "em voo"
+            self.fila_gravacao.put(lote)
+
+    # --- ESTÁGIO 3: GRAVAÇÃO (única thread escrevendo no banco) ---
+    def _gravar(self, lote):
+        self.stats['filtrados'] = self.stats.get('filtrados', 0) + lote.filtrados
+        self.stats['classificador_local'] = self.stats.get('classificador_local', 0) + lote.decididos_local
+        for item in lote.aprovados:
+            salvar_no_banco(item)
+            estado = item.get('estado_detalhado')
+            if item.get('preco_anterior') is not None:
+                # Revisita: o histórico ganha um ponto, mas não é um anúncio novo
+                self.stats['revisitas'] = self.stats.get('revisitas', 0) + 1
+                seta = "📉" if item['preco'] < item['preco_anterior'] else "📈"
+                print(f"   {seta} PREÇO: R$ {item['preco_anterior']:,.0f} -> R$ {item['preco']:,.0f} | {estado} | {lote.modelo_oficial}")
+                continue
+
+            self.stats['total'] += 1
+            if estado in self.stats: self.stats[estado] += 1
+
+            if lote.fonte == FONTE_ML:
+                print(f"   ✅ SALVO: R$ {item['preco']:,.0f} | {estado} | {lote.modelo_oficial}")
+
+        novos_salvos = len(lote.aprovados) - len(lote.revisitas)
+        if lote.fonte == FONTE_LOJAS:
+            print(f"   🏬 Lojas BR -> {novos_salvos} novos salvos ({lote.modelo_oficial}).")
+        else:
+            print(
+                f"   📦 ML -> {novos_salvos} novos capturados | "
+                f"🚫 {lote.filtrados} filtrados | 🤖 {lote.decididos_local} pelo modelo local ({lote.modelo_oficial})."
+            )
+
+    def _confirmar(self, lotes):
+        """Uma transação para todos os lotes acumulados; só depois do commit o job pode concluir."""
+        try:
+            descarregar_banco()
+        except Exception as e:
+            print(f"⚠️ Erro ao gravar no banco ({len(lotes)} lotes): {e}")
+            for lote in lotes:
+                lote.erro = lote.erro or e
+        for lote in lotes:
+            with self._lock:
+                self._links_em_voo.difference_update(lote.links())
+            lote.finalizar()
+
+    def _loop_gravador(self):
+        pendentes = []
+        while True:
+            lote = self.fila_gravacao.get()
+            if lote is not _FIM:
+                try:
+                    self._gravar(lote)
+                except Exception as e:
+                    print(f"⚠️ Erro ao gravar lote ({lote.modelo_oficial}): {e}")
+                    lote.erro = lote.erro or e
+                pendentes.append(lote)
+
+            # Enquanto chegam lotes, eles se juntam no buffer do escritor; fila vazia = commit
+            if lote is _FIM or self.fila_gravacao.empty():
+                self._confirmar(pendentes)
+                pendentes = []
+            if lote is _FIM:
+                break
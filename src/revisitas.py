@@ -0,0 +1,65 @@
+"""
+Revisita de anúncios já vistos.
+
+Um link conhecido que reaparece na busca é comparado com a última observação gravada:
+- mesmo preço e mesmo título: nada a fazer (caminho barato, só memória);
+- mesmo preço, título só retocado: atualiza o título do último registro (não é observação nova);
+- preço mudou (título igual ou quase): grava um novo registro reaproveitando o veredito anterior;
+- título mudou de verdade: o anúncio pode ser outro produto e volta para a validação completa.
+"""
+from datetime import datetime
+
+from config import LIMIAR_MUDANCA_TITULO
+from cache_ia import normalizar_titulo
+from database import limpar_link, obter_indice_links, ultimo_registro
+from indice_links import assinatura_titulo
+
+NOVO = "novo"
+INALTERADO = "inalterado"
+TITULO_RETOCADO = "titulo_retocado"
+MUDOU_PRECO = "mudou_preco"
+MUDOU_TITULO = "mudou_titulo"
+
+# Campos do veredito que uma revisita herda do último registro
+CAMPOS_VEREDITO = ['condicao', 'estado_detalhado', 'custo_reparo', 'ai_analise', 'ativo', 'loja']
+
+def similaridade_titulos(titulo_a, titulo_b):
+    """Jaccard das palavras normalizadas (1.0 = mesmas palavras)."""
+    palavras_a = set(normalizar_titulo(titulo_a or '').split())
+    palavras_b = set(normalizar_titulo(titulo_b or '').split())
+    if not palavras_a or not palavras_b:
+        return 1.0  # Sem título de um dos lados: não dá para afirmar que mudou
+    return len(palavras_a & palavras_b) / len(palavras_a | palavras_b)
+
+def classificar(item):
+    """Retorna (situação, último registro do link ou None)."""
+    link = limpar_link(item['link'])
+    observacao = obter_indice_links().ultima_observacao(link)
+    if observacao is None:
+        return NOVO, None
+
+    preco_anterior, assinatura_anterior = observacao
+    assinatura_nova = assinatura_titulo(item.get('titulo'))
+    titulo_diferente = bool(assinatura_anterior and assinatura_nova and assinatura_anterior != assinatura_nova)
+    preco_diferente = abs(float(item['preco']) - preco_anterior) >= 0.01
+    if not preco_diferente and not titulo_diferente:
+        return INALTERADO, None
+
+    # Só aqui (mudança, caso raro) o banco é consultado
+    registro = ultimo_registro(link)
+    if registro is None:
+        return NOVO, None
+    if titulo_diferente and similaridade_titulos(registro.get('titulo'), item.get('titulo')) < LIMIAR_MUDANCA_TITULO:
+        return MUDOU_TITULO, registro
+    if not preco_diferente:
+        return TITULO_RETOCADO, registro
+    return MUDOU_PRECO, registro
+
+def preparar_revisita(item, registro):
+    """Novo registro com o preço/título de agora e o veredito da última análise."""
+    for campo in CAMPOS_VEREDITO:
+        if registro.get(campo) is not None:
+            item[campo] = registro[campo]
+    item['data'] = datetime.now().strftime("%Y-%m-%d")
+    item['preco_anterior'] = registro.get('preco')
+    return item
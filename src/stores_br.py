@@ -1,12 +1,57 @@
-import os
 import re
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import soupsieve as sv
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
-from urllib.parse import quote
+from urllib.parse import quote, urljoin
+
+from fetcher import obter_html, MODO_HTTP, MODO_NAVEGADOR
+from config import LIMITE_BUSCAS_POR_LOJA
+
+# Lojas consultadas em paralelo (adaptadores). Modo preferido: TeclaCenter (Magento) entrega o HTML pronto;
+# a busca da Ninja Som é montada via JavaScript e precisa do navegador.
+# 'seletores' (CSS) descrevem o card de produto e, dentro dele, título, preço e link; se a loja mudar
+# o layout e nenhum card casar, a heurística genérica (link com o modelo + "R$" por perto) assume.
+LOJAS = [
+    {
+        "nome": "TeclaCenter",
+        "url_busca": "https://www.teclacenter.com.br/catalogsearch/result/?q={termo}",
+        "url_base": "https://www.teclacenter.com.br",
+        "modo": MODO_HTTP,
+        "seletores": {  # Grade de produtos do Magento 2
+            "card": "li.product-item",
+            "titulo": "a.product-item-link",
+            "preco": "[data-price-type='finalPrice'] .price, span.price",
+            "link": "a.product-item-link",
+        },
+    },
+    {
+        "nome": "Ninja Som",
+        "url_busca": "https://www.ninjasom.com.br/{termo}",
+        "url_base": "https://www.ninjasom.com.br",
+        "modo": MODO_NAVEGADOR,
+        "seletores": {  # Vitrine da VTEX IO
+            "card": "section.vtex-product-summary-2-x-container",
+            "titulo": "span.vtex-product-summary-2-x-productBrand, h3",
+            "preco": "span.vtex-product-price-1-x-sellingPriceValue",
+            "link": "a.vtex-product-summary-2-x-clearLink, a[href]",
+        },
+    },
+]
+LOJAS_POR_NOME = {loja["nome"]: loja for loja in LOJAS}
+MODO_POR_LOJA = {loja["nome"]: loja["modo"] for loja in LOJAS}
+# Seletores compilados uma vez por loja
+_SELETORES_COMPILADOS = {
+    loja["nome"]: {campo: sv.compile(seletor) for campo, seletor in loja["seletores"].items()}
+    for loja in LOJAS
+}
+_SEMAFOROS_LOJA = {loja["nome"]: threading.BoundedSemaphore(LIMITE_BUSCAS_POR_LOJA) for loja in LOJAS}
+# Uma página de busca de loja com produtos sempre mostra preço
+MARCADORES_LOJA = ['R$']
+
+# Loja de instrumentos: abaixo disso é acessório, não o piano
+PRECO_MINIMO_LOJA = 1500
+_REGEX_PRECO = re.compile(r'R\$\s?[\d\.]+,?\d{0,2}')
 
 def limpar_preco(texto):
     if not texto: return 0.0
@@ -17,99 +62,129 @@ def limpar_preco(texto):
     except:
         return 0.0
 
-def setup_driver():
-    caminho_projeto = os.getcwd()
-    caminho_perfil = os.path.join(caminho_projeto, "chrome_perfil")
-    
-    chrome_options = Options()
-    chrome_options.add_argument("--start-maximized")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-blink-features=AutomationControlled") 
-    chrome_options.add_argument("--log-level=3")
-    chrome_options.add_argument(f"user-data-dir={caminho_perfil}")
-    
-    # --- BLINDAGEM CONTRA ERRO DE CONEXÃO ---
-    max_tentativas = 3
-    for i in range(max_tentativas):
+def _termo_chave(modelo_alvo):
+    return modelo_alvo.lower().replace("roland", "").replace(" ", "").replace("-", "")
+
+def _url_absoluta(href, nome_loja):
+    loja = LOJAS_POR_NOME.get(nome_loja)
+    if href.startswith('http') or loja is None:
+        return href
+    return urljoin(loja["url_base"], href)
+
+def _item_loja(nome_loja, modelo_alvo, titulo, preco, link):
+    return {
+        'loja': nome_loja,
+        'modelo': modelo_alvo,
+        'titulo': titulo,
+        'preco': preco,
+        'link': link,
+        'condicao': 'Novo',
+        'tem_envio': True,
+        'localizacao': 'Loja Online'
+    }
+
+def extrair_com_seletores(soup, modelo_alvo, nome_loja):
+    """Extração pelos seletores declarados da loja. None se nenhum card casou (layout mudou: usar o genérico)."""
+    seletores = _SELETORES_COMPILADOS.get(nome_loja)
+    if seletores is None:
+        return None
+    cards = seletores["card"].select(soup)
+    if not cards:
+        return None
+
+    termo_chave = _termo_chave(modelo_alvo)
+    resultados, vistos = [], set()
+    for card in cards:
         try:
-            servico = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=servico, options=chrome_options)
-            return driver
-        except Exception as e:
-            print(f"⚠️ Erro ao iniciar driver (Tentativa {i+1}/{max_tentativas}): {e}")
-            time.sleep(2)
-            
-    raise Exception("❌ Não foi possível iniciar o navegador após várias tentativas.")
+            titulo_elem = seletores["titulo"].select_one(card)
+            link_elem = seletores["link"].select_one(card)
+            if titulo_elem is None or link_elem is None or not link_elem.get('href'):
+                continue
+            titulo = titulo_elem.get_text().strip()
+            if termo_chave not in titulo.lower().replace(" ", "").replace("-", ""):
+                continue
+            preco_elem = seletores["preco"].select_one(card)
+            preco_final = limpar_preco(preco_elem.get_text()) if preco_elem is not None else 0.0
+            if preco_final < PRECO_MINIMO_LOJA:
+                continue
+            href = _url_absoluta(link_elem['href'], nome_loja)
+            if href not in vistos:
+                vistos.add(href)
+                resultados.append(_item_loja(nome_loja, modelo_alvo, titulo, preco_final, href))
+        except Exception:
+            continue
+    return resultados
+
+def extrair(soup, modelo_alvo, nome_loja):
+    """Seletores da loja primeiro; a heurística genérica só quando eles não acham nenhum card."""
+    itens = extrair_com_seletores(soup, modelo_alvo, nome_loja)
+    if itens is None:
+        itens = extrair_generico(soup, modelo_alvo, nome_loja)
+    return itens
 
 def extrair_generico(soup, modelo_alvo, nome_loja):
-    resultados = []
-    termo_chave = modelo_alvo.lower().replace("roland", "").replace(" ", "").replace("-", "")
-    
-    links = soup.find_all('a', href=True)
-    
-    for link in links:
+    """Heurística para layout desconhecido: link cujo texto tem o modelo e um "R$" em até 3 níveis acima."""
+    resultados, vistos = [], set()
+    termo_chave = _termo_chave(modelo_alvo)
+    # Texto de cada ancestral calculado uma vez: vários links do mesmo card sobem pelos mesmos pais
+    textos = {}
+
+    def texto_de(elemento):
+        chave = id(elemento)
+        if chave not in textos:
+            textos[chave] = elemento.get_text()
+        return textos[chave]
+
+    for link in soup.find_all('a', href=True):
         try:
-            texto_link = link.text.strip()
+            texto_link = link.get_text().strip()
             if not texto_link: continue
-            
-            texto_comparacao = texto_link.lower().replace(" ", "").replace("-", "")
-            
-            if termo_chave in texto_comparacao:
-                pai = link.parent
-                container_produto = None
-                
-                for _ in range(3):
-                    if pai:
-                        if "R$" in pai.text:
-                            container_produto = pai
-                            break
-                        pai = pai.parent
-                
-                if container_produto:
-                    match_preco = re.search(r'R\$\s?[\d\.]+,?\d{0,2}', container_produto.text)
-                    if match_preco:
-                        preco_final = limpar_preco(match_preco.group(0))
-                        if preco_final < 1500: continue
-                        
-                        href = link['href']
-                        if not href.startswith('http'):
-                            base_url = "https://www.teclacenter.com.br" if "teclacenter" in nome_loja.lower() else "https://www.ninjasom.com.br"
-                            href = base_url + href
-
-                        # Verifica duplicação local (na mesma execução)
-                        if not any(r['link'] == href for r in resultados):
-                            resultados.append({
-                                'loja': nome_loja,
-                                'modelo': modelo_alvo,
-                                'titulo': texto_link,
-                                'preco': preco_final,
-                                'link': href,
-                                'condicao': 'Novo',
-                                'tem_envio': True,
-                                'localizacao': 'Loja Online'
-                            })
+            if termo_chave not in texto_link.lower().replace(" ", "").replace("-", ""): continue
+
+            pai = link.parent
+            container_produto = None
+            for _ in range(3):
+                if pai is None: break
+                if "R$" in texto_de(pai):
+                    container_produto = pai
+                    break
+                pai = pai.parent
+            if container_produto is None: continue
+
+            match_preco = _REGEX_PRECO.search(texto_de(container_produto))
+            if not match_preco: continue
+            preco_final = limpar_preco(match_preco.group(0))
+            if preco_final < PRECO_MINIMO_LOJA: continue
+
+            # Duplicação local (na mesma execução): set, O(1) por link
+            href = _url_absoluta(link['href'], nome_loja)
+            if href not in vistos:
+                vistos.add(href)
+                resultados.append(_item_loja(nome_loja, modelo_alvo, texto_link, preco_final, href))
         except Exception:
             continue
     return resultados
 
-def buscar_loja(driver, url_busca, modelo, nome_loja):
+def buscar_loja(url_busca, modelo, nome_loja):
+    with _SEMAFOROS_LOJA.get(nome_loja, threading.BoundedSemaphore(1)):
+        return _buscar_loja(url_busca, modelo, nome_loja)
+
+def _buscar_loja(url_busca, modelo, nome_loja):
     print(f"--- Buscando na {nome_loja}... ---")
+    modo = MODO_POR_LOJA.get(nome_loja, MODO_HTTP)
     try:
-        driver.get(url_busca)
-        time.sleep(5)
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
+        html = obter_html(url_busca, modo=modo, marcadores=MARCADORES_LOJA, texto='R$', site="lojas")
+        soup = BeautifulSoup(html, 'html.parser')
         
-        itens = extrair_generico(soup, modelo, nome_loja)
+        itens = extrair(soup, modelo, nome_loja)
         
         if not itens:
             modelo_simples = modelo.split()[-1]
             if len(modelo_simples) > 3:
                 url_simples = url_busca.replace(quote(modelo), quote(modelo_simples))
-                driver.get(url_simples)
-                time.sleep(4)
-                soup = BeautifulSoup(driver.page_source, 'html.parser')
-                itens = extrair_generico(soup, modelo_simples, nome_loja)
+                html = obter_html(url_simples, modo=modo, marcadores=MARCADORES_LOJA, texto='R$', site="lojas")
+                soup = BeautifulSoup(html, 'html.parser')
+                itens = extrair(soup, modelo_simples, nome_loja)
             
         print(f"   Encontrados: {len(itens)}")
         return itens
@@ -119,20 +194,15 @@ def buscar_loja(driver, url_busca, modelo, nome_loja):
         return []
 
 def executar_busca_lojas_br(modelo):
-    try:
-        driver = setup_driver()
-    except Exception:
-        print("⏩ Pulando Lojas BR devido a falha no driver.")
-        return []
+    """Consulta todas as lojas ao mesmo tempo: o custo é o da loja mais lenta, não a soma."""
+    with ThreadPoolExecutor(max_workers=len(LOJAS), thread_name_prefix="loja") as executor:
+        futuros = [
+            executor.submit(buscar_loja, loja["url_busca"].format(termo=quote(modelo)), modelo, loja["nome"])
+            for loja in LOJAS
+        ]
+        # Junta na ordem de LOJAS (resultado determinístico, independente de quem terminou antes)
+        todos_resultados = []
+        for futuro in futuros:
+            todos_resultados.extend(futuro.result())
 
-    todos_resultados = []
-    try:
-        url_tecla = f"https://www.teclacenter.com.br/catalogsearch/result/?q={quote(modelo)}"
-        todos_resultados.extend(buscar_loja(driver, url_tecla, modelo, "TeclaCenter"))
-        
-        url_ninja = f"https://www.ninjasom.com.br/{quote(modelo)}"
-        todos_resultados.extend(buscar_loja(driver, url_ninja, modelo, "Ninja Som"))
-    finally:
-        if driver: driver.quit()
-        
-    return todos_resultados
\ No newline at end of file
+    return todos_resultados
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+# Os módulos de src/ se importam pelo nome (como em main.py e dashboard.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import conexao  # noqa: E402 (depois do sys.path)
+from llm_gateway import GatewayLLM, BackendFalso, definir_gateway  # noqa: E402
+
+# ai_validator cria o gateway na importação (pipeline, main...): sem chave do Gemini aqui, um backend falso
+definir_gateway(GatewayLLM(backend=BackendFalso(latencia=0)))
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    """Banco SQLite novo (migrado) num diretório temporário, com o cache da IA vazio; devolve a conexão da thread."""
+    import cache_ia
+    import database
+    from migracoes import aplicar_migracoes
+
+    conexao.fechar_conexao()
+    monkeypatch.setattr(conexao, "DB_PATH", str(tmp_path / "historico_precos.db"))
+    monkeypatch.setattr(cache_ia, "_tabela_pronta", False)
+    cache_ia._memoria.clear()
+    monkeypatch.setattr(database, "_indice_links", None)
+    aplicar_migracoes()
+    yield conexao.obter_conexao()
+    conexao.fechar_conexao()
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+import ai_validator
+from llm_gateway import GatewayLLM, BackendFalso, ErroLLM, definir_gateway
+
+class ErroHttp(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+def _usar_backend(responder):
+    definir_gateway(GatewayLLM(backend=BackendFalso(latencia=0, responder=responder), max_tentativas=1))
+
+@pytest.fixture(autouse=True)
+def gateway_falso(banco):
+    yield
+    definir_gateway(GatewayLLM(backend=BackendFalso(latencia=0)))
+
+def test_gateway_trocado_depois_da_importacao_vale():
+    veredito = {"eh_o_piano_real": False, "estado": "funcional", "custo_reparo_estimado": 0, "motivo": "É uma capa"}
+    _usar_backend(lambda prompt: json.dumps(veredito))
+    analise = ai_validator.validar_com_ia("Capa Roland FP-30X", 300, "Roland FP-30X")
+    assert analise == {"valido": False, "estado": "funcional", "reparo": 0, "motivo": "É uma capa"}
+
+@pytest.mark.parametrize("responder", [
+    lambda prompt: "isto não é json",
+    lambda prompt: (_ for _ in ()).throw(ErroHttp(400)),
+])
+def test_falha_permanente_e_rejeicao_sem_erro(responder):
+    _usar_backend(responder)
+    analise = ai_validator.validar_com_ia("Roland FP-30X seminovo", 3000, "Roland FP-30X")
+    assert analise['valido'] is False
+    assert not analise.get('erro')
+    assert analise['motivo'].startswith("Sem veredito da IA")
+
+def test_cota_esgotada_e_erro_tecnico():
+    _usar_backend(lambda prompt: (_ for _ in ()).throw(ErroHttp(429)))
+    analises = ai_validator.validar_lote_com_ia([{"titulo": "Roland FP-30X", "preco": 3000}], "Roland FP-30X")
+    assert analises[0]['erro'] is True
+
+def test_analise_de_excecao():
+    assert ai_validator.analise_de_excecao(ErroLLM("cota", transitorio=True))['erro'] is True
+    assert 'erro' not in ai_validator.analise_de_excecao(ErroLLM("JSON inválido"))
+    assert 'erro' not in ai_validator.analise_de_excecao(ValueError("bloqueado"))
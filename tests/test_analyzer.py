@@ -0,0 +1,67 @@
+import pytest
+
+import analyzer
+from analyzer import pre_filtrar, eh_produto_valido, REJEITAR, AMBIGUO, SEGUE
+
+@pytest.mark.parametrize("titulo, preco, modelo", [
+    ("Piano Digital Yamaha P45 88 Teclas Usado", 2200, "Yamaha P-45B"),
+    ("Piano Digital Casio CDP-S160 Vermelho", 2500, "Casio CDP-S160RD"),
+    ("Kurzweil KA-E1 88 teclas", 1500, "PIANO DIGITAL KURZWEIL KAE1"),
+    ("Casio CDP-S110", 1500, "PIANO DIGITAL CASIO CDP S110 (TRI-SENSOR II)"),
+    ("Yamaha Clp-765gp Móvel Cauda", 30000, "Yamaha CLP-765GP (Móvel Cauda)"),
+    ("Roland fp 30 x seminovo", 3000, "Roland FP-30X"),
+])
+def test_modelo_com_sufixo_ou_separadores_segue(titulo, preco, modelo):
+    assert pre_filtrar(titulo, preco, modelo)[0] == SEGUE
+
+@pytest.mark.parametrize("titulo, modelo", [
+    ("Piano digital acordes com móvel", "PIANO DIGITAL ACORDES (MÓVEL)"),
+    ("Piano 88 teclas", "PIANO DIGITAL 88 TECLAS (GENÉRICO/USB-C)"),
+    ("Nord Piano 73 stage", "Nord Piano 5"),
+    ("Piano digital seminovo", "Yamaha P-225"),
+])
+def test_sem_codigo_no_titulo_fica_para_a_ia(titulo, modelo):
+    assert pre_filtrar(titulo, 2000, modelo)[0] == AMBIGUO
+
+@pytest.mark.parametrize("titulo, modelo", [
+    ("Yamaha P-45 usado", "Yamaha P-225"),
+    ("Yamaha P-145 88 teclas", "Yamaha P-45B"),
+    ("Casio CDP-S160", "PIANO DIGITAL CASIO CDP S110 (TRI-SENSOR II)"),
+])
+def test_outro_modelo_da_mesma_linha_rejeita(titulo, modelo):
+    assert pre_filtrar(titulo, 3000, modelo) == (REJEITAR, "outro modelo no título")
+
+def test_palavra_proibida_antes_do_modelo_e_acessorio():
+    assert pre_filtrar("Capa para Roland FP-30X", 900, "Roland FP-30X")[0] == REJEITAR
+    assert pre_filtrar("Roland FP30X com pedal", 2900, "Roland FP-30X")[0] == AMBIGUO
+
+def test_piso_padrao_e_o_do_ml(monkeypatch):
+    monkeypatch.setattr(analyzer, "carregar_pisos_csv", lambda: {})
+    assert pre_filtrar("Casio CDP-S110 usado", 1400, "Casio CDP-S110")[0] == SEGUE
+    assert pre_filtrar("Casio CDP-S110 usado", 400, "Casio CDP-S110")[0] == REJEITAR
+
+def test_piso_por_modelo(monkeypatch):
+    monkeypatch.setattr(analyzer, "carregar_pisos_csv", lambda: {})
+    monkeypatch.setitem(analyzer.PRECO_MINIMO_POR_MODELO, "Roland FP-90X", 6000)
+    assert pre_filtrar("Roland FP-90X", 5000, "Roland FP-90X") == (REJEITAR, "preço abaixo do piso")
+
+def test_eh_produto_valido_mantem_busca_por_substring():
+    assert not eh_produto_valido("Roland FP-30X bagagem", 3000, "Roland FP-30X")
+
+def test_resumo_filtro_conta_so_o_ciclo():
+    antes = analyzer.instantaneo_filtro()
+    analyzer.pre_filtrar_lote([
+        {'titulo': "Roland FP-30X", 'preco': 3000},
+        {'titulo': "Capa para Roland FP-30X", 'preco': 3000},
+        {'titulo': "Piano digital 88 teclas", 'preco': 3000},
+    ], "Roland FP-30X")
+    analyzer.registrar_triagem(decididos_local=1, ao_gemini=1)
+    resumo = analyzer.resumo_filtro(antes, analyzer.instantaneo_filtro())
+    assert "3 avaliados" in resumo and "1 rejeitados" in resumo and "1 ambíguos" in resumo
+    assert "1 decididos localmente" in resumo and "1/2 candidatos foram ao Gemini (50%)" in resumo
+
+def test_piso_por_modelo_ignora_maiusculas_e_espacos(monkeypatch):
+    monkeypatch.setattr(analyzer, "carregar_pisos_csv", lambda: {"CASIO PX-S1100": 2500.0})
+    monkeypatch.setitem(analyzer.PRECO_MINIMO_POR_MODELO, "Roland FP-90X", 6000)
+    assert analyzer.preco_minimo_modelo("roland  fp-90x ") == 6000
+    assert analyzer.preco_minimo_modelo(" Casio px-s1100") == 2500.0
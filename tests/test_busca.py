@@ -0,0 +1,51 @@
+import pytest
+
+import busca
+import dashboard_services as ds
+from busca import consulta_fts, buscar
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("yamaha p1", '"yamaha" "p1"*'),
+    ("kaw*", '"kaw"*'),
+    ('"otimo estado" fp', '"otimo estado" "fp"*'),
+    ("roland OR korg", '"roland" OR "korg"*'),
+    ("OR roland AND", '"roland"'),
+    ("roland OR OR korg", '"roland" OR "korg"*'),
+    ('fp-30x "', '"fp-30x"'),
+    ("", None),
+    ("  ?? ", None),
+])
+def test_consulta_fts(texto, esperado):
+    assert consulta_fts(texto) == esperado
+
+def test_consulta_fts_sempre_valida(banco):
+    for texto in ['"', 'NOT', 'a OR', '(x', 'AND AND', '*', 'ção*', '"a" "b']:
+        consulta = consulta_fts(texto)
+        if consulta:
+            banco.execute("SELECT COUNT(*) FROM precos_fts WHERE precos_fts MATCH ?", (consulta,)).fetchone()
+
+def _inserir(conn, titulo, ativo=1, modelo='Roland FP-30X'):
+    conn.execute('''
+        INSERT INTO precos (data_consulta, modelo, preco, loja, link, ativo, titulo)
+        VALUES ('2026-01-01', ?, 3000, 'Mercado Livre', 'ml/' || (SELECT COUNT(*) FROM precos), ?, ?)
+    ''', (modelo, ativo, titulo))
+
+def test_status_entra_antes_do_limite(banco):
+    for _ in range(5):
+        _inserir(banco, "piano ativo")
+    # Mais recentes e suficientes para encher o limite, mas fora do filtro
+    banco.executemany(
+        "INSERT INTO precos (data_consulta, modelo, preco, loja, link, ativo, titulo) VALUES ('2026-01-02', 'x', 1, 'ML', ?, 0, 'piano inativo')",
+        ((f"ml/inativo/{i}",) for i in range(busca.BUSCA_MAX_RESULTADOS))
+    )
+
+    assert len(buscar("piano", limite=20, ativo=1)) == 5
+    assert ds.contar_anuncios("piano", ativo=1) == 5
+
+def test_relevancia_alcanca_anuncio_antigo(banco, monkeypatch):
+    _inserir(banco, "Yamaha P-45 seminovo", modelo='Yamaha P-45')  # O mais antigo e o único que casa no modelo
+    for _ in range(600):
+        _inserir(banco, "teclado tipo yamaha para iniciantes", modelo='Casio CDP-S110')
+    assert buscar("yamaha", limite=1)[0]['modelo'] == 'Yamaha P-45'
+    pagina = ds.pagina_anuncios("yamaha", ordem="Relevância", por_pagina=1)
+    assert pagina['modelo'].tolist() == ['Yamaha P-45']
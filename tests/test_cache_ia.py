@@ -0,0 +1,63 @@
+import cache_ia
+from cache_ia import buscar, faixa_preco, gerar_chave, guardar
+
+def test_chave_ignora_acentos_pontuacao_e_maiusculas():
+    assert gerar_chave("lote", "v1", "Roland FP-30X", "Piano Roland FP-30X Ótimo!!", 3500) == \
+        gerar_chave("lote", "v1", "roland fp-30x", "piano roland fp 30x otimo", 3500)
+
+def test_chave_separa_prompt_tipo_e_faixa_de_preco():
+    base = gerar_chave("lote", "v1", "Yamaha P-45", "Yamaha P-45 usado", 3500)
+    assert base == gerar_chave("lote", "v1", "Yamaha P-45", "Yamaha P-45 usado", 3550)
+    assert base != gerar_chave("lote", "v1", "Yamaha P-45", "Yamaha P-45 usado", 4000)
+    assert base != gerar_chave("lote", "v2", "Yamaha P-45", "Yamaha P-45 usado", 3500)
+    assert base != gerar_chave("item", "v1", "Yamaha P-45", "Yamaha P-45 usado", 3500)
+
+def test_faixa_preco_sem_preco_valido():
+    assert faixa_preco(None) == faixa_preco("abc") == faixa_preco(0) == 0
+    assert faixa_preco(3500) == faixa_preco(3550) != faixa_preco(1500)
+
+def test_veredito_volta_da_memoria_e_do_disco(banco, monkeypatch):
+    monkeypatch.setattr(cache_ia, "CACHE_IA_ATIVO", True)
+    chave = gerar_chave("item", "v1", "Yamaha P-45", "Yamaha P-45", 2000)
+    guardar(chave, {"valido": True}, "item", "Yamaha P-45", "Yamaha P-45", 2000)
+    assert buscar(chave) == {"valido": True}
+
+    cache_ia._memoria.clear()
+    assert buscar(chave) == {"valido": True}
+    assert chave in cache_ia._memoria
+
+def test_entrada_expirada_e_descartada(banco, monkeypatch):
+    monkeypatch.setattr(cache_ia, "CACHE_IA_ATIVO", True)
+    monkeypatch.setattr(cache_ia, "CACHE_IA_TTL", 60)
+    chave = gerar_chave("item", "v1", "Yamaha P-45", "Yamaha P-45", 2000)
+    guardar(chave, {"valido": True}, "item", "Yamaha P-45", "Yamaha P-45", 2000)
+
+    # Gravado há duas horas: vencido na memória e no disco
+    cache_ia._memoria[chave] = ({"valido": True}, cache_ia.time.time() - 7200)
+    banco.execute("UPDATE cache_ia SET criado_em = criado_em - 7200")
+    assert buscar(chave) is None
+    assert chave not in cache_ia._memoria
+    assert banco.execute("SELECT COUNT(*) FROM cache_ia").fetchone()[0] == 0
+
+def test_contadores_e_limpeza_com_validadores_em_paralelo(banco, monkeypatch):
+    import threading
+
+    monkeypatch.setattr(cache_ia, "CACHE_IA_ATIVO", True)
+    monkeypatch.setattr(cache_ia, "_gravacoes_desde_limpeza", 0)
+    monkeypatch.setitem(cache_ia.ESTATISTICAS_CACHE, "gravacoes", 0)
+    limpezas = []
+    monkeypatch.setattr(cache_ia, "_aplicar_limites", lambda conn: limpezas.append(1))
+
+    def validador(n):
+        for i in range(100):
+            titulo = f"Yamaha P-45 anúncio {n}-{i}"
+            guardar(gerar_chave("item", "v1", "Yamaha P-45", titulo, 2000), {"valido": True}, "item", "Yamaha P-45", titulo, 2000)
+
+    threads = [threading.Thread(target=validador, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # 400 gravações: exatamente duas limpezas (a cada 200)
+    assert cache_ia.ESTATISTICAS_CACHE["gravacoes"] == 400
+    assert len(limpezas) == 2
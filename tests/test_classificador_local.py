@@ -0,0 +1,62 @@
+import json
+
+import cache_ia
+import classificador_local
+from analyzer import pre_filtrar_lote
+from classificador_local import carregar_exemplos, decisao_local, triar_lote, PREFIXO_MOTIVO_LOCAL
+
+def _gravar_anuncio(conn, link, data, titulo, ai_analise, ativo=1, estado='funcional', preco=3000):
+    conn.execute('''
+        INSERT INTO precos (data_consulta, modelo, preco, estado_detalhado, loja, link, ai_analise, ativo, titulo)
+        VALUES (?, 'Roland FP-30X', ?, ?, 'Mercado Livre', ?, ?, ?, ?)
+    ''', (data, preco, estado, link, ai_analise, ativo, titulo))
+
+def test_treino_so_com_vereditos_do_gemini_e_sem_repeticao(banco):
+    cache_ia._conectar().execute(
+        "INSERT INTO cache_ia (chave, tipo, titulo_normalizado, preco, veredito) VALUES ('k', 'validacao', ?, ?, ?)",
+        ("capa roland fp 30x", 600, json.dumps({"valido": False, "estado": "indefinido"}))
+    )
+    # O mesmo anúncio revisitado em três dias: um exemplo só, com a última correção manual (desativado)
+    _gravar_anuncio(banco, "ml/1", "2026-01-01", "Roland FP-30X seminovo", "Piano ok")
+    _gravar_anuncio(banco, "ml/1", "2026-01-02", "Roland FP-30X seminovo", "Piano ok")
+    _gravar_anuncio(banco, "ml/1", "2026-01-03", "Roland FP-30X seminovo", "Piano ok", ativo=0)
+    # Decidido pelo próprio classificador: fica fora
+    _gravar_anuncio(banco, "ml/2", "2026-01-01", "Roland FP30X novo lacrado", f"{PREFIXO_MOTIVO_LOCAL} (novo, p=0.97)")
+
+    exemplos = sorted(carregar_exemplos(), key=lambda e: e['titulo'])
+    assert [(e['titulo'], e['valido']) for e in exemplos] == [
+        ("Roland FP-30X seminovo", False),
+        ("capa roland fp 30x", False),
+    ]
+
+def test_decisao_local_marca_o_motivo():
+    analise = decisao_local({"p_valido": 0.01, "estado": "novo", "p_estado": 0.5}, limiar=0.9)
+    assert analise['valido'] is False
+    assert analise['motivo'].startswith(PREFIXO_MOTIVO_LOCAL)
+    assert decisao_local({"p_valido": 0.6, "estado": "novo", "p_estado": 0.6}, limiar=0.9) is None
+
+class _ModeloConfiante:
+    """Classificador que aprova tudo com p alta, e rejeita com p alta o que tiver 'capa' no título."""
+    def prever_lote(self, itens):
+        return [
+            {"p_valido": 0.01 if "capa" in item['titulo'].lower() else 0.99, "estado": "novo", "p_estado": 0.99}
+            for item in itens
+        ]
+
+def test_ambiguo_com_p_alta_escala_para_o_gemini(monkeypatch):
+    monkeypatch.setattr(classificador_local, "obter_modelo", lambda: _ModeloConfiante())
+    itens = [
+        {'titulo': "Piano Roland FP-30X seminovo", 'preco': 3500},
+        # Sem o código do modelo: na busca do FP-30X o classificador não pode aprovar
+        {'titulo': "Yamaha piano digital em ótimo estado", 'preco': 3500},
+        {'titulo': "Capa piano digital 88 teclas", 'preco': 600},
+    ]
+    candidatos, rejeitados, confirmados = pre_filtrar_lote(itens, "Roland FP-30X")
+    assert rejeitados == [] and confirmados == [True, False, False]
+
+    decididos, a_escalar = triar_lote(candidatos, confirmados)
+    assert [(item['titulo'], analise['valido']) for item, analise in decididos] == [
+        ("Piano Roland FP-30X seminovo", True),
+        ("Capa piano digital 88 teclas", False),
+    ]
+    assert [item['titulo'] for item in a_escalar] == ["Yamaha piano digital em ótimo estado"]
@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+import dashboard_services as ds
+
+@pytest.fixture
+def cache_vazio(banco, monkeypatch):
+    monkeypatch.setattr(ds, "_cache", {**ds._cache, "precos": None, "conexao": None, "caminho": None,
+                                       "data_version": None, "ref": None, "full": None, "mercado": None})
+    yield ds._cache
+    if ds._cache["conexao"] is not None:
+        ds._cache["conexao"].close()
+
+def _inserir(conn, modelo="Roland FP-30X", preco=3000, ativo=1):
+    return conn.execute('''
+        INSERT INTO precos (data_consulta, modelo, preco, loja, link, ativo)
+        VALUES ('2026-01-01', ?, ?, 'ML', 'ml/' || (SELECT COUNT(*) FROM precos), ?)
+    ''', (modelo, preco, ativo)).lastrowid
+
+def _em_outra_thread(funcao):
+    resultado = []
+    t = threading.Thread(target=lambda: resultado.append(funcao()))
+    t.start()
+    t.join()
+    return resultado[0]
+
+def test_rerun_em_outra_thread_nao_reconsulta_sem_gravacao(banco, cache_vazio, monkeypatch):
+    _inserir(banco)
+    df_precos, _ = ds.carregar_dados_completos()
+    assert len(df_precos) == 1
+
+    leituras = []
+    ler_precos = ds._ler_precos
+    monkeypatch.setattr(ds, "_ler_precos", lambda *a: leituras.append(a) or ler_precos(*a))
+    # Cada rerun do Streamlit é uma thread nova: o atalho do data_version vale mesmo assim
+    _em_outra_thread(ds.carregar_dados_completos)
+    assert leituras == []
+
+    _inserir(banco, preco=2500)
+    df_precos, _ = _em_outra_thread(ds.carregar_dados_completos)
+    assert sorted(df_precos['preco']) == [2500, 3000]
+    assert leituras  # Só o delta
+
+def test_sessoes_concorrentes_nao_corrompem_o_cache(banco, cache_vazio):
+    for preco in range(1000, 1200):
+        _inserir(banco, preco=preco)
+    erros = []
+
+    def sessao():
+        try:
+            for _ in range(5):
+                ds.carregar_dados_completos()
+                ds.invalidar_cache(ids=[1, 2, 3])
+        except Exception as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=sessao) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert erros == []
+    assert len(ds.carregar_dados_completos()[0]) == 200
+
+def test_diff_do_editor_e_contra_a_pagina_exibida(banco, cache_vazio):
+    ids = [_inserir(banco, preco=p) for p in (3000, 3100, 3200)]
+    exibida = ds.pagina_anuncios(ordem="Mais antigos")
+    ds.carregar_dados_completos()
+
+    # Outro escritor desativa o 1º anúncio depois da página ter sido exibida
+    banco.execute("UPDATE precos SET ativo = 0 WHERE id = ?", (ids[0],))
+    ds.carregar_dados_completos()
+
+    # O usuário só desmarcou o 2º
+    editada = exibida.copy()
+    editada.loc[editada['id'] == ids[1], 'ativo'] = 0
+    alterados = ds._linhas_alteradas(editada, exibida)
+    assert alterados.to_dict() == {ids[1]: False}
+
+    assert ds.salvar_lote_db(editada, exibida) == 1
+    assert banco.execute("SELECT id, ativo FROM precos ORDER BY id").fetchall() == [(ids[0], 0), (ids[1], 0), (ids[2], 1)]
@@ -0,0 +1,100 @@
+import random
+
+import pytest
+
+def _resumo(conn):
+    return {
+        row[0]: row[1:]
+        for row in conn.execute("SELECT modelo_key, qtd, minimo, maximo, soma_log, qtd_log, melhor_id FROM resumo_modelos")
+    }
+
+def _resumo_do_zero(conn):
+    """O que m007 calcula na carga inicial, direto do histórico."""
+    return {
+        row[0]: row[1:]
+        for row in conn.execute('''
+            SELECT chave, COUNT(*), MIN(c), MAX(c), COALESCE(SUM(CASE WHEN c > 0 THEN ln(c) END), 0), SUM(c > 0),
+                   (SELECT p2.id FROM precos p2
+                    WHERE UPPER(TRIM(p2.modelo)) = chave AND p2.ativo = 1 AND p2.preco IS NOT NULL
+                    ORDER BY p2.preco + COALESCE(p2.custo_reparo, 0), p2.id LIMIT 1)
+            FROM (SELECT UPPER(TRIM(modelo)) AS chave, preco + COALESCE(custo_reparo, 0) AS c FROM precos
+                  WHERE ativo = 1 AND preco IS NOT NULL)
+            GROUP BY chave
+        ''')
+    }
+
+def _conferir(conn):
+    atual, esperado = _resumo(conn), _resumo_do_zero(conn)
+    assert atual.keys() == esperado.keys()
+    for chave, (qtd, minimo, maximo, soma_log, qtd_log, melhor_id) in esperado.items():
+        assert atual[chave] == (qtd, minimo, maximo, pytest.approx(soma_log), qtd_log, melhor_id), chave
+
+def test_resumo_modelos_acompanha_updates_e_deletes(banco):
+    sorteio = random.Random(7)
+    modelos = ["Roland FP-30X", "roland fp-30x ", "Yamaha P-45", "Casio PX-S1100"]
+    for i in range(60):
+        banco.execute(
+            "INSERT INTO precos (data_consulta, modelo, preco, custo_reparo, loja, link, ativo) VALUES ('2026-01-01', ?, ?, ?, 'ML', ?, ?)",
+            (sorteio.choice(modelos), sorteio.choice([0, 1500, 2000, 2000, 3200, 4100]),
+             sorteio.choice([None, 0, 300]), f"ml/{i}", sorteio.random() < 0.8)
+        )
+    _conferir(banco)
+
+    for _ in range(300):
+        id_ = sorteio.randint(1, 60)
+        operacao = sorteio.choice(["preco", "reparo", "ativo", "modelo", "delete", "mesmo valor"])
+        if operacao == "preco":
+            banco.execute("UPDATE precos SET preco = ? WHERE id = ?", (sorteio.choice([None, 1000, 2000, 5000]), id_))
+        elif operacao == "reparo":
+            banco.execute("UPDATE precos SET custo_reparo = ? WHERE id = ?", (sorteio.choice([None, 0, 800]), id_))
+        elif operacao == "ativo":
+            banco.execute("UPDATE precos SET ativo = 1 - ativo WHERE id = ?", (id_,))
+        elif operacao == "modelo":
+            banco.execute("UPDATE precos SET modelo = ? WHERE id = ?", (sorteio.choice(modelos), id_))
+        elif operacao == "delete":
+            banco.execute("DELETE FROM precos WHERE id = ?", (id_,))
+        else:
+            banco.execute("UPDATE precos SET preco = preco, modelo = modelo WHERE id = ?", (id_,))
+        _conferir(banco)
+
+def test_update_sem_tirar_extremo_nao_recalcula(banco):
+    for i, preco in enumerate([2000, 3000, 4000]):
+        banco.execute(
+            "INSERT INTO precos (data_consulta, modelo, preco, loja, link, ativo) VALUES ('2026-01-01', 'Yamaha P-45', ?, 'ML', ?, 1)",
+            (preco, f"ml/{i}")
+        )
+    # Depois do recálculo o resumo sempre bate com o histórico; um valor "plantado" só sobrevive sem recálculo
+    banco.execute("UPDATE resumo_modelos SET maximo = 9999")
+    banco.execute("UPDATE precos SET preco = 3500 WHERE preco = 3000")
+    assert _resumo(banco)["YAMAHA P-45"][:3] == (3, 2000, 9999)
+    banco.execute("UPDATE precos SET preco = 1000 WHERE preco = 2000")
+    assert _resumo(banco)["YAMAHA P-45"][:3] == (3, 1000, 4000)
+
+def test_banco_novo_chega_na_versao_atual(banco):
+    from migracoes import VERSAO_ATUAL, aplicar_migracoes, versao_banco
+
+    assert versao_banco() == VERSAO_ATUAL
+    assert aplicar_migracoes() == 0
+
+def test_duplicados_do_mesmo_dia_vao_para_tabela_de_copia(tmp_path, monkeypatch):
+    import conexao
+    from migracoes import VERSAO_ATUAL, aplicar_migracoes, m001_tabela_precos, versao_banco
+
+    conexao.fechar_conexao()
+    monkeypatch.setattr(conexao, "DB_PATH", str(tmp_path / "antigo.db"))
+    conn = conexao.obter_conexao()
+    # Banco da v3.1: sem UNIQUE, a mesma página gravada duas vezes no dia
+    m001_tabela_precos(conn)
+    conn.executemany(
+        "INSERT INTO precos (data_consulta, modelo, preco, link) VALUES (?, 'Yamaha P-45', ?, ?)",
+        [('2025-03-01', 2000, 'ml/1'), ('2025-03-01', 2100, 'ml/1'), ('2025-03-01', 2200, 'ml/1'),
+         ('2025-03-02', 2000, 'ml/1'), ('2025-03-01', 3000, 'ml/2')]
+    )
+    try:
+        aplicar_migracoes()
+        assert versao_banco() == VERSAO_ATUAL
+        assert conn.execute("SELECT id FROM precos ORDER BY id").fetchall() == [(1,), (4,), (5,)]
+        copia = conn.execute("SELECT id, preco FROM precos_duplicados_removidos ORDER BY id").fetchall()
+        assert copia == [(2, 2100.0), (3, 2200.0)]
+    finally:
+        conexao.fechar_conexao()
@@ -0,0 +1,46 @@
+import pytest
+
+import parser_ml
+from parser_ml import parsear_resultados, encontrar_produtos, limpar_preco
+
+def _card(tag, classe, titulo, preco):
+    return (
+        f'<{tag} class="{classe} extra"><h2 class="ui-search-item__title">{titulo}</h2>'
+        f'<a class="ui-search-link" href="https://produto.mercadolivre.com.br/{titulo}">ver</a>'
+        f'<div class="ui-search-price__second-line"><span class="andes-money-amount__fraction">{preco}</span></div>'
+        f'<span class="ui-search-item__location">Brasília</span></{tag}>'
+    )
+
+def _pagina(*cards, antes=""):
+    return f'<html><head>{antes}</head><body><ol>{"".join(cards)}</ol></body></html>'
+
+@pytest.fixture(autouse=True)
+def sem_layout_lembrado(monkeypatch):
+    monkeypatch.setattr(parser_ml, "_layout_lembrado", None)
+
+def test_classe_em_script_antes_dos_cards_nao_corta_errado():
+    script = '<script>if (a<b) { estado = {"classe": "ui-search-layout__item", "<li": 1}; }</script>'
+    html = _pagina(_card('li', 'ui-search-layout__item', 'FP-30X', '3.200'), antes=script)
+    itens = parsear_resultados(html, 'Roland FP-30X', 'fp-30x')
+    assert [(i['titulo'], i['preco']) for i in itens] == [('FP-30X', 3200.0)]
+
+def test_layout_lembrado_e_esquecido_quando_nao_casa():
+    encontrar_produtos(_pagina(_card('div', 'andes-card', 'A', '1.000')))
+    assert parser_ml._layout_lembrado == 2
+    assert encontrar_produtos(_pagina('<p>nada</p>')) == []
+    assert parser_ml._layout_lembrado is None
+
+def test_layout_preferido_vence_o_lembrado():
+    encontrar_produtos(_pagina(_card('div', 'andes-card', 'A', '1.000')))
+    # Agora a página tem o layout preferido (li); o andes-card dentro dele daria cards "piores"
+    html = _pagina(_card('li', 'ui-search-layout__item', 'B', '2.000') + _card('li', 'ui-search-layout__item', 'C', '2.500'))
+    assert len(encontrar_produtos(html)) == 2
+    assert parser_ml._layout_lembrado == 0
+
+def test_preco_abaixo_do_minimo_e_descartado():
+    html = _pagina(_card('li', 'ui-search-layout__item', 'Capa', '120'), _card('li', 'ui-search-layout__item', 'Piano', '1.800'))
+    assert [i['titulo'] for i in parsear_resultados(html, 'x', 'x')] == ['Piano']
+
+def test_limpar_preco():
+    assert limpar_preco("R$ 3.499,90") == 3499.90
+    assert limpar_preco("") == 0.0
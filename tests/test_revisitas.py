@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import database
+from database import SQL_UPSERT_PRECO, _linha_preco, atualizar_titulo
+from revisitas import classificar, preparar_revisita, NOVO, INALTERADO, TITULO_RETOCADO, MUDOU_PRECO, MUDOU_TITULO
+
+LINK = "https://produto.mercadolivre.com.br/MLB-123-roland-fp30x"
+TITULO = "Roland FP-30X seminovo com fonte"
+
+def _gravar(conn, preco, titulo=TITULO, data=None, **extra):
+    conn.execute(SQL_UPSERT_PRECO, _linha_preco({
+        'data': data or datetime.now().strftime("%Y-%m-%d"), 'modelo': 'Roland FP-30X', 'preco': preco,
+        'condicao': 'Usado', 'loja': 'Mercado Livre', 'localizacao': 'DF', 'tem_envio': True,
+        'link': LINK, 'titulo': titulo, **extra,
+    }))
+
+def _item(preco, titulo=TITULO, link=LINK):
+    return {'link': link, 'preco': preco, 'titulo': titulo}
+
+def test_classificar(banco):
+    _gravar(banco, 3000, data="2026-01-01")
+    assert classificar(_item(3000, link=LINK + "-outro"))[0] == NOVO
+    assert classificar(_item(3000))[0] == INALTERADO
+    assert classificar(_item(2700))[0] == MUDOU_PRECO
+    assert classificar(_item(3000, "Capa de teclado usada"))[0] == MUDOU_TITULO
+
+def test_titulo_retocado_com_mesmo_preco_nao_e_mudanca_de_preco(banco):
+    _gravar(banco, 3000, data="2026-01-01")
+    situacao, registro = classificar(_item(3000, TITULO + " urgente"))
+    assert situacao == TITULO_RETOCADO
+
+    atualizar_titulo(registro, TITULO + " urgente")
+    assert classificar(_item(3000, TITULO + " urgente"))[0] == INALTERADO
+    assert banco.execute("SELECT COUNT(*), MAX(titulo) FROM precos").fetchone() == (1, TITULO + " urgente")
+
+def test_mudanca_de_preco_no_mesmo_dia_guarda_a_observacao_anterior(banco):
+    _gravar(banco, 3001)
+    _gravar(banco, 2701)
+    assert banco.execute("SELECT preco FROM precos").fetchall() == [(2701,)]
+    assert banco.execute("SELECT link, preco, titulo FROM historico_precos").fetchall() == [(LINK, 3001, TITULO)]
+
+    # Mesmo preço de novo: nada a guardar
+    _gravar(banco, 2701)
+    assert banco.execute("SELECT COUNT(*) FROM historico_precos").fetchone()[0] == 1
+
+def test_indice_recarregado_por_banco(banco):
+    assert database._indice_links is None
+    _gravar(banco, 3000)
+    assert database.verificar_se_ja_existe(LINK + "?tracking_id=abc")
+
+def test_revisita_de_loja_passa_pelo_preparo_de_loja():
+    from pipeline import PipelineScout, Lote, FONTE_LOJAS
+
+    revisita = {'link': 'https://loja.com.br/fp30x', 'preco': 4200, 'titulo': 'Roland FP-30X', 'preco_anterior': 4500}
+    lote = Lote('Roland FP-30X', FONTE_LOJAS, [], revisitas=[revisita])
+    PipelineScout(stats={})._validar(lote)
+    assert lote.aprovados == [revisita]
+    assert revisita['localizacao'] == 'Loja Oficial' and revisita['ai_analise'] == 'Loja Confiável'
+    assert revisita['preco_anterior'] == 4500
+
+def test_ativo_vem_do_item_e_a_revisita_herda(banco):
+    # Sem 'ativo' no item: ativo; 'nao_funcional' (preparar_item_ml) grava 0
+    _gravar(banco, 3000, data="2026-01-01")
+    _gravar(banco, 3000, data="2026-01-01", link=LINK + "-quebrado", ativo=0)
+    assert banco.execute("SELECT link, ativo FROM precos ORDER BY id").fetchall() == [(LINK, 1), (LINK + "-quebrado", 0)]
+
+    # Desativado à mão no dashboard: o upsert do mesmo dia não reativa, e a revisita de outro dia herda o 0
+    banco.execute("UPDATE precos SET ativo = 0 WHERE link = ?", (LINK,))
+    _gravar(banco, 3000, data="2026-01-01")
+    situacao, registro = classificar(_item(2500))
+    assert situacao == MUDOU_PRECO
+    revisita = preparar_revisita({**_item(2500), 'modelo': 'Roland FP-30X', 'localizacao': 'DF', 'tem_envio': True}, registro)
+    banco.execute(SQL_UPSERT_PRECO, _linha_preco(revisita))
+    assert banco.execute("SELECT data_consulta, ativo FROM precos WHERE link = ? ORDER BY id", (LINK,)).fetchall() == [
+        ("2026-01-01", 0), (revisita['data'], 0)
+    ]